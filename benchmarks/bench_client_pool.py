@@ -0,0 +1,61 @@
+"""Compare a new Groq client per request with the pooled client.
+
+Runs against the local stub server, which sleeps ``--handshake`` seconds on
+every new connection to stand in for a TLS handshake:
+
+    python -m benchmarks.bench_client_pool --requests 30 --handshake 0.05
+"""
+import argparse
+import time
+
+from groq import Groq
+
+from groq_prompt_engineer.client import close_clients, get_client, timings
+from groq_prompt_engineer.completion import stream_completion
+
+from .stub_server import StubServer
+
+MODEL = "llama-3.1-8b-instant"
+
+
+def run(make_client, requests):
+    latencies = []
+    for _ in range(requests):
+        client = make_client()
+        start = time.perf_counter()
+        stream_completion(client, MODEL, "You are a helpful assistant.", "Say something.")
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies
+
+
+def report(label, latencies, connections):
+    total = sum(latencies)
+    print(f"{label:<9} total {total:6.3f}s  median {latencies[len(latencies) // 2] * 1000:7.1f}ms  "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f}ms  connections {connections}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--handshake", type=float, default=0.05, help="Simulated per-connection setup cost (s)")
+    parser.add_argument("--ttft", type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    with StubServer(ttft=args.ttft, tokens_per_s=50000, connect_latency=args.handshake) as server:
+        fresh = run(lambda: Groq(api_key="stub", base_url=server.base_url), args.requests)
+        fresh_connections = server.stats["connections"]
+
+        timings.clear()
+        pooled = run(lambda: get_client("stub", base_url=server.base_url), args.requests)
+        pooled_connections = server.stats["connections"] - fresh_connections
+        close_clients()
+
+    report("per-call", fresh, fresh_connections)
+    report("pooled", pooled, pooled_connections)
+    print(f"saved    {sum(fresh) - sum(pooled):6.3f}s over {args.requests} requests")
+    print(f"pooled request timing: {timings.summary()}")
+
+
+if __name__ == "__main__":
+    main()
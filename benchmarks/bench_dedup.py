@@ -0,0 +1,112 @@
+"""Near-duplicate index speed, and token spend per unique pair with and without it.
+
+Part one fills a :class:`~groq_prompt_engineer.dedup.NearDuplicateIndex`
+with synthetic pairs and reports the cost of ``add`` as it grows. Part two
+calls ``generate_test_data`` repeatedly on one topic against a stub model
+that, like a real one, keeps coming back to its favourite points in
+slightly different words (unless the prompt lists them as covered), and
+compares tokens (prompt and output) per unique pair with exact-only de-duplication:
+
+    python -m benchmarks.bench_dedup --pairs 100000 --runs 10
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from groq_prompt_engineer import generation
+from groq_prompt_engineer.dedup import NearDuplicateIndex
+from groq_prompt_engineer.rate_limit import RateLimiter
+from groq_prompt_engineer.tokens import count_tokens
+
+from .stub import StubGroqClient
+
+MODEL = "llama-3.1-8b-instant"
+TOPIC = "home coffee brewing"
+SUBJECTS = ["grind size", "water temperature", "brew time", "bean freshness", "roast level", "water hardness",
+            "filter type", "coffee ratio", "bloom time", "pour speed", "kettle type", "storage", "altitude",
+            "decaf beans", "milk texture", "burr sharpness", "tamping pressure", "preinfusion", "agitation",
+            "cup preheating", "bean origin", "processing method", "dose", "basket size", "steep time"]
+EFFECTS = ["bitterness", "acidity", "body", "sweetness", "aroma", "caffeine", "clarity", "aftertaste",
+           "crema", "mouthfeel", "balance", "consistency"]
+OPENERS = ["Can you explain", "Could you tell me", "Please explain", "I wonder", "Quick question about"]
+
+
+def index_scaling(count, checkpoints=5):
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(5000)]
+    index = NearDuplicateIndex()
+    step = max(1, count // checkpoints)
+    for start in range(0, count, step):
+        batch = [
+            {"human": " ".join(rng.choices(words, k=12)), "ai": " ".join(rng.choices(words, k=30))}
+            for _ in range(min(step, count - start))
+        ]
+        started = time.perf_counter()
+        for pair in batch:
+            index.add(pair)
+        per_pair = (time.perf_counter() - started) / len(batch)
+        print(f"index size {len(index):7d}: {per_pair * 1e6:6.1f}us per add")
+
+
+class RepetitiveModel:
+    """Stub responder preferring a few points, phrased differently each time, unless told to avoid them."""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.points = [(subject, effect) for subject in SUBJECTS for effect in EFFECTS]
+        self.weights = [1 / (rank + 1) for rank in range(len(self.points))]  # Zipf-like favourites
+        self.tokens = 0
+
+    def __call__(self, prompt):
+        count = int(re.search(r"Number of pairs: (\d+)", prompt).group(1))
+        avoid = prompt.lower()
+        pairs = []
+        while len(pairs) < count:
+            subject, effect = self.rng.choices(self.points, self.weights)[0]
+            if f"{subject} affect {effect}" in avoid and self.rng.random() < 0.9:
+                continue
+            opener = self.rng.choice(OPENERS)
+            pairs.append({
+                "human": f"{opener} how does {subject} affect {effect} in coffee?",
+                "ai": f"Changing the {subject} shifts the {effect} of the cup because extraction speeds up or "
+                      f"slows down; adjust the {subject} in small steps and taste the {effect} each time.",
+            })
+        text = json.dumps(pairs, indent=2)
+        self.tokens += count_tokens(prompt) + count_tokens(text)
+        return text
+
+
+def token_spend(runs, pairs_per_run, use_index):
+    model = RepetitiveModel()
+    client = StubGroqClient(ttft=0.0, tokens_per_s=10 ** 7, responder=model)
+    index = NearDuplicateIndex() if use_index else None
+    generated = []
+    for _ in range(runs):
+        try:
+            generated += generation.generate_test_data(
+                client, TOPIC, pairs_per_run, model=MODEL, limiter=RateLimiter(), dedupe_index=index,
+            )
+        except ValueError:
+            pass  # Nothing new left to say on the topic
+    judge = NearDuplicateIndex()
+    unique = sum(judge.add(pair) for pair in generated)
+    return {"pairs": len(generated), "unique": unique, "requests": client.calls,
+            "tokens_per_unique_pair": round(model.tokens / unique, 1) if unique else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=100_000, help="Pairs added to the index in part one")
+    parser.add_argument("--runs", type=int, default=10, help="generate_test_data calls per mode in part two")
+    parser.add_argument("--pairs-per-run", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index_scaling(args.pairs)
+    for label, use_index in (("exact dedupe only", False), ("near-duplicate index", True)):
+        print(f"{label:<22} {token_spend(args.runs, args.pairs_per_run, use_index)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Prompt evaluation: vectorized scoring speed, and requests saved by the per-(prompt, case) cache.
+
+Part one scores synthetic answers for several prompts on one test set with
+:func:`~groq_prompt_engineer.evaluation.score_outputs` and with a plain
+per-pair Python loop. Part two evaluates a few prompts on a test set
+against the in-process stub client, then edits one prompt and adds cases
+and evaluates again, reporting the requests each run sent:
+
+    python -m benchmarks.bench_evaluation --prompts 4 --score-cases 10000 --cases 50
+"""
+import argparse
+import collections
+import os
+import random
+import re
+import tempfile
+import time
+
+from groq_prompt_engineer.cache import ResponseCache
+from groq_prompt_engineer.evaluation import SCORES, evaluate_prompts, score_outputs
+from groq_prompt_engineer.rate_limit import RateLimiter
+
+from .stub import StubGroqClient
+
+MODEL = "llama-3.1-8b-instant"
+# The benchmark measures requests saved, not Groq's quotas
+UNLIMITED = {MODEL: {"requests_per_minute": 10 ** 6, "tokens_per_minute": 10 ** 9}}
+
+
+def loop_scores(output, reference):
+    """The same four scores for one pair, the straightforward way."""
+    output_words = re.findall(r"\w+", output.lower())
+    reference_words = re.findall(r"\w+", reference.lower())
+    common = sum((collections.Counter(output_words) & collections.Counter(reference_words)).values())
+    f1 = 0.0
+    if common:
+        precision, recall = common / len(output_words), common / len(reference_words)
+        f1 = 2 * precision * recall / (precision + recall)
+    return {
+        "exact_match": float(bool(output_words) and output_words == reference_words),
+        "f1": f1,
+        "length": float(len(output_words)),
+        "length_ratio": len(output_words) / len(reference_words) if reference_words else 0.0,
+    }
+
+
+def scoring(prompts, cases):
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(2000)]
+    # As in an evaluation: every prompt answers every case, so each reference appears once per prompt
+    test_set = [" ".join(rng.choices(words, k=rng.randint(5, 60))) for _ in range(cases)]
+    references = test_set * prompts
+    outputs = [" ".join(rng.choices(words, k=rng.randint(5, 60))) for _ in range(len(references))]
+    started = time.perf_counter()
+    vectorized = score_outputs(outputs, references)
+    vectorized_s = time.perf_counter() - started
+    started = time.perf_counter()
+    looped = [loop_scores(output, reference) for output, reference in zip(outputs, references)]
+    loop_s = time.perf_counter() - started
+    drift = max(
+        abs(a - b[name]) for name in SCORES for a, b in zip(vectorized[name].tolist(), looped)
+    )
+    print(f"scoring {prompts}x{cases} answers: vectorized {vectorized_s:.3f}s, per-pair loop {loop_s:.3f}s, "
+          f"max difference {drift:.1e}")
+
+
+def caching(prompts, cases, ttft):
+    client = StubGroqClient(ttft=ttft, tokens_per_s=2000, responder=lambda question: f"Answer: {question}")
+    test_set = [{"human": f"Question {i}?", "ai": f"Answer: Question {i}?"} for i in range(cases)]
+    variants = [f"Prompt variant {i}: answer in one sentence." for i in range(prompts)]
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(path=os.path.join(directory, "responses.sqlite3"))
+        runs = (
+            ("first run", variants, test_set),
+            ("unchanged rerun", variants, test_set),
+            ("one prompt edited, 5 cases added", variants[:-1] + ["An edited prompt."],
+             test_set + [{"human": f"New question {i}?", "ai": "Answer"} for i in range(5)]),
+        )
+        for label, run_prompts, run_cases in runs:
+            started = time.perf_counter()
+            outcome = evaluate_prompts(client, run_prompts, run_cases, model=MODEL, limiter=RateLimiter(UNLIMITED), cache=cache)
+            print(f"{label:<34} {len(run_prompts)}x{len(run_cases)} evaluations, {outcome['requests']:4d} requests, "
+                  f"{outcome['cached']:4d} cached, {time.perf_counter() - started:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=4)
+    parser.add_argument("--score-cases", type=int, default=10_000, help="Test cases scored per prompt in part one")
+    parser.add_argument("--cases", type=int, default=50, help="Test cases evaluated in part two")
+    parser.add_argument("--ttft", type=float, default=0.05, help="Stub time to first token, seconds")
+    args = parser.parse_args(argv)
+
+    scoring(args.prompts, args.score_cases)
+    caching(args.prompts, args.cases, args.ttft)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""History store: append rate, and full-text search latency as the history grows.
+
+Records synthetic prompts in a :class:`~groq_prompt_engineer.history.HistoryStore`
+in a temporary directory, then times searches for two words from random
+past entries (the most common words in them, and the rarest) through the
+FTS5 index and through the ``LIKE`` scan used when SQLite lacks FTS5:
+
+    python -m benchmarks.bench_history --entries 50000 --queries 200
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from groq_prompt_engineer.history import DATASET, PROMPT, HistoryStore
+
+MODEL = "llama-3.1-8b-instant"
+OWNER = "bench-key"
+SYLLABLES = [consonant + vowel for consonant in "bcdfghklmnprstvz" for vowel in "aeiou"] + ["an", "er", "in", "st"]
+
+
+def vocabulary(rng, size):
+    """Made-up words; unlike ``word1``, ``word2``… they don't all share a prefix."""
+    words = dict.fromkeys("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(size * 2))
+    return list(words)[:size]
+
+
+def _text(rng, words, cum_weights, count):
+    return " ".join(rng.choices(words, cum_weights=cum_weights, k=count))
+
+
+def fill(store, entries, rng, words, cum_weights):
+    elapsed = 0.0
+    outputs = []
+    for i in range(entries):
+        task = _text(rng, words, cum_weights, rng.randint(4, 12))
+        output = _text(rng, words, cum_weights, rng.randint(80, 300))
+        outputs.append(output)
+        started = time.perf_counter()
+        store.record(DATASET if i % 10 == 0 else PROMPT, task, output, MODEL, params={"temperature": 0.5},
+                     latency_s=1.0, prompt_tokens=300, output_tokens=400, api_key=OWNER)
+        elapsed += time.perf_counter() - started
+    print(f"recorded {entries:,} entries in {elapsed:.2f}s ({entries / elapsed:,.0f}/s), "
+          f"database {os.path.getsize(store.path) / 2 ** 20:.1f} MiB")
+    return outputs
+
+
+def timed_searches(store, queries, owner):
+    latencies, hits = [], 0
+    for query in queries:
+        started = time.perf_counter()
+        hits += bool(store.search(query, api_key_hash=owner))
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], hits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    words = vocabulary(rng, 20_000)
+    # Zipf's law, as in natural language: a few very common words, a long tail of rare ones
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    rank = {word: i for i, word in enumerate(words)}
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(path=os.path.join(directory, "history.sqlite3"))
+        outputs = fill(store, args.entries, rng, words, cum_weights)
+        # Sorted most common first
+        samples = [sorted(set(output.split()), key=rank.get) for output in rng.sample(outputs, args.queries)]
+        queries = {"common words": [" ".join(sample[:2]) for sample in samples],
+                   "distinctive words": [" ".join(sample[-2:]) for sample in samples]}
+        owner = store.recent(limit=1)[0]["key_hash"]
+        if not store.fts:
+            print("SQLite here has no FTS5; only the LIKE scan is measured")
+        for label, fts in (("FTS5 index", True), ("LIKE scan", False)):
+            if fts and not store.fts:
+                continue
+            store.fts = fts
+            for kind, texts in queries.items():
+                p50, p95, hits = timed_searches(store, texts, owner)
+                print(f"{label:<11} {kind:<18} {len(texts)} searches: p50 {p50 * 1000:7.2f}ms, "
+                      f"p95 {p95 * 1000:7.2f}ms, {hits} with results")
+
+
+if __name__ == "__main__":
+    main()
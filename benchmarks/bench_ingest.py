@@ -0,0 +1,45 @@
+"""Measure document ingestion throughput on synthetic PDF and CSV files.
+
+    python -m benchmarks.bench_ingest --pages 500 --rows 100000 --workers 4
+"""
+import argparse
+import io
+import json
+import time
+
+from groq_prompt_engineer.ingest import IngestStats, iter_document_chunks
+
+from .fixtures import make_csv, make_text_pdf
+
+MODEL = "llama3-70b-8192"
+
+
+def ingest(source, file_type, workers=None):
+    stats = IngestStats()
+    started = time.perf_counter()
+    chunks = sum(1 for _ in iter_document_chunks(source, file_type, MODEL, 4096, stats, workers=workers))
+    return chunks, time.perf_counter() - started, stats.summary()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=None, help="PDF worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    pdf = make_text_pdf(args.pages)
+    for workers in sorted({1, args.workers or 0} - {0}) or [1]:
+        chunks, seconds, summary = ingest(pdf, "application/pdf", workers)
+        print(f"pdf  {args.pages} pages, {workers} worker(s): {chunks} chunks in {seconds:.2f}s "
+              f"({len(pdf) / 1e6 / seconds:.2f} MB/s of PDF)")
+        print("     " + json.dumps(summary))
+
+    csv = make_csv(args.rows)
+    chunks, seconds, summary = ingest(io.BytesIO(csv), "text/csv")
+    print(f"csv  {args.rows} rows: {chunks} chunks in {seconds:.2f}s ({len(csv) / 1e6 / seconds:.2f} MB/s)")
+    print("     " + json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare single-request and sharded dataset generation against the stub client.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sharded_dataset --pairs 120 --workers 4
+"""
+import argparse
+import time
+
+from groq_prompt_engineer.completion import stream_completion
+from groq_prompt_engineer.dataset import build_dataset_prompt, generate_pairs_sharded, parse_pairs
+from groq_prompt_engineer.rate_limit import RateLimiter
+
+from .stub import StubGroqClient
+
+MODEL = "llama-3.1-8b-instant"
+SYSTEM_PROMPT = "You are a helpful and informative AI assistant."
+
+
+def run_single(client, num_pairs):
+    prompt = build_dataset_prompt("benchmarking", num_pairs)
+    return parse_pairs(stream_completion(client, MODEL, SYSTEM_PROMPT, prompt))
+
+
+def run_sharded(client, num_pairs, shard_size, workers):
+    return generate_pairs_sharded(
+        client, MODEL, SYSTEM_PROMPT, "benchmarking", num_pairs,
+        shard_size=shard_size, max_workers=workers, limiter=RateLimiter(),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=120)
+    parser.add_argument("--shard-size", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--tokens-per-s", type=float, default=2000.0)
+    args = parser.parse_args(argv)
+
+    client = StubGroqClient(ttft=args.ttft, tokens_per_s=args.tokens_per_s)
+
+    start = time.perf_counter()
+    single = run_single(client, args.pairs)
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sharded = run_sharded(client, args.pairs, args.shard_size, args.workers)
+    sharded_s = time.perf_counter() - start
+
+    print(f"single : {len(single):4d} pairs in {single_s:6.2f}s")
+    print(f"sharded: {len(sharded):4d} pairs in {sharded_s:6.2f}s "
+          f"({args.workers} workers, shard size {args.shard_size})")
+    print(f"speedup: {single_s / sharded_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Upstream calls saved by single-flight coalescing under bursty traffic.
+
+Bursts of sessions ask for a handful of popular tasks at nearly the same
+moment (as when a class or a team tries the same example), against the
+local stub server. Runs once without and once with
+:class:`~groq_prompt_engineer.singleflight.SingleFlight` and reports
+upstream requests, dedup rate and latency:
+
+    python -m benchmarks.bench_single_flight --bursts 5 --sessions 16
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+
+from groq_prompt_engineer import generation
+from groq_prompt_engineer.client import close_clients, get_client
+from groq_prompt_engineer.metrics import percentile
+from groq_prompt_engineer.rate_limit import RateLimiter
+from groq_prompt_engineer.singleflight import SingleFlight
+
+from .stub_server import StubServer
+
+MODEL = "llama-3.1-8b-instant"
+UNLIMITED = {MODEL: {"requests_per_minute": 10 ** 6, "tokens_per_minute": 10 ** 9}}
+TASKS = ["Write a product description for a smart kettle", "Summarize a meeting transcript",
+         "Draft a polite follow-up email", "Explain recursion to a beginner", "Plan a team offsite"]
+
+
+def run(args, coalesce):
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) for rank in range(len(TASKS))]
+    flight = SingleFlight() if coalesce else None
+    latencies = []
+    lock = threading.Lock()
+
+    def session(task, delay):
+        time.sleep(delay)
+        started = time.perf_counter()
+        generation.generate_prompt(client, task, model=MODEL, limiter=limiter, single_flight=flight)
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    with StubServer(ttft=args.ttft, tokens_per_s=args.tokens_per_s) as server:
+        client = get_client("stub", base_url=server.base_url)
+        limiter = RateLimiter(UNLIMITED)
+        for _ in range(args.bursts):
+            threads = [
+                threading.Thread(target=session, args=(rng.choices(TASKS, weights)[0], rng.uniform(0, args.spread)))
+                for _ in range(args.sessions)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        requests = server.stats["requests"]
+    close_clients()
+    ordered = sorted(latencies)
+    total = len(ordered)
+    return {
+        "requests": total,
+        "upstream_calls": requests,
+        "dedup_rate": round(1 - requests / total, 3),
+        "p50_s": round(percentile(ordered, 50), 3),
+        "p95_s": round(percentile(ordered, 95), 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--sessions", type=int, default=16, help="Concurrent sessions per burst")
+    parser.add_argument("--spread", type=float, default=0.2, help="Seconds over which a burst's sessions start")
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-s", type=float, default=400.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+
+    for label, coalesce in (("independent", False), ("single-flight", True)):
+        print(f"{label:<14} {run(args, coalesce)}")
+
+
+if __name__ == "__main__":
+    main()
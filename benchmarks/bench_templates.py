@@ -0,0 +1,79 @@
+"""Render cost and cacheable prefix of the precompiled prompt templates.
+
+Compares the compiled ``cot_prompt`` template with the previous f-string
+meta-prompt (variables spread through the text) over a stream of requests
+with varying task, model and temperature:
+
+    python -m benchmarks.bench_templates --requests 20000
+"""
+import argparse
+import os
+import random
+import time
+
+from groq_prompt_engineer.generation import get_system_prompt
+from groq_prompt_engineer.rate_limit import RATE_LIMITS
+from groq_prompt_engineer.templates import COT_PROMPT
+
+
+def legacy_prompt(task, variables, model, temperature, max_output_tokens):
+    # The meta-prompt as it was before templates: variable fields start in step 3
+    steps = COT_PROMPT.prefix.replace(
+        "the selected Groq model (listed below)", f"the selected Groq model ({model})",
+    ).replace(
+        "the temperature setting and max token limit (listed below)",
+        f"the current temperature setting ({temperature}) and max token limit ({max_output_tokens})",
+    )
+    return f"""{steps}Task: {task}
+Variables: {variables}
+Selected Model: {model}
+Temperature: {temperature}
+Max Tokens: {max_output_tokens}
+
+Based on the above information, generate an optimal Chain of Thought prompt:
+"""
+
+
+def make_requests(count, seed=0):
+    rng = random.Random(seed)
+    models = sorted(RATE_LIMITS)
+    return [
+        (f"Task {i}: summarise document {rng.randrange(10 ** 6)}", "", rng.choice(models),
+         rng.choice((0.0, 0.5, 0.7, 1.0)), rng.choice((1024, 4096, 8192)))
+        for i in range(count)
+    ]
+
+
+def measure(render, requests):
+    started = time.perf_counter()
+    prompts = [render(*request) for request in requests]
+    elapsed = time.perf_counter() - started
+    sizes = [len(prompt.encode("utf-8")) for prompt in prompts]
+    # Bytes each request shares with the previous one: what a prefix cache can reuse
+    shared = [len(os.path.commonprefix([a, b]).encode("utf-8")) for a, b in zip(prompts, prompts[1:])]
+    return {
+        "render_us": elapsed / len(requests) * 1e6,
+        "bytes": sum(sizes) / len(sizes),
+        "shared": sum(shared) / max(1, len(shared)),
+    }
+
+
+def report(label, result):
+    print(f"{label:<9} render {result['render_us']:6.2f}us  prompt {result['bytes']:7.0f} B  "
+          f"shared prefix {result['shared']:7.0f} B ({result['shared'] / result['bytes']:.0%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    requests = make_requests(args.requests)
+    report("f-string", measure(legacy_prompt, requests))
+    report("compiled", measure(get_system_prompt, requests))
+    print(f"static prefix: {COT_PROMPT.prefix_bytes} B, ~{COT_PROMPT.prefix_tokens} tokens "
+          f"({COT_PROMPT.cache_id})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Import-time profile of the Streamlit app's module-level imports (``python -X importtime``).
+
+The app script's top-level ``import`` statements are read from its source
+and executed in a fresh interpreter with ``-X importtime``, so the report
+always matches what a cold start actually imports:
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --top 25 --all
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "v1.95-groq-prompt-engineer.py")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def app_imports(path=APP_PATH):
+    """The module-level import statements of the app script, as one source string."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def _run(source, cwd=ROOT):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", source], cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    for line in completed.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            yield {"module": module, "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                   "depth": len(indent) // 2}
+
+
+def profile(source, cwd=ROOT):
+    """Run ``source`` under ``-X importtime``; one dict per imported module, in import order.
+
+    Modules the interpreter imports at startup (``site``, ``encodings``...)
+    are left out, so only the cost of ``source`` itself is reported.
+    """
+    startup = {entry["module"] for entry in _run("pass", cwd)}
+    return [entry for entry in _run(source, cwd) if entry["module"] not in startup]
+
+
+def total_seconds(entries):
+    """Time spent importing, i.e. the sum over modules imported directly by the profiled code."""
+    return sum(entry["cumulative_us"] for entry in entries if entry["depth"] == 0) / 1e6
+
+
+def slowest(entries, top=10, top_level_only=True):
+    """``(module, milliseconds)`` for the slowest imports by cumulative time."""
+    chosen = [entry for entry in entries if entry["depth"] == 0 or not top_level_only]
+    chosen.sort(key=lambda entry: entry["cumulative_us"], reverse=True)
+    return [(entry["module"], round(entry["cumulative_us"] / 1000, 1)) for entry in chosen[:top]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--all", action="store_true", help="Include modules imported indirectly")
+    args = parser.parse_args(argv)
+
+    entries = profile(app_imports())
+    print(f"{'module':<60} {'cumulative ms':>14}")
+    for module, ms in slowest(entries, args.top, top_level_only=not args.all):
+        print(f"{module:<60} {ms:>14.1f}")
+    print(f"{'total':<60} {total_seconds(entries) * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""In-process stand-in for ``groq.Groq`` used by the offline benchmarks.
+
+Mimics ``client.chat.completions.create(..., stream=True)`` with a
+configurable time-to-first-token and output rate, so benchmarks measure our
+own overhead and concurrency rather than the network.
+"""
+import json
+import re
+import time
+from types import SimpleNamespace
+
+
+def fake_pairs_response(prompt, seed=""):
+    match = re.search(r"Number of pairs: (\d+)", prompt)
+    count = int(match.group(1)) if match else 1
+    batch = re.search(r"batch (\d+) of", prompt)
+    batch = batch.group(1) if batch else "1"
+    pairs = [
+        {"human": f"Question {seed}{batch}.{i} about the topic?", "ai": f"Answer {seed}{batch}.{i} with some detail."}
+        for i in range(count)
+    ]
+    return json.dumps(pairs, indent=2)
+
+
+def corrupt_pairs(text, rate, rng):
+    """Break roughly ``rate`` of the objects in a JSON pair array (missing colon), as a model sometimes does."""
+    try:
+        pairs = json.loads(text)
+    except ValueError:
+        return text
+    items = []
+    for pair in pairs:
+        item = json.dumps(pair)
+        if rng.random() < rate:
+            item = item.replace('"ai": ', '"ai" ', 1)
+        items.append("  " + item)
+    return "[\n" + ",\n".join(items) + "\n]"
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class _Completions:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def create(self, model, messages, stream=False, **kwargs):
+        owner = self.owner
+        owner.calls += 1
+        text = owner.responder(messages[-1]["content"])
+        pieces = [text[i:i + owner.chunk_chars] for i in range(0, len(text), owner.chunk_chars)]
+
+        def generate():
+            time.sleep(owner.ttft)
+            delay = owner.chunk_chars / 4 / owner.tokens_per_s  # ~4 chars per token
+            for piece in pieces:
+                yield _chunk(piece)
+                time.sleep(delay)
+
+        return generate()
+
+
+class StubGroqClient:
+    def __init__(self, ttft=0.2, tokens_per_s=400.0, chunk_chars=16, responder=fake_pairs_response):
+        self.ttft = ttft
+        self.tokens_per_s = tokens_per_s
+        self.chunk_chars = chunk_chars
+        self.responder = responder
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_Completions(self))
@@ -0,0 +1,180 @@
+"""Local Groq/OpenAI-compatible chat completions server for offline benchmarks.
+
+Serves ``POST /openai/v1/chat/completions`` (the path the ``groq`` SDK uses)
+with server-sent-event streaming over HTTP/1.1 keep-alive. Point a client at
+it with ``base_url=server.base_url``.
+
+``connect_latency`` is slept once per new TCP connection to stand in for the
+TLS handshake a real HTTPS endpoint costs, so connection reuse shows up in
+measurements.
+
+Faults are injected from a seeded RNG so runs are repeatable:
+``rate_limit_rate`` of requests get a Groq-style 429 with ``retry-after``
+and ``x-ratelimit-*`` headers, ``drop_rate`` of streams are cut off
+halfway, and ``malformed_rate`` of the conversation pairs in dataset
+responses are made invalid JSON.
+"""
+import itertools
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .stub import corrupt_pairs, fake_pairs_response
+
+
+_response_ids = itertools.count()
+
+
+def _default_responder(prompt):
+    if "Generate pairs of conversation" in prompt:
+        # Distinct pairs per response, like a sampled model (the remainder of a dataset isn't all duplicates)
+        return fake_pairs_response(prompt, seed=f"r{next(_response_ids)}-")
+    return "Step 1: Understand the task.\nStep 2: Reason about it.\nStep 3: Answer clearly.\n" * 8
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.stats["connections"] += 1
+        if self.server.connect_latency:
+            time.sleep(self.server.connect_latency)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_rate_limited(self, model):
+        server = self.server
+        body = json.dumps({"error": {
+            "message": f"Rate limit reached for model `{model}` (stub). Please try again in {server.retry_after}s.",
+            "type": "tokens",
+            "code": "rate_limit_exceeded",
+        }}).encode()
+        self.send_response(429)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("retry-after", str(math.ceil(server.retry_after)))
+        self.send_header("retry-after-ms", str(int(server.retry_after * 1000)))
+        self.send_header("x-ratelimit-limit-requests", "30")
+        self.send_header("x-ratelimit-remaining-requests", "0")
+        self.send_header("x-ratelimit-reset-requests", f"{server.retry_after}s")
+        self.send_header("x-ratelimit-limit-tokens", "6000")
+        self.send_header("x-ratelimit-remaining-tokens", "0")
+        self.send_header("x-ratelimit-reset-tokens", f"{server.retry_after}s")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server.stats["requests"] += 1
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        model = body.get("model", "stub")
+        rate_limited, dropped, corrupt = server.draw_faults()
+        if rate_limited:
+            self._send_rate_limited(model)
+            return
+        text = server.responder(prompt)
+        if corrupt:
+            text = corrupt_pairs(text, server.malformed_rate, server.rng_for_request())
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        time.sleep(server.ttft)
+        delay = server.chunk_chars / 4 / server.tokens_per_s
+        created = int(time.time())
+        cut_at = len(text) // 2 if dropped else None
+        try:
+            for start in range(0, len(text), server.chunk_chars):
+                if cut_at is not None and start >= cut_at:
+                    # Hang up mid-stream without the terminating chunk
+                    self.close_connection = True
+                    return
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": text[start:start + server.chunk_chars]}, "finish_reason": None}],
+                }
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                time.sleep(delay)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except ConnectionError:
+            # The client closed the stream early (e.g. a cancelled race)
+            self.close_connection = True
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, ttft=0.05, tokens_per_s=2000.0, chunk_chars=16,
+                 connect_latency=0.0, responder=_default_responder, rate_limit_rate=0.0, retry_after=0.1,
+                 malformed_rate=0.0, drop_rate=0.0, seed=0):
+        super().__init__((host, port), _Handler)
+        self.ttft = ttft
+        self.tokens_per_s = tokens_per_s
+        self.chunk_chars = chunk_chars
+        self.connect_latency = connect_latency
+        self.responder = responder
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.malformed_rate = malformed_rate
+        self.drop_rate = drop_rate
+        self.stats = {"connections": 0, "requests": 0, "rate_limited": 0, "dropped": 0}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up on idle keep-alive connections is normal
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def draw_faults(self):
+        """Decide, in request order, whether this request is rate limited, dropped or gets malformed pairs."""
+        with self._rng_lock:
+            rate_limited = self._rng.random() < self.rate_limit_rate
+            dropped = not rate_limited and self._rng.random() < self.drop_rate
+            if rate_limited:
+                self.stats["rate_limited"] += 1
+            if dropped:
+                self.stats["dropped"] += 1
+            return rate_limited, dropped, self.malformed_rate > 0
+
+    def rng_for_request(self):
+        with self._rng_lock:
+            return random.Random(self._rng.random())
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True, name="groq-stub")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
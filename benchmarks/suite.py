@@ -0,0 +1,267 @@
+"""Repeatable end-to-end benchmark suite against the local stub server.
+
+Scenarios go through the real code paths (pooled ``groq`` client over
+HTTP, rate limiter, streaming parser, ingestion pipeline); only Groq itself
+is replaced by :class:`~benchmarks.stub_server.StubServer`, with a fixed
+seed for 429 and malformed-JSON injection:
+
+* ``single_prompt`` – sequential ``generate_prompt`` calls
+* ``dataset_100`` – 100-pair ``generate_test_data`` runs (sharded)
+* ``concurrent_sessions`` – several sessions calling ``generate_prompt`` at once
+* ``pdf_ingest`` – chunking a large synthetic PDF
+* ``cold_import`` – the app's module-level imports in a fresh interpreter
+  (``-X importtime``, see :mod:`benchmarks.importtime`), with the slowest listed
+* ``app_rerun`` – reruns of the whole app script under Streamlit's ``AppTest``
+
+Each scenario reports throughput and p50/p95/p99 latency. Timings are
+absolute, so the baseline is per machine: ``--save-baseline`` records
+``benchmarks/baseline.json`` locally (it is not committed), and later runs
+are compared with it. A p95 latency or throughput more than ``--tolerance``
+(default 25%) worse than the baseline is a regression and the exit status
+is 1. A baseline recorded on a different machine or Python is not compared
+with; record a new one first:
+
+    python -m benchmarks.suite --save-baseline   # once per machine, and after intended changes
+    python -m benchmarks.suite
+    python -m benchmarks.suite --only single_prompt dataset_100
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+
+from groq_prompt_engineer import generation
+from groq_prompt_engineer.client import close_clients, get_client
+from groq_prompt_engineer.ingest import iter_document_chunks
+from groq_prompt_engineer.metrics import percentile
+from groq_prompt_engineer.rate_limit import RateLimiter
+from groq_prompt_engineer.timing import script_timer
+
+from . import importtime
+from .fixtures import make_text_pdf
+from .stub_server import StubServer
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+MODEL = "llama-3.1-8b-instant"
+# The suite measures our overhead, not Groq's quotas
+UNLIMITED = {MODEL: {"requests_per_minute": 10 ** 6, "tokens_per_minute": 10 ** 9}}
+
+SERVER_SETTINGS = {"ttft": 0.02, "tokens_per_s": 4000.0, "rate_limit_rate": 0.05, "retry_after": 0.05,
+                   "malformed_rate": 0.05, "seed": 1234}
+
+
+def summarize(latencies, seconds, extra=None):
+    ordered = sorted(latencies)
+    result = {
+        "ops": len(ordered),
+        "seconds": round(seconds, 3),
+        "throughput_per_s": round(len(ordered) / seconds, 2) if seconds else None,
+    }
+    for q in (50, 95, 99):
+        result[f"p{q}_s"] = round(percentile(ordered, q), 4) if ordered else None
+    result.update(extra or {})
+    return result
+
+
+def _timed_calls(fn, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def scenario_single_prompt(client, args):
+    def call():
+        generation.generate_prompt(client, "Write a product description for a smart kettle",
+                                   model=MODEL, limiter=RateLimiter(UNLIMITED))
+    started = time.perf_counter()
+    latencies = _timed_calls(call, args.prompts)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def scenario_dataset_100(client, args):
+    counts = []
+
+    def call():
+        pairs = generation.generate_test_data(client, "home coffee brewing", 100, model=MODEL, sharded=True,
+                                              limiter=RateLimiter(UNLIMITED))
+        counts.append(len(pairs))
+    started = time.perf_counter()
+    latencies = _timed_calls(call, args.datasets)
+    seconds = time.perf_counter() - started
+    return summarize(latencies, seconds, {
+        "pairs_per_s": round(sum(counts) / seconds, 1),
+        "min_pairs": min(counts),
+    })
+
+
+def scenario_concurrent_sessions(client, args):
+    limiter = RateLimiter(UNLIMITED)  # Sessions share one limiter, as in the app process
+    latencies = []
+    lock = threading.Lock()
+
+    def session(index):
+        for call in range(args.calls_per_session):
+            started = time.perf_counter()
+            generation.generate_prompt(client, f"Session {index} task {call}: plan a team offsite",
+                                       model=MODEL, limiter=limiter)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.sessions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, {"sessions": args.sessions})
+
+
+def scenario_pdf_ingest(client, args):
+    pdf = make_text_pdf(args.pdf_pages)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(args.ingest_runs):
+        run_started = time.perf_counter()
+        for _ in iter_document_chunks(pdf, "application/pdf", MODEL, 4096):
+            pass
+        latencies.append(time.perf_counter() - run_started)
+    seconds = time.perf_counter() - started
+    return summarize(latencies, seconds, {
+        "pages": args.pdf_pages,
+        "mb_per_s": round(len(pdf) * args.ingest_runs / 1e6 / seconds, 2),
+    })
+
+
+def scenario_cold_import(client, args):
+    source = importtime.app_imports()
+    runs = [importtime.profile(source) for _ in range(args.import_runs)]
+    latencies = [importtime.total_seconds(entries) for entries in runs]
+    median_run = sorted(runs, key=importtime.total_seconds)[len(runs) // 2]
+    return summarize(latencies, sum(latencies), {"slowest": importtime.slowest(median_run, 5)})
+
+
+def scenario_app_rerun(client, args):
+    from streamlit.testing.v1 import AppTest
+
+    # Reruns never call Groq; the key only gets the script past the API-key prompt
+    os.environ.setdefault("GROQ_API_KEY", "stub")
+    cwd = os.getcwd()
+    os.chdir(importtime.ROOT)  # The app opens its media files by relative path
+    try:
+        app = AppTest.from_file(importtime.APP_PATH, default_timeout=30)
+        app.run()
+        if app.exception:
+            # Timings of a script that crashes part-way would look fast, not broken
+            raise RuntimeError(f"The app raised on load: {app.exception[0].message}")
+        started = time.perf_counter()
+        for _ in range(args.reruns):
+            app.run()
+        seconds = time.perf_counter() - started
+    finally:
+        os.chdir(cwd)
+    # The app's own timing of each script run, without AppTest's overhead
+    return summarize(script_timer.reruns[-args.reruns:], seconds)
+
+
+SCENARIOS = {
+    "single_prompt": scenario_single_prompt,
+    "dataset_100": scenario_dataset_100,
+    "concurrent_sessions": scenario_concurrent_sessions,
+    "pdf_ingest": scenario_pdf_ingest,
+    "cold_import": scenario_cold_import,
+    "app_rerun": scenario_app_rerun,
+}
+
+# (metric, True if higher is better)
+COMPARED = (("p95_s", False), ("throughput_per_s", True))
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages for results worse than ``baseline``."""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get("scenarios", {}).get(name)
+        if not expected:
+            continue
+        for metric, higher_is_better in COMPARED:
+            new, old = result.get(metric), expected.get(metric)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "cpus": os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="Run only these scenarios")
+    parser.add_argument("--prompts", type=int, default=40, help="Sequential calls in single_prompt")
+    parser.add_argument("--datasets", type=int, default=3, help="100-pair runs in dataset_100")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--calls-per-session", type=int, default=10)
+    parser.add_argument("--pdf-pages", type=int, default=300)
+    parser.add_argument("--ingest-runs", type=int, default=3)
+    parser.add_argument("--import-runs", type=int, default=5, help="Fresh interpreters in cold_import")
+    parser.add_argument("--reruns", type=int, default=30, help="Script reruns in app_rerun")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+    # Injected faults make retries expected; keep their warnings out of the report
+    logging.basicConfig(level=logging.ERROR)
+
+    results = {}
+    with StubServer(**SERVER_SETTINGS) as server:
+        client = get_client("stub", base_url=server.base_url)
+        for name in args.only or SCENARIOS:
+            results[name] = SCENARIOS[name](client, args)
+            if not args.json:
+                print(f"{name:<20} " + "  ".join(f"{key} {value}" for key, value in results[name].items()))
+        server_stats = dict(server.stats)
+    close_clients()
+
+    report = {"environment": environment(), "server": {**SERVER_SETTINGS, **server_stats}, "scenarios": results}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with (run with --save-baseline)", file=sys.stderr)
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != report["environment"]:
+        print(f"{args.baseline} was recorded on {baseline.get('environment')}, not this machine "
+              f"({report['environment']}); not comparing (run with --save-baseline)", file=sys.stderr)
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    if not regressions:
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
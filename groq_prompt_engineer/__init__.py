@@ -0,0 +1,100 @@
+"""Reusable, Streamlit-free building blocks for the Groq Prompt Engineering Toolkit."""
+
+from .budget import BudgetPlan, plan_budget
+from .cache import ResponseCache, get_default_cache
+from .client import get_client
+from .dataset import (
+    build_dataset_prompt,
+    dedupe_pairs,
+    generate_pairs_sharded,
+    iter_pairs,
+    iter_pairs_salvaged,
+    parse_pairs,
+    split_shards,
+)
+from .extract_cache import ExtractionCache, get_default_extraction_cache
+from .fanout import fan_out_prompt
+from .generation import (
+    DEFAULT_MAX_OUTPUT_TOKENS,
+    DEFAULT_MODEL,
+    DEFAULT_SYSTEM_PROMPT,
+    DEFAULT_TEMPERATURE,
+    generate_prompt,
+    generate_test_data,
+    get_system_prompt,
+    make_client,
+    plan_dataset,
+    plan_prompt,
+)
+from .history import HistoryStore, get_default_history
+from .jobs import JobQueue, JobStore, get_default_job_queue
+from .metrics import MetricsRegistry, metrics, start_metrics_server
+from .rate_limit import CONTEXT_WINDOWS, RATE_LIMITS, RateLimiter, estimate_tokens, limiter
+from .retry import IncompleteResponseError, RetryPolicy
+from .singleflight import SingleFlight, single_flight
+from .templates import PromptTemplate, get_template, register_template
+from .tokens import count_tokens, truncate_to_tokens
+
+# Loaded on first use: these pull in NumPy, which most app runs never need
+_LAZY = {"NearDuplicateIndex": ".dedup", "get_topic_index": ".dedup", "evaluate_prompts": ".evaluation"}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = [
+    "BudgetPlan",
+    "CONTEXT_WINDOWS",
+    "DEFAULT_MAX_OUTPUT_TOKENS",
+    "DEFAULT_MODEL",
+    "DEFAULT_SYSTEM_PROMPT",
+    "DEFAULT_TEMPERATURE",
+    "ExtractionCache",
+    "HistoryStore",
+    "IncompleteResponseError",
+    "JobQueue",
+    "JobStore",
+    "MetricsRegistry",
+    "NearDuplicateIndex",
+    "PromptTemplate",
+    "RATE_LIMITS",
+    "RateLimiter",
+    "ResponseCache",
+    "RetryPolicy",
+    "SingleFlight",
+    "build_dataset_prompt",
+    "count_tokens",
+    "dedupe_pairs",
+    "estimate_tokens",
+    "evaluate_prompts",
+    "fan_out_prompt",
+    "generate_pairs_sharded",
+    "generate_prompt",
+    "generate_test_data",
+    "get_client",
+    "get_default_cache",
+    "get_default_extraction_cache",
+    "get_default_history",
+    "get_default_job_queue",
+    "get_system_prompt",
+    "get_template",
+    "get_topic_index",
+    "iter_pairs",
+    "iter_pairs_salvaged",
+    "limiter",
+    "make_client",
+    "metrics",
+    "parse_pairs",
+    "plan_budget",
+    "plan_dataset",
+    "plan_prompt",
+    "register_template",
+    "single_flight",
+    "split_shards",
+    "start_metrics_server",
+    "truncate_to_tokens",
+]
@@ -0,0 +1,58 @@
+"""Context-window budget planning done locally, before any API call.
+
+A request needs ``prompt tokens + max_tokens <= context window``. Rather
+than letting Groq reject or truncate an oversized request after a slow
+round-trip, :func:`plan_budget` clamps ``max_tokens`` to what is left and,
+when even a minimal completion would not fit, says how many prompt tokens
+must be trimmed.
+"""
+from .rate_limit import CONTEXT_WINDOWS, DEFAULT_CONTEXT_WINDOW
+
+# Headroom for estimation error in the local token count
+SAFETY_MARGIN_TOKENS = 64
+# Never clamp the completion below this; trim the input instead
+MIN_OUTPUT_TOKENS = 512
+
+
+class BudgetPlan:
+    def __init__(self, model, context_window, prompt_tokens, requested_output_tokens, max_output_tokens,
+                 trim_tokens=0):
+        self.model = model
+        self.context_window = context_window
+        self.prompt_tokens = prompt_tokens
+        self.requested_output_tokens = requested_output_tokens
+        self.max_output_tokens = max_output_tokens
+        # Prompt tokens that must be removed for the request to fit
+        self.trim_tokens = trim_tokens
+        self.trimmed = False
+
+    @property
+    def clamped(self):
+        return self.max_output_tokens < self.requested_output_tokens
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.max_output_tokens
+
+    def to_dict(self):
+        return {
+            "model": self.model,
+            "context_window": self.context_window,
+            "prompt_tokens": self.prompt_tokens,
+            "requested_output_tokens": self.requested_output_tokens,
+            "max_output_tokens": self.max_output_tokens,
+            "clamped": self.clamped,
+            "trimmed": self.trimmed,
+        }
+
+
+def plan_budget(model, prompt_tokens, max_output_tokens):
+    """Fit ``prompt_tokens`` plus the requested completion into ``model``'s context window."""
+    window = CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    available = window - SAFETY_MARGIN_TOKENS - prompt_tokens
+    floor = min(MIN_OUTPUT_TOKENS, max_output_tokens)
+    if available >= max_output_tokens:
+        return BudgetPlan(model, window, prompt_tokens, max_output_tokens, max_output_tokens)
+    if available >= floor:
+        return BudgetPlan(model, window, prompt_tokens, max_output_tokens, available)
+    return BudgetPlan(model, window, prompt_tokens, max_output_tokens, floor, trim_tokens=floor - available)
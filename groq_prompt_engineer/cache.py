@@ -0,0 +1,139 @@
+"""Persistent, content-addressed cache for generated prompts.
+
+Entries live in a SQLite database (WAL mode) so they survive restarts and can
+be shared by several worker processes. Keys are SHA-256 hashes of every
+input that affects the output. Eviction is LRU on last access, bounded by an
+entry count and a total size, plus an optional TTL.
+"""
+import hashlib
+import json
+import os
+import time
+
+from .metrics import metrics
+from .storage import lazy_singleton, thread_local_connection
+
+CACHE_DIR = os.getenv("GROQ_TOOLKIT_CACHE_DIR", ".cache")
+
+# Bump when response post-processing changes so stale entries are never
+# served. Prompt template changes are covered by each template's cache_id.
+CACHE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def make_key(**fields):
+    """Stable hash of the keyword arguments (plus CACHE_VERSION)."""
+    payload = json.dumps({"version": CACHE_VERSION, **fields}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed LRU/TTL cache of response strings with hit/miss counters."""
+
+    def __init__(self, path=None, max_entries=10000, max_bytes=64 * 1024 * 1024, ttl_seconds=30 * 24 * 3600,
+                 clock=time.time):
+        self.path = path or os.path.join(CACHE_DIR, "responses.sqlite3")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._connect = thread_local_connection(self.path)
+        self._connect().executescript(_SCHEMA)
+
+    def _count(self, conn, name):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None."""
+        conn = self._connect()
+        now = self.clock()
+        row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            row = None
+        if row is None:
+            self.misses += 1
+            self._count(conn, "misses")
+            metrics.inc("cache_requests_total", cache="response", result="miss")
+            return None
+        conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        self._count(conn, "hits")
+        metrics.inc("cache_requests_total", cache="response", result="hit")
+        return row[0]
+
+    def set(self, key, value):
+        conn = self._connect()
+        now = self.clock()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), now, now),
+        )
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones over the caps."""
+        conn = self._connect()
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM responses WHERE created < ?", (self.clock() - self.ttl_seconds,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        excess_rows = max(0, count - self.max_entries)
+        excess_bytes = total - self.max_bytes
+        removed_bytes = 0
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if len(doomed) >= excess_rows and removed_bytes >= excess_bytes:
+                break
+            doomed.append((key,))
+            removed_bytes += size
+        conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM responses")
+        conn.execute("DELETE FROM counters")
+        self.hits = self.misses = 0
+
+    def stats(self):
+        """Counters for this process plus totals shared by every process."""
+        conn = self._connect()
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        shared = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        lookups = shared.get("hits", 0) + shared.get("misses", 0)
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": shared.get("hits", 0),
+            "total_misses": shared.get("misses", 0),
+            "hit_rate": round(shared.get("hits", 0) / lookups, 3) if lookups else 0.0,
+        }
+
+
+@lazy_singleton
+def get_default_cache():
+    """Process-wide cache stored under CACHE_DIR."""
+    return ResponseCache()
@@ -0,0 +1,182 @@
+"""Headless batch runner: read tasks/topics from JSONL, write results to JSONL.
+
+Each input line is a JSON object. The text to work on is taken from the
+first of ``task``, ``topic`` or ``body`` that is present (``title`` is
+prepended to ``body`` when both exist, matching the backlog export format).
+An ``id``/``request_id`` field is echoed back; otherwise the line number is
+used. Results are written as soon as each item finishes, so output order
+follows completion order.
+
+    python -m groq_prompt_engineer tasks.jsonl -o prompts.jsonl --workers 8
+    python -m groq_prompt_engineer topics.jsonl --mode dataset --num-pairs 20
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from . import generation
+from .cache import get_default_cache
+from .dedup import get_topic_index
+from .history import get_default_history
+from .metrics import metrics
+from .rate_limit import RATE_LIMITS, limiter
+from .singleflight import single_flight
+
+
+def _item_text(record):
+    for key in ("task", "topic"):
+        if record.get(key):
+            return record[key]
+    body = record.get("body")
+    if body:
+        title = record.get("title")
+        return f"{title}\n\n{body}" if title else body
+    raise ValueError("Record has no 'task', 'topic' or 'body' field")
+
+
+def read_records(stream):
+    """Yield ``(id, record)`` for every non-blank JSONL line.
+
+    A line that is not a JSON object yields ``(line_no, error message)``
+    instead, so one bad line doesn't stop the batch.
+    """
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, f"Invalid JSON on line {line_no}: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, f"Line {line_no} is not a JSON object"
+            continue
+        yield record.get("id", record.get("request_id", line_no)), record
+
+
+def process_record(client, record_id, record, args):
+    started = time.perf_counter()
+    result = {"id": record_id, "mode": args.mode, "model": args.model}
+    history = None if args.no_history else get_default_history()
+    try:
+        text = _item_text(record)
+        variables = record.get("variables", args.variables)
+        if args.mode == "prompt":
+            result["output"] = generation.generate_prompt(
+                client, text, variables,
+                model=args.model, temperature=args.temperature,
+                max_output_tokens=args.max_tokens, system_prompt=args.system_prompt,
+                limiter=limiter, cache=None if args.no_cache else get_default_cache(),
+                single_flight=single_flight,  # Duplicate tasks in flight at once make one request
+                history=history,
+            )
+        else:
+            result["pairs"] = generation.generate_test_data(
+                client, text, int(record.get("num_pairs", args.num_pairs)),
+                model=args.model, temperature=args.temperature,
+                max_output_tokens=args.max_tokens, system_prompt=args.system_prompt,
+                sharded=args.sharded, limiter=limiter,
+                # Records on the same topic don't repeat each other
+                dedupe_index=get_topic_index(text, getattr(client, "api_key", None)),
+                history=history,
+            )
+    except Exception as e:
+        result["error"] = str(e)
+    result["latency_s"] = round(time.perf_counter() - started, 3)
+    metrics.observe("operation_seconds", result["latency_s"], operation=f"cli_{args.mode}")
+    return result
+
+
+def run(records, client, args, out):
+    """Process ``records`` on a bounded pool, streaming results to ``out``.
+
+    At most ``2 * workers`` items are in flight so arbitrarily large inputs
+    are never fully loaded into memory. Returns ``(succeeded, failed)``.
+    """
+    succeeded = failed = 0
+    max_in_flight = max(1, args.workers) * 2
+    records = iter(records)
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        in_flight = set()
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < max_in_flight:
+                try:
+                    record_id, record = next(records)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if isinstance(record, str):
+                    # Unreadable line: report it like a failed call and keep going
+                    failed += 1
+                    out.write(json.dumps({"id": record_id, "error": record}) + "\n")
+                    out.flush()
+                    continue
+                in_flight.add(executor.submit(process_record, client, record_id, record, args))
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if "error" in result:
+                    failed += 1
+                else:
+                    succeeded += 1
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    return succeeded, failed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m groq_prompt_engineer",
+        description="Generate prompts or synthetic datasets in bulk from a JSONL file.",
+    )
+    parser.add_argument("input", help="JSONL file of tasks/topics ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file ('-' for stdout)")
+    parser.add_argument("--mode", choices=["prompt", "dataset"], default="prompt")
+    parser.add_argument("--model", choices=sorted(RATE_LIMITS), default=generation.DEFAULT_MODEL)
+    parser.add_argument("--temperature", type=float, default=generation.DEFAULT_TEMPERATURE)
+    parser.add_argument("--max-tokens", type=int, default=generation.DEFAULT_MAX_OUTPUT_TOKENS)
+    parser.add_argument("--system-prompt", default=generation.DEFAULT_SYSTEM_PROMPT)
+    parser.add_argument("--variables", default="", help="Default input variables for prompt mode")
+    parser.add_argument("--num-pairs", type=int, default=10, help="Default pairs per topic in dataset mode")
+    parser.add_argument("--sharded", action="store_true", help="Use sharded generation in dataset mode")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the response cache")
+    parser.add_argument("--no-history", action="store_true", help="Don't record results in the generation history")
+    parser.add_argument("--workers", type=int, default=4, help="Items processed concurrently")
+    parser.add_argument("--api-key", default=None, help="Groq API key (defaults to GROQ_API_KEY)")
+    parser.add_argument("--metrics-file", default=None, help="Append latency/throughput metrics to this JSONL file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    if args.metrics_file:
+        metrics.open_jsonl(args.metrics_file)
+    client = generation.make_client(args.api_key)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        succeeded, failed = run(read_records(source), client, args, out)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    metrics.close()
+    print(f"Done: {succeeded} succeeded, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
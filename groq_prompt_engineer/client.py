@@ -0,0 +1,147 @@
+"""Pooled Groq clients with keep-alive connections and per-request timing.
+
+Building a new ``Groq`` client per request throws away its HTTP connection
+pool, so every call pays for a fresh TCP + TLS handshake. ``get_client``
+returns one client per (API key, settings) for the whole process, backed by
+an ``httpx.Client`` with tunable connection limits and timeouts.
+
+Connection setup time is captured through httpx's ``trace`` extension;
+time-to-first-token and total time are filled in by
+:func:`~groq_prompt_engineer.completion.iter_completion`.
+"""
+import collections
+import hashlib
+import threading
+import time
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 120.0
+
+_clients = {}
+_clients_lock = threading.Lock()
+_current = threading.local()
+
+
+class RequestTimings:
+    """Bounded log of per-request timings (seconds)."""
+
+    def __init__(self, keep=500):
+        self._records = collections.deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def summary(self):
+        records = self.records()
+        if not records:
+            return {"requests": 0}
+
+        def median(key):
+            values = sorted(r[key] for r in records if r.get(key) is not None)
+            return round(values[len(values) // 2], 4) if values else None
+
+        return {
+            "requests": len(records),
+            "new_connections": sum(1 for r in records if r["reused_connection"] is False),
+            "median_connect_s": median("connect_s"),
+            "median_ttft_s": median("ttft_s"),
+            "median_total_s": median("total_s"),
+        }
+
+
+timings = RequestTimings()
+
+
+def _trace(event_name, info):
+    # Called by httpcore for connection lifecycle events in the requesting thread
+    if event_name in ("connection.connect_tcp.started", "connection.start_tls.started"):
+        if _current.connect_started is None:
+            _current.connect_started = time.perf_counter()
+    elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+        if _current.connect_started is not None:
+            _current.connect_s = time.perf_counter() - _current.connect_started
+
+
+def _on_request(request):
+    _current.traced = True
+    request.extensions["trace"] = _trace
+
+
+def begin_request():
+    """Reset this thread's connection timing before a request is sent."""
+    _current.connect_started = None
+    _current.connect_s = None
+    _current.traced = False
+
+
+def end_request(model, started, first_token_at, finished_at):
+    """Record one request in :data:`timings` and return the record."""
+    connect_s = getattr(_current, "connect_s", None)
+    # Only pooled clients carry the trace hook; others can't tell reuse apart
+    traced = getattr(_current, "traced", False)
+    record = {
+        "model": model,
+        "reused_connection": (connect_s is None) if traced else None,
+        "connect_s": connect_s,
+        "ttft_s": first_token_at - started if first_token_at is not None else None,
+        "total_s": finished_at - started,
+    }
+    timings.add(record)
+    return record
+
+
+def _build_client(api_key, base_url, max_connections, max_keepalive, keepalive_expiry,
+                  connect_timeout, read_timeout):
+    import httpx
+    from groq import Groq
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        event_hooks={"request": [_on_request]},
+    )
+    # Retries are handled by groq_prompt_engineer.retry so 429 headers reach the rate limiter
+    kwargs = {"api_key": api_key, "http_client": http_client, "max_retries": 0}
+    if base_url:
+        kwargs["base_url"] = base_url
+    return Groq(**kwargs)
+
+
+def get_client(api_key, base_url=None, max_connections=DEFAULT_MAX_CONNECTIONS,
+               max_keepalive=DEFAULT_MAX_KEEPALIVE, keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+               connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT):
+    """Return the process-wide pooled client for this API key and settings."""
+    settings = (base_url, max_connections, max_keepalive, keepalive_expiry, connect_timeout, read_timeout)
+    # Don't keep raw API keys around as dict keys
+    key = (hashlib.sha256(api_key.encode("utf-8")).hexdigest(),) + settings
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _build_client(api_key, *settings)
+            _clients[key] = client
+        return client
+
+
+def close_clients():
+    """Close every pooled client (mainly for tests and benchmarks)."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
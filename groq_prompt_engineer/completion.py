@@ -0,0 +1,139 @@
+"""Single place where chat completion requests are sent to Groq."""
+import logging
+import time
+
+from .client import begin_request, end_request
+from .metrics import metrics
+from .rate_limit import estimate_tokens, retry_after_seconds
+from .retry import IncompleteResponseError, default_policy, response_headers
+
+logger = logging.getLogger(__name__)
+
+
+def iter_completion(client, model, system_prompt, user_prompt, temperature=None, max_output_tokens=None,
+                    limiter=None, stats=None, prompt_tokens=None, retry=default_policy):
+    """Send one streamed chat completion and yield its content deltas as they arrive.
+
+    When ``limiter`` is given the request waits for RPM/TPM budget first
+    (``prompt_tokens`` if already counted, else a fresh estimate), the
+    generated tokens are debited afterwards, and the ``x-ratelimit-*`` /
+    ``retry-after`` headers of every response update its budget.
+    ``temperature`` and ``max_output_tokens`` are only sent when set.
+
+    Failures before the first delta (429s, server errors, dropped
+    connections) are retried according to ``retry`` (a
+    :class:`~groq_prompt_engineer.retry.RetryPolicy`; None disables
+    retries). After a 429 the limiter holds back every caller of ``model``
+    until the server's reset; other errors back off with jitter. A stream
+    that breaks after output has started raises
+    :class:`~groq_prompt_engineer.retry.IncompleteResponseError` carrying
+    the partial text, so callers can salvage it.
+
+    Connect time, time-to-first-token and total time are recorded in
+    :data:`groq_prompt_engineer.client.timings` and, if ``stats`` is a dict,
+    copied into it once the stream ends. Queue wait, time to first token
+    and tokens/s are also observed in
+    :data:`groq_prompt_engineer.metrics.metrics`. Closing the generator
+    early closes the underlying HTTP stream.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        parts = []
+        stream = _stream_once(client, model, system_prompt, user_prompt, temperature, max_output_tokens,
+                              limiter, stats, prompt_tokens)
+        try:
+            for delta in stream:
+                parts.append(delta)
+                yield delta
+            return
+        except Exception as e:
+            if parts:
+                raise IncompleteResponseError("".join(parts), e) from e
+            headers = response_headers(e)
+            if limiter is not None and headers:
+                limiter.update_from_headers(model, headers)
+            if retry is None or not retry.should_retry(attempt, e):
+                raise
+            metrics.inc("retries_total", operation="completion", model=model)
+            logger.warning("Request to %s failed (attempt %d): %s; retrying", model, attempt, e)
+            # With a limiter, a retry-after already paused the model for everyone
+            if limiter is None or not headers or retry_after_seconds(headers) is None:
+                retry.sleep(retry.delay(attempt, e))
+        finally:
+            stream.close()
+
+
+def _stream_once(client, model, system_prompt, user_prompt, temperature, max_output_tokens, limiter, stats,
+                 prompt_tokens):
+    if limiter is not None:
+        if prompt_tokens is None:
+            prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+        metrics.observe("rate_limit_queue_wait_seconds", limiter.acquire(model, prompt_tokens), model=model)
+    params = {}
+    if temperature is not None:
+        params["temperature"] = temperature
+    if max_output_tokens is not None:
+        params["max_tokens"] = max_output_tokens
+    begin_request()
+    started = time.perf_counter()
+    chat_completion = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        stream=True,
+        **params,
+    )
+    response = getattr(chat_completion, "response", None)
+    if limiter is not None and response is not None:
+        limiter.update_from_headers(model, response.headers)
+    first_token_at = None
+    generated_chars = 0
+    try:
+        for chunk in chat_completion:
+            if chunk.choices and chunk.choices[0].delta.content is not None:
+                delta = chunk.choices[0].delta.content
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                generated_chars += len(delta)
+                yield delta
+    finally:
+        close = getattr(chat_completion, "close", None)
+        if close is not None:
+            close()
+        record = end_request(model, started, first_token_at, time.perf_counter())
+        record["generated_chars"] = generated_chars
+        if stats is not None:
+            stats.update(record)
+        generated_tokens = estimate_tokens(generated_chars)
+        if limiter is not None:
+            limiter.record_usage(model, generated_tokens)
+        _observe(record, generated_tokens)
+
+
+def _observe(record, generated_tokens):
+    model = record["model"]
+    metrics.observe("groq_request_seconds", record["total_s"], model=model)
+    if record["ttft_s"] is not None:
+        metrics.observe("groq_ttft_seconds", record["ttft_s"], model=model)
+        streaming_s = record["total_s"] - record["ttft_s"]
+        if streaming_s > 0 and generated_tokens:
+            metrics.observe("groq_output_tokens_per_second", generated_tokens / streaming_s, model=model)
+
+
+def stream_completion(client, model, system_prompt, user_prompt, temperature=None, max_output_tokens=None,
+                      limiter=None, on_delta=None, stats=None):
+    """Like :func:`iter_completion` but return the full response text.
+
+    ``on_delta`` is called with each delta as it arrives, e.g. to update a
+    UI placeholder.
+    """
+    parts = []
+    for delta in iter_completion(client, model, system_prompt, user_prompt, temperature, max_output_tokens,
+                                 limiter, stats):
+        parts.append(delta)
+        if on_delta is not None:
+            on_delta(delta)
+    return "".join(parts)
@@ -0,0 +1,266 @@
+import collections
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .budget import plan_budget
+from .completion import iter_completion
+from .metrics import metrics
+from .rate_limit import limiter as default_limiter, retry_after_seconds
+from .retry import default_policy, is_retryable, response_headers
+from .stream_json import PairStreamParser
+from .templates import DATASET_PROMPT
+from .tokens import MESSAGE_OVERHEAD_TOKENS, count_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD_SIZE = 20
+DEFAULT_MAX_WORKERS = 4
+# Existing human messages quoted in a remainder request, and their length
+AVOID_MESSAGES = 10
+AVOID_MESSAGE_CHARS = 80
+
+
+def build_dataset_prompt(topic, num_pairs, shard_index=None, num_shards=None, avoid=()):
+    """Prompt asking the model for ``num_pairs`` conversation pairs as a JSON array.
+
+    ``avoid`` lists human messages already in the dataset, which the model is
+    asked not to repeat (used when requesting the remainder of a dataset or
+    more pairs on a topic that already has some).
+    """
+    batch_note = ""
+    if num_shards and num_shards > 1:
+        batch_note = (
+            f"This is batch {shard_index + 1} of {num_shards}. "
+            "Cover a different angle of the topic than the other batches and avoid generic repeats.\n"
+        )
+    if avoid:
+        batch_note += "These human messages are already in the dataset; do not repeat them:\n" + "".join(
+            f"- {message[:AVOID_MESSAGE_CHARS]}\n" for message in avoid
+        )
+    return DATASET_PROMPT.render(topic=topic, num_pairs=num_pairs, batch_note=batch_note)
+
+
+def iter_pairs(deltas, stats=None):
+    """Yield conversation pairs from a stream of text deltas as soon as each one is complete.
+
+    Malformed or invalid items are skipped. If ``stats`` is a dict it
+    receives ``pairs_parsed`` and ``pairs_skipped`` counts when the stream ends.
+    """
+    parser = PairStreamParser()
+    try:
+        for delta in deltas:
+            yield from parser.feed(delta)
+        parser.close()
+    finally:
+        if stats is not None:
+            stats["pairs_parsed"] = parser.parsed
+            stats["pairs_skipped"] = parser.skipped
+
+
+def parse_pairs(text):
+    """Parse a model response into a list of ``{"human", "ai"}`` dicts.
+
+    Invalid items are skipped; raises ValueError if no valid pair is found.
+    """
+    pairs = list(iter_pairs([text]))
+    if not pairs:
+        raise ValueError("Could not extract valid JSON from the response")
+    return pairs
+
+
+def split_shards(num_pairs, shard_size=DEFAULT_SHARD_SIZE):
+    """Split ``num_pairs`` into shard sizes of at most ``shard_size``."""
+    shard_size = max(1, int(shard_size))
+    full, rest = divmod(int(num_pairs), shard_size)
+    return [shard_size] * full + ([rest] if rest else [])
+
+
+def _pair_key(pair):
+    return (str(pair['human']).strip().lower(), str(pair['ai']).strip().lower())
+
+
+def dedupe_pairs(pairs):
+    """Drop exact duplicates (ignoring case and surrounding whitespace), keeping order."""
+    seen = set()
+    unique = []
+    for pair in pairs:
+        key = _pair_key(pair)
+        if key not in seen:
+            seen.add(key)
+            unique.append(pair)
+    return unique
+
+
+def _merge_round_stats(stats, round_stats):
+    if stats is None:
+        return
+    for key in ("pairs_parsed", "pairs_skipped", "pairs_near_duplicate"):
+        stats[key] = stats.get(key, 0) + round_stats.get(key, 0)
+    stats["requests"] = stats.get("requests", 0) + 1
+    for key, value in round_stats.items():
+        stats.setdefault(key, value)  # Timings of the first request
+
+
+def _plan_round(model, system_prompt, topic, num_pairs, shard_index, num_shards, avoid, max_output_tokens):
+    """Build one request's prompt and fit ``max_output_tokens`` around it.
+
+    Returns ``(prompt, prompt_tokens, max_output_tokens)``. The avoid list
+    is dropped if the prompt would otherwise not leave room for a minimal
+    completion. Without ``max_output_tokens`` nothing is budgeted.
+    """
+    prompt = build_dataset_prompt(topic, num_pairs, shard_index, num_shards, avoid=avoid)
+    if max_output_tokens is None:
+        return prompt, None, None
+    overhead = count_tokens(system_prompt) + 2 * MESSAGE_OVERHEAD_TOKENS
+    plan = plan_budget(model, count_tokens(prompt) + overhead, max_output_tokens)
+    if plan.trim_tokens and avoid:
+        prompt = build_dataset_prompt(topic, num_pairs, shard_index, num_shards)
+        plan = plan_budget(model, count_tokens(prompt) + overhead, max_output_tokens)
+    return prompt, plan.prompt_tokens, plan.max_output_tokens
+
+
+def iter_pairs_salvaged(client, model, system_prompt, topic, num_pairs, temperature=None, max_output_tokens=None,
+                        limiter=None, stats=None, shard_index=None, num_shards=None, retry=default_policy,
+                        dedupe_index=None):
+    """Yield up to ``num_pairs`` unique pairs about ``topic``, salvaging partial responses.
+
+    Pairs are yielded as soon as they are parsed. If the stream breaks
+    midway, or completes with fewer valid pairs than asked for, the pairs
+    already received are kept and a follow-up request asks only for the
+    missing remainder, up to ``retry.max_attempts`` requests in total
+    (backing off after errors). This is the only retry layer: each request
+    is sent once, without :func:`iter_completion`'s own retries. Raises the
+    last error only if no pair at all could be obtained.
+
+    With a ``dedupe_index``
+    (:class:`~groq_prompt_engineer.dedup.NearDuplicateIndex`), pairs too
+    similar to any already in the index are dropped as well (and counted in
+    ``stats["pairs_near_duplicate"]``), and every request lists covered
+    messages for the model to steer away from. A round that returns more
+    near-duplicates than new pairs ends the top-ups, since the topic is
+    then mostly covered.
+
+    ``max_output_tokens`` is re-budgeted for every request from the prompt
+    actually sent (see :func:`_plan_round`), since the avoid list makes
+    follow-up prompts longer than the first one.
+    """
+    seen = set()
+    covered = dedupe_index.covered(AVOID_MESSAGES) if dedupe_index is not None else ()
+    recent = collections.deque(covered, maxlen=AVOID_MESSAGES)
+    produced = 0
+    attempt = 0
+    while produced < num_pairs:
+        attempt += 1
+        round_stats = {}
+        error = None
+        produced_before = produced
+        prompt, prompt_tokens, round_max_tokens = _plan_round(
+            model, system_prompt, topic, num_pairs - produced, shard_index, num_shards, list(recent),
+            max_output_tokens,
+        )
+        pairs = iter_pairs(iter_completion(client, model, system_prompt, prompt, temperature, round_max_tokens,
+                                           limiter, round_stats, prompt_tokens=prompt_tokens, retry=None),
+                           round_stats)
+        try:
+            for pair in pairs:
+                key = _pair_key(pair)
+                if key in seen:
+                    continue
+                seen.add(key)
+                recent.append(str(pair["human"]))
+                if dedupe_index is not None and not dedupe_index.add(pair):
+                    round_stats["pairs_near_duplicate"] = round_stats.get("pairs_near_duplicate", 0) + 1
+                    metrics.inc("near_duplicates_total", model=model)
+                    continue
+                produced += 1
+                yield pair
+                if produced >= num_pairs:
+                    break
+        except Exception as e:
+            error = e
+        finally:
+            pairs.close()
+            _merge_round_stats(stats, round_stats)
+        if produced >= num_pairs:
+            return
+        if retry is None or attempt >= retry.max_attempts or (error is not None and not is_retryable(error)):
+            if error is not None and not produced:
+                raise error
+            if error is not None:
+                logger.warning("Keeping %d of %d pairs after %s", produced, num_pairs, error)
+            return
+        if round_stats.get("pairs_near_duplicate", 0) > produced - produced_before:
+            # Mostly repeats: another request would cost more per new pair than it is worth
+            logger.info("Stopping at %d of %d pairs; the topic is mostly covered", produced, num_pairs)
+            return
+        metrics.inc("retries_total", operation="dataset_remainder", model=model)
+        logger.info("Requesting the remaining %d of %d pairs", num_pairs - produced, num_pairs)
+        headers = response_headers(error) if error is not None else None
+        # With a limiter, a retry-after already paused the model for everyone
+        if error is not None and (limiter is None or not headers or retry_after_seconds(headers) is None):
+            retry.sleep(retry.delay(attempt, error))
+
+
+def _generate_shard(client, model, system_prompt, topic, size, index, num_shards, limiter, temperature,
+                    max_output_tokens, dedupe_index=None, retry=default_policy):
+    pairs = list(iter_pairs_salvaged(client, model, system_prompt, topic, size, temperature, max_output_tokens,
+                                     limiter, shard_index=index, num_shards=num_shards, retry=retry,
+                                     dedupe_index=dedupe_index))
+    if not pairs:
+        raise ValueError("Could not extract valid JSON from the response")
+    return pairs
+
+
+def generate_pairs_sharded(client, model, system_prompt, topic, num_pairs,
+                           shard_size=DEFAULT_SHARD_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                           limiter=default_limiter, temperature=None, max_output_tokens=None,
+                           on_pair=None, dedupe_index=None, retry=default_policy):
+    """Generate ``num_pairs`` conversation pairs as concurrent shards.
+
+    Shards run on a bounded thread pool and each one goes through ``limiter``
+    so the model's RATE_LIMITS are respected. Retrying is left to each
+    shard's :func:`iter_pairs_salvaged` (at most ``retry.max_attempts``
+    requests, topping up a broken or short response); a shard that still
+    fails is recorded and not resubmitted, so one bad shard can't use up
+    the rate limit. The merged pairs are de-duplicated and trimmed to
+    ``num_pairs``; fewer may be returned if some shards fail. Raises
+    ValueError if every shard fails.
+
+    ``on_pair`` is called in the calling thread with each new unique pair as
+    soon as its shard completes. ``dedupe_index`` (a shared
+    :class:`~groq_prompt_engineer.dedup.NearDuplicateIndex`) also drops
+    near-duplicates across shards.
+    """
+    sizes = split_shards(num_pairs, shard_size)
+    unique = []
+    seen = set()
+    errors = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+        futures = {
+            executor.submit(
+                _generate_shard, client, model, system_prompt, topic, size, index, len(sizes),
+                limiter, temperature, max_output_tokens, dedupe_index, retry,
+            ): index
+            for index, size in enumerate(sizes)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                pairs = future.result()
+            except Exception as e:
+                logger.warning("Shard %d failed: %s", index, e)
+                errors[index] = e
+                continue
+            for pair in pairs:
+                key = _pair_key(pair)
+                if key in seen or len(unique) >= num_pairs:
+                    continue
+                seen.add(key)
+                unique.append(pair)
+                if on_pair is not None:
+                    on_pair(pair)
+
+    if len(errors) == len(sizes):
+        raise ValueError(f"All {len(sizes)} shards failed: {next(iter(errors.values()))}")
+    return unique
@@ -0,0 +1,217 @@
+"""Near-duplicate detection for generated conversation pairs (MinHash + LSH).
+
+Exact de-duplication (:func:`~groq_prompt_engineer.dataset.dedupe_pairs`)
+misses the usual failure of repeated generation on one topic: the same
+question reworded slightly, with much the same answer. Here every pair is
+reduced to a MinHash signature over word shingles (hashed with NumPy, all
+permutations at once), and locality-sensitive hashing on bands of the
+signature finds earlier pairs that could be similar. Only those candidates
+are compared, so a lookup stays cheap as the index grows to 100k pairs.
+
+Band keys are kept in one sorted NumPy array (searched with
+``searchsorted``) plus a small dict of recent additions that is merged in
+every ``MERGE_EVERY`` pairs. Memory is about 450 bytes per pair with the
+defaults.
+
+One index per API key and topic (:func:`get_topic_index`) is shared by
+every generation on that topic with that key in the process, so one user's
+pairs never filter or steer another's. Besides rejecting near-duplicates
+it remembers what is already covered, and :meth:`NearDuplicateIndex.covered`
+returns examples that follow-up requests ask the model to steer away from.
+"""
+import collections
+import random
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from .storage import key_hash
+
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE_SIZE = 3
+MERGE_EVERY = 4096
+# Human messages remembered per index for steering follow-up requests
+EXAMPLES_KEPT = 64
+MAX_TOPICS = 32
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text, size=DEFAULT_SHINGLE_SIZE):
+    """Lower-cased word ``size``-grams of ``text`` (the whole text if it is shorter)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def _pair_text(pair):
+    return f"{pair['human']} {pair['ai']}"
+
+
+class NearDuplicateIndex:
+    """Incremental index of pairs that rejects those too similar to one already added.
+
+    Two pairs are near-duplicates when the estimated Jaccard similarity of
+    their shingle sets is at least ``threshold``. ``bands`` must divide
+    ``num_perm``; more bands find lower similarities at the cost of more
+    candidates. Thread-safe, so concurrent shards can share one index.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: (a * x + b) mod 2**64, top 32 bits; a odd
+        self._a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self._band_mult = rng.integers(1, 2 ** 63, (bands, num_perm // bands), dtype=np.uint64) | np.uint64(1)
+        self._band_salt = rng.integers(0, 2 ** 63, bands, dtype=np.uint64)
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self._count = 0
+        self._sorted_keys = np.empty(0, dtype=np.uint64)
+        self._sorted_ids = np.empty(0, dtype=np.int32)
+        self._pending = collections.defaultdict(list)
+        self._pending_count = 0
+        self._examples = []
+        self._seen_examples = 0
+        # Pair id -> [times repeated, human message of the latest repeat], for the most repeated pairs
+        self._repeated = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def signature(self, text):
+        """MinHash signature (``num_perm`` uint32 values) of ``text``'s shingles."""
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text, self.shingle_size)), dtype=np.uint64,
+        )
+        # (shingles, num_perm) in one vectorized step; uint64 overflow is the intended mod 2**64
+        permuted = (hashes[:, None] * self._a + self._b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        rows = signature.astype(np.uint64).reshape(self.bands, -1)
+        return (rows * self._band_mult).sum(axis=1) ^ self._band_salt
+
+    def _candidates(self, keys):
+        found = set()
+        left = np.searchsorted(self._sorted_keys, keys, side="left")
+        right = np.searchsorted(self._sorted_keys, keys, side="right")
+        for lo, hi in zip(left.tolist(), right.tolist()):
+            if hi > lo:
+                found.update(self._sorted_ids[lo:hi].tolist())
+        for key in keys.tolist():
+            found.update(self._pending.get(key, ()))
+        return found
+
+    def _best_match(self, signature, keys):
+        candidates = self._candidates(keys)
+        if not candidates:
+            return None, 0.0
+        ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        # Fraction of equal MinHash values estimates the Jaccard similarity
+        similarity = (self._signatures[ids] == signature).mean(axis=1)
+        best = int(similarity.argmax())
+        return int(ids[best]), float(similarity[best])
+
+    def similarity(self, pair):
+        """Highest estimated similarity of ``pair`` to any pair in the index (0.0 if none)."""
+        signature = self.signature(_pair_text(pair))
+        with self._lock:
+            return self._best_match(signature, self._band_keys(signature))[1]
+
+    def add(self, pair):
+        """Add ``pair`` unless it is a near-duplicate; return True if it was added."""
+        signature = self.signature(_pair_text(pair))
+        keys = self._band_keys(signature)
+        with self._lock:
+            match, similarity = self._best_match(signature, keys)
+            if similarity >= self.threshold:
+                self._count_repeat(match, str(pair["human"]))
+                return False
+            self._insert(signature, keys)
+            self._remember(str(pair["human"]))
+            return True
+
+    def _insert(self, signature, keys):
+        if self._count == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        pair_id = self._count
+        self._signatures[pair_id] = signature
+        self._count += 1
+        for key in keys.tolist():
+            self._pending[key].append(pair_id)
+        self._pending_count += 1
+        if self._pending_count >= MERGE_EVERY:
+            self._merge()
+
+    def _merge(self):
+        keys = [key for key, ids in self._pending.items() for _ in ids]
+        ids = [pair_id for pair_ids in self._pending.values() for pair_id in pair_ids]
+        all_keys = np.concatenate([self._sorted_keys, np.array(keys, dtype=np.uint64)])
+        all_ids = np.concatenate([self._sorted_ids, np.array(ids, dtype=np.int32)])
+        order = np.argsort(all_keys, kind="stable")
+        self._sorted_keys = all_keys[order]
+        self._sorted_ids = all_ids[order]
+        self._pending.clear()
+        self._pending_count = 0
+
+    def _remember(self, human):
+        # Reservoir sample, so examples span everything covered so far
+        self._seen_examples += 1
+        if len(self._examples) < EXAMPLES_KEPT:
+            self._examples.append(human)
+        else:
+            slot = self._rng.randrange(self._seen_examples)
+            if slot < EXAMPLES_KEPT:
+                self._examples[slot] = human
+
+    def _count_repeat(self, pair_id, human):
+        entry = self._repeated.get(pair_id)
+        if entry is None:
+            if len(self._repeated) >= EXAMPLES_KEPT:
+                # Make room by forgetting the least repeated entry
+                del self._repeated[min(self._repeated, key=lambda key: self._repeated[key][0])]
+            entry = self._repeated[pair_id] = [0, human]
+        entry[0] += 1
+        entry[1] = human
+
+    def covered(self, count):
+        """Up to ``count`` human messages to steer away from: the most repeated first, then a sample."""
+        with self._lock:
+            repeated = [human for _, human in sorted(self._repeated.values(), key=lambda entry: -entry[0])]
+            sample = [human for human in self._examples if human not in repeated]
+            self._rng.shuffle(sample)
+        return (repeated + sample)[:count]
+
+
+_topics = collections.OrderedDict()
+_topics_lock = threading.Lock()
+
+
+def get_topic_index(topic, api_key=None):
+    """Process-wide index for ``api_key`` and ``topic`` (case and surrounding whitespace ignored).
+
+    Indexes are kept for the last MAX_TOPICS key/topic combinations.
+    """
+    key = (key_hash(api_key) if api_key else None, " ".join(str(topic).lower().split()))
+    with _topics_lock:
+        index = _topics.get(key)
+        if index is None:
+            index = _topics[key] = NearDuplicateIndex()
+            while len(_topics) > MAX_TOPICS:
+                _topics.popitem(last=False)
+        _topics.move_to_end(key)
+        return index
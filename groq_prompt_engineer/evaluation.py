@@ -0,0 +1,244 @@
+"""A/B evaluation of prompts against a test set of conversation pairs.
+
+Every prompt (e.g. from :func:`~groq_prompt_engineer.generation.generate_prompt`)
+is used as the system prompt for every case's ``human`` message (e.g. pairs
+from :func:`~groq_prompt_engineer.generation.generate_test_data`), and the
+answer is scored against the case's ``ai`` message. All prompt×case
+requests run concurrently on a thread pool and share the rate limiter, so
+the pool size only bounds connections; the limiter decides the pace.
+
+Scoring is vectorized with NumPy over all outputs at once:
+
+* ``exact_match`` – output equals the reference after lower-casing and
+  dropping punctuation and extra whitespace
+* ``f1`` – token-overlap F1 between output and reference (as in SQuAD)
+* ``length`` / ``length_ratio`` – output words, and relative to the reference
+
+With a :class:`~groq_prompt_engineer.cache.ResponseCache`, each output is
+stored under the hash of its prompt and case (plus model and sampling
+settings), so re-running after editing one prompt or adding a few cases
+only sends the requests that changed. Scores are cheap and always
+recomputed. :func:`get_default_eval_cache` keeps these answers in a file
+of their own, so a large evaluation neither outgrows the prompt cache nor
+evicts the prompts in it.
+"""
+import hashlib
+import itertools
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from .budget import plan_budget
+from .cache import CACHE_DIR, ResponseCache, make_key
+from .completion import iter_completion
+from .generation import DEFAULT_MODEL
+from .metrics import metrics
+from .rate_limit import limiter as default_limiter
+from .retry import IncompleteResponseError
+from .storage import lazy_singleton
+from .tokens import MESSAGE_OVERHEAD_TOKENS, count_tokens
+
+# Answers to test cases are short; reserving the model's full output budget would starve the limiter
+DEFAULT_EVAL_MAX_OUTPUT_TOKENS = 1024
+# Greedy decoding keeps the comparison about the prompts rather than sampling noise
+DEFAULT_EVAL_TEMPERATURE = 0.0
+DEFAULT_EVAL_WORKERS = 8
+SCORES = ("exact_match", "f1", "length", "length_ratio")
+# One entry per prompt×case, so far more than the prompt cache holds
+EVAL_CACHE_MAX_ENTRIES = 200_000
+EVAL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def prompt_hash(prompt):
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def case_hash(case):
+    payload = json.dumps({"human": case["human"], "ai": case["ai"]}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _words(text):
+    return _WORD_RE.findall(text.lower())
+
+
+def _starts(lengths):
+    return np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+
+
+def _word_ids(texts):
+    """Word ids of ``texts`` laid end to end, and each text's length; each distinct text is split only once.
+
+    Splitting words is the expensive part, and in an evaluation every
+    reference repeats once per prompt (as do cached answers).
+    """
+    distinct = {}
+    positions = np.fromiter((distinct.setdefault(text, len(distinct)) for text in texts), dtype=np.int64,
+                            count=len(texts))
+    words = [_words(text) for text in distinct]
+    all_words = list(itertools.chain.from_iterable(words))
+    # Integer ids through a dict; sorting Python strings in NumPy is far slower
+    vocabulary = {word: i for i, word in enumerate(dict.fromkeys(all_words))}
+    ids = np.fromiter(map(vocabulary.__getitem__, all_words), dtype=np.int64, count=len(all_words))
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+    # Gather the distinct texts' ids back into input order without a Python loop
+    row_lengths = lengths[positions]
+    offsets = np.repeat(_starts(lengths)[positions] - _starts(row_lengths), row_lengths)
+    return ids[offsets + np.arange(int(row_lengths.sum()))], row_lengths, max(len(vocabulary), 1)
+
+
+def score_outputs(outputs, references):
+    """Score each output against the reference at the same position; a dict of NumPy arrays per metric."""
+    if len(outputs) != len(references):
+        raise ValueError("outputs and references must have the same length")
+    count = len(outputs)
+    # One vocabulary for both sides, then each (row, word) pair becomes one integer key
+    word_ids, lengths, size = _word_ids([str(text) for text in itertools.chain(outputs, references)])
+    output_lengths, reference_lengths = lengths[:count], lengths[count:]
+    split = int(output_lengths.sum())
+    output_ids, reference_ids = word_ids[:split], word_ids[split:]
+    output_rows = np.repeat(np.arange(count), output_lengths)
+    reference_rows = np.repeat(np.arange(count), reference_lengths)
+    output_keys, output_counts = np.unique(output_rows * size + output_ids, return_counts=True)
+    reference_keys, reference_counts = np.unique(reference_rows * size + reference_ids, return_counts=True)
+    common, in_output, in_reference = np.intersect1d(output_keys, reference_keys, assume_unique=True,
+                                                     return_indices=True)
+    overlap = np.bincount(
+        common // size, weights=np.minimum(output_counts[in_output], reference_counts[in_reference]), minlength=count,
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(output_lengths > 0, overlap / output_lengths, 0.0)
+        recall = np.where(reference_lengths > 0, overlap / reference_lengths, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        length_ratio = np.where(reference_lengths > 0, output_lengths / reference_lengths, 0.0)
+
+    # Exact match: rows of equal length whose word ids agree position by position
+    same_length = output_lengths == reference_lengths
+    output_mask = same_length[output_rows]
+    mismatched = output_ids[output_mask] != reference_ids[same_length[reference_rows]]
+    mismatches = np.bincount(output_rows[output_mask][mismatched], minlength=count)
+    # Two empty answers (e.g. a failed request against an empty reference) don't count as a match
+    exact_match = (same_length & (mismatches == 0) & (output_lengths > 0)).astype(float)
+    return {"exact_match": exact_match, "f1": f1, "length": output_lengths.astype(float), "length_ratio": length_ratio}
+
+
+@lazy_singleton
+def get_default_eval_cache():
+    """Process-wide cache of evaluation answers, separate from the prompt cache."""
+    return ResponseCache(
+        os.path.join(CACHE_DIR, "eval_responses.sqlite3"),
+        max_entries=EVAL_CACHE_MAX_ENTRIES, max_bytes=EVAL_CACHE_MAX_BYTES,
+    )
+
+
+def _answer(client, model, prompt, case, temperature, max_output_tokens, limiter):
+    prompt_tokens = count_tokens(prompt) + count_tokens(case["human"]) + 2 * MESSAGE_OVERHEAD_TOKENS
+    plan = plan_budget(model, prompt_tokens, max_output_tokens)
+    if plan.trim_tokens:
+        raise ValueError(f"Prompt and case don't fit {model}'s {plan.context_window:,}-token context window")
+    stats = {}
+    try:
+        text = "".join(iter_completion(client, model, prompt, case["human"], temperature, plan.max_output_tokens,
+                                       limiter, stats, prompt_tokens=plan.prompt_tokens))
+    except IncompleteResponseError as e:
+        # Scoring what arrived is fairer to the prompt than scoring nothing
+        text = e.partial
+    return text.strip()
+
+
+def evaluate_prompts(client, prompts, cases, model=DEFAULT_MODEL, temperature=DEFAULT_EVAL_TEMPERATURE,
+                     max_output_tokens=DEFAULT_EVAL_MAX_OUTPUT_TOKENS, limiter=default_limiter, cache=None,
+                     max_workers=DEFAULT_EVAL_WORKERS, on_result=None):
+    """Run every prompt against every case concurrently and score the answers.
+
+    ``cases`` are dicts with ``human`` and ``ai`` messages. Returns
+    ``{"prompts", "results", "best", "requests", "cached"}``: ``results``
+    holds one dict per prompt×case (prompt-major order) with the output,
+    its scores, ``cached`` and ``error``; ``prompts`` holds each prompt's
+    mean scores, errors counting as empty answers; ``best`` is the index of
+    the prompt with the highest mean F1 (exact match breaks ties).
+    ``on_result(result)`` is called in the calling thread as each answer
+    arrives, before scoring. Identical prompt×case combinations are only
+    requested once.
+    """
+    prompts = [str(prompt).strip() for prompt in prompts]
+    cases = list(cases)
+    if not prompts or not cases:
+        raise ValueError("Need at least one prompt and one case to evaluate")
+    prompt_hashes = [prompt_hash(prompt) for prompt in prompts]
+    case_hashes = [case_hash(case) for case in cases]
+    results = [
+        {"prompt": p, "case": c, "prompt_hash": prompt_hashes[p], "case_hash": case_hashes[c],
+         "output": "", "cached": False, "error": None, "latency_s": 0.0}
+        for p in range(len(prompts)) for c in range(len(cases))
+    ]
+
+    # One request per distinct (prompt, case); duplicates share its answer
+    pending = {}
+    for result in results:
+        key = make_key(
+            kind="eval", prompt_hash=result["prompt_hash"], case_hash=result["case_hash"], model=model,
+            temperature=temperature, max_output_tokens=max_output_tokens,
+        )
+        pending.setdefault(key, []).append(result)
+
+    def run(key, result):
+        started = time.perf_counter()
+        text = _answer(client, model, prompts[result["prompt"]], cases[result["case"]], temperature,
+                       max_output_tokens, limiter)
+        if cache is not None and text:
+            cache.set(key, text)
+        return text, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="eval") as executor:
+        futures = {}
+        for key, group in pending.items():
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                for result in group:
+                    result.update(output=cached, cached=True)
+                    if on_result is not None:
+                        on_result(result)
+                continue
+            futures[executor.submit(run, key, group[0])] = group
+        requests = len(futures)
+        for future in as_completed(futures):
+            group = futures[future]
+            try:
+                text, latency_s = future.result()
+                fields = {"output": text, "latency_s": round(latency_s, 3)}
+            except Exception as e:
+                fields = {"error": str(e)}
+            metrics.inc("eval_requests_total", model=model, result="error" if "error" in fields else "ok")
+            for result in group:
+                result.update(fields)
+                if on_result is not None:
+                    on_result(result)
+
+    scores = score_outputs([result["output"] for result in results], [cases[result["case"]]["ai"] for result in results])
+    for name in SCORES:
+        for result, value in zip(results, scores[name].tolist()):
+            result[name] = round(value, 4)
+    # Prompt-major order, so each prompt's scores are one row
+    means = {name: scores[name].reshape(len(prompts), len(cases)).mean(axis=1) for name in SCORES}
+    errors = np.array([result["error"] is not None for result in results]).reshape(len(prompts), len(cases)).sum(axis=1)
+    summaries = [
+        {"prompt": p, "prompt_hash": prompt_hashes[p], "cases": len(cases), "errors": int(errors[p]),
+         **{name: round(float(means[name][p]), 4) for name in SCORES}}
+        for p in range(len(prompts))
+    ]
+    best = max(range(len(prompts)), key=lambda p: (means["f1"][p], means["exact_match"][p]))
+    return {
+        "prompts": summaries,
+        "results": results,
+        "best": best,
+        "requests": requests,
+        "cached": sum(result["cached"] for result in results),
+    }
@@ -0,0 +1,153 @@
+"""On-disk cache of extracted document text, keyed by file content hash.
+
+Re-uploading the same file skips extraction entirely. Each entry is two
+files under ``<CACHE_DIR>/extracted``: ``<key>.txt`` with the UTF-8 text of
+every extracted piece concatenated, and ``<key>.idx`` with the piece end
+offsets as packed uint64s. Reads memory-map the text and yield one piece at
+a time, so a cached 500-page PDF is never fully loaded into RAM. Entries are
+evicted least-recently-used first once the directory exceeds ``max_bytes``.
+"""
+import hashlib
+import mmap
+import os
+import threading
+import uuid
+from array import array
+
+from .cache import CACHE_DIR
+from .metrics import metrics
+from .storage import lazy_singleton
+
+HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def content_hash(source):
+    """SHA-256 of ``source`` (bytes, a path, or a seekable binary file object)."""
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+                digest.update(block)
+    else:
+        position = source.tell()
+        source.seek(0)
+        for block in iter(lambda: source.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    def __init__(self, directory=None, max_bytes=512 * 1024 * 1024):
+        self.directory = directory or os.path.join(CACHE_DIR, "extracted")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, source, file_type, extractor_version):
+        hashed = content_hash(source)
+        return hashlib.sha256(f"{hashed}:{file_type}:{extractor_version}".encode()).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".txt", base + ".idx"
+
+    def get(self, key):
+        """Return an iterator over the cached pieces, or None on a miss."""
+        text_path, index_path = self._paths(key)
+        if not (os.path.exists(text_path) and os.path.exists(index_path)):
+            with self._lock:
+                self.misses += 1
+            metrics.inc("cache_requests_total", cache="extraction", result="miss")
+            return None
+        with self._lock:
+            self.hits += 1
+        metrics.inc("cache_requests_total", cache="extraction", result="hit")
+        os.utime(index_path)  # Mark as recently used for eviction
+        return self._read(text_path, index_path)
+
+    def _read(self, text_path, index_path):
+        offsets = array("Q")
+        with open(index_path, "rb") as f:
+            offsets.frombytes(f.read())
+        if not offsets or offsets[-1] == 0:
+            yield from ("" for _ in offsets)
+            return
+        with open(text_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            for end in offsets:
+                yield data[start:end].decode("utf-8")
+                start = end
+
+    def store(self, key, pieces):
+        """Yield ``pieces`` unchanged while writing them to the cache.
+
+        The entry is only published once the iterator is fully consumed, so
+        an interrupted extraction never leaves a partial entry behind.
+        """
+        text_path, index_path = self._paths(key)
+        tmp = f".{uuid.uuid4().hex}.tmp"
+        offsets = array("Q")
+        position = 0
+        complete = False
+        try:
+            with open(text_path + tmp, "wb") as out:
+                for piece in pieces:
+                    encoded = piece.encode("utf-8")
+                    out.write(encoded)
+                    position += len(encoded)
+                    offsets.append(position)
+                    yield piece
+            with open(index_path + tmp, "wb") as out:
+                offsets.tofile(out)
+            os.replace(text_path + tmp, text_path)
+            os.replace(index_path + tmp, index_path)
+            complete = True
+        finally:
+            if not complete:
+                for path in (text_path + tmp, index_path + tmp):
+                    if os.path.exists(path):
+                        os.remove(path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        entries = {}
+        for name in os.listdir(self.directory):
+            key, ext = os.path.splitext(name)
+            if ext not in (".txt", ".idx"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entry = entries.setdefault(key, {"bytes": 0, "used": 0.0})
+            entry["bytes"] += info.st_size
+            if ext == ".idx":
+                entry["used"] = info.st_mtime
+        total = sum(entry["bytes"] for entry in entries.values())
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]["used"]):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= entry["bytes"]
+
+    def stats(self):
+        files = [name for name in os.listdir(self.directory) if name.endswith(".txt")]
+        size = sum(os.path.getsize(os.path.join(self.directory, name)) for name in os.listdir(self.directory))
+        return {"entries": len(files), "bytes": size, "hits": self.hits, "misses": self.misses}
+
+
+@lazy_singleton
+def get_default_extraction_cache():
+    """Process-wide extraction cache stored under CACHE_DIR."""
+    return ExtractionCache()
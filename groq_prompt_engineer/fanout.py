@@ -0,0 +1,128 @@
+"""Send one prompt-generation task to several models at once.
+
+Two modes:
+
+* ``race`` – every model streams concurrently and the first answer that
+  passes ``accept`` wins; the other streams are closed as soon as they
+  deliver their next chunk, which frees their connections and stops the
+  token debit against the rate limiter.
+* ``compare`` – every model runs to completion and the results carry
+  latency, tokens/s and output length for a side-by-side view.
+
+Streams run in worker threads; deltas are handed to ``on_delta`` in the
+calling thread, so it may safely update a Streamlit placeholder. The
+response cache is deliberately not used, so the numbers are real.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .generation import DEFAULT_MAX_OUTPUT_TOKENS, DEFAULT_SYSTEM_PROMPT, DEFAULT_TEMPERATURE, iter_prompt
+from .rate_limit import limiter as default_limiter
+from .tokens import count_tokens
+
+RACE = "race"
+COMPARE = "compare"
+
+# Shorter answers are treated as refusals or truncated output in race mode
+MIN_GOOD_CHARS = 40
+
+
+def is_good_prompt(text):
+    return len(text.strip()) >= MIN_GOOD_CHARS
+
+
+def _summarize(model, status, text, stats, error=None):
+    ttft_s = stats.get("ttft_s")
+    total_s = stats.get("total_s")
+    output_tokens = count_tokens(text)
+    streaming_s = total_s - ttft_s if total_s is not None and ttft_s is not None else None
+    return {
+        "model": model,
+        "status": status,
+        "text": text,
+        "error": error,
+        "ttft_s": ttft_s,
+        "total_s": total_s,
+        "output_chars": len(text),
+        "output_tokens": output_tokens,
+        "tokens_per_s": output_tokens / streaming_s if streaming_s else None,
+    }
+
+
+def fan_out_prompt(client, task, models, variables="", mode=RACE, temperature=DEFAULT_TEMPERATURE,
+                   max_output_tokens=DEFAULT_MAX_OUTPUT_TOKENS, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                   limiter=default_limiter, accept=is_good_prompt, on_delta=None, history=None):
+    """Generate a prompt for ``task`` with every model in ``models`` concurrently.
+
+    Returns ``{"mode", "winner", "results"}`` where ``results`` has one dict
+    per model, in the order given, with ``status`` one of ``"done"``,
+    ``"rejected"`` (finished but failed ``accept``), ``"cancelled"`` or
+    ``"error"``. ``winner`` is the first model whose answer passed
+    ``accept`` (in compare mode too), or None. ``on_delta(model, delta)``
+    is called in the calling thread as deltas arrive. Every model's
+    finished answer is recorded in ``history`` when one is given; cancelled
+    ones are not.
+    """
+    if mode not in (RACE, COMPARE):
+        raise ValueError(f"Unknown fan-out mode: {mode}")
+    models = list(dict.fromkeys(models))
+    if not models:
+        raise ValueError("No models selected")
+    events = queue.Queue()
+    cancel = threading.Event()
+
+    def run(model):
+        stats = {}
+        parts = []
+        try:
+            stream = iter_prompt(
+                client, task, variables, model=model, temperature=temperature,
+                max_output_tokens=max_output_tokens, system_prompt=system_prompt, limiter=limiter, stats=stats,
+                history=history,
+            )
+            try:
+                for delta in stream:
+                    if cancel.is_set():
+                        break
+                    parts.append(delta)
+                    events.put(("delta", model, delta))
+            finally:
+                stream.close()  # Closes the HTTP stream of a cancelled request
+        except Exception as e:
+            events.put(("done", model, _summarize(model, "error", "".join(parts), stats, error=str(e))))
+            return
+        text = "".join(parts).strip()
+        if cancel.is_set():
+            status = "cancelled"
+        else:
+            status = "done" if accept(text) else "rejected"
+        events.put(("done", model, _summarize(model, status, text, stats)))
+
+    results = {}
+    winner = None
+    executor = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="fanout")
+    try:
+        for model in models:
+            executor.submit(run, model)
+        while len(results) < len(models):
+            kind, model, payload = events.get()
+            if kind == "delta":
+                if on_delta is not None and not cancel.is_set():
+                    on_delta(model, payload)
+                continue
+            results[model] = payload
+            if payload["status"] == "done" and winner is None:
+                winner = model
+                if mode == RACE:
+                    cancel.set()
+                    break
+    finally:
+        cancel.set()
+        # Losers notice the cancellation at their next chunk; don't wait for them
+        executor.shutdown(wait=False)
+    ordered = [
+        results.get(model) or _summarize(model, "cancelled", "", {})
+        for model in models
+    ]
+    return {"mode": mode, "winner": winner, "results": ordered}
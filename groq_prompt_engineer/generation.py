@@ -0,0 +1,254 @@
+"""Prompt and dataset generation without any Streamlit dependency.
+
+Every setting the Streamlit app keeps in ``st.session_state`` is an explicit
+parameter here, so these functions can be used from scripts, the batch CLI
+or worker processes. Errors are raised rather than rendered.
+"""
+import json
+import os
+import time
+
+from .budget import plan_budget
+from .cache import make_key
+from .client import get_client
+from .completion import iter_completion
+from .dataset import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_SHARD_SIZE,
+    build_dataset_prompt,
+    generate_pairs_sharded,
+    iter_pairs_salvaged,
+)
+from .history import DATASET, PROMPT
+from .rate_limit import limiter as default_limiter
+from .templates import COT_PROMPT
+from .tokens import MESSAGE_OVERHEAD_TOKENS, count_tokens, truncate_to_tokens
+
+DEFAULT_MODEL = "llama3-70b-8192"
+DEFAULT_TEMPERATURE = 0.5
+DEFAULT_MAX_OUTPUT_TOKENS = 8192
+DEFAULT_SYSTEM_PROMPT = "You are a helpful and informative AI assistant."
+
+TRIM_MARKER = " [...]"
+
+
+def make_client(api_key=None, **pool_options):
+    """Return the pooled Groq client, reading GROQ_API_KEY from the environment by default."""
+    api_key = api_key or os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("No Groq API key provided (set GROQ_API_KEY or pass api_key)")
+    return get_client(api_key, **pool_options)
+
+
+# New function to get system prompt
+def get_system_prompt(task, variables, model, temperature, max_output_tokens):
+    return COT_PROMPT.render(
+        task=task, variables=variables, model=model, temperature=temperature, max_output_tokens=max_output_tokens,
+    )
+
+
+def _fit(text, tokens, excess):
+    """Drop ``excess`` tokens from the end of ``text``; return (text, tokens removed)."""
+    if excess <= 0 or not tokens:
+        return text, 0
+    keep = max(0, tokens - excess - count_tokens(TRIM_MARKER))
+    return truncate_to_tokens(text, keep) + TRIM_MARKER, tokens - keep
+
+
+def plan_prompt(task, variables, model, temperature, max_output_tokens, system_prompt):
+    """Budget a prompt-generation request before sending it.
+
+    Returns ``(plan, task, variables)``: ``plan.max_output_tokens`` is clamped
+    to the model's context window, and when even a minimal completion would
+    not fit, the task (then the variables) is trimmed.
+    """
+    task_tokens = count_tokens(task)
+    variables_tokens = count_tokens(variables)
+    prompt_tokens = (
+        COT_PROMPT.count_tokens(
+            task="", variables="", model=model, temperature=temperature, max_output_tokens=max_output_tokens,
+        )
+        + task_tokens + variables_tokens
+        + count_tokens(system_prompt) + 2 * MESSAGE_OVERHEAD_TOKENS
+    )
+    plan = plan_budget(model, prompt_tokens, max_output_tokens)
+    if plan.trim_tokens:
+        task, removed = _fit(task, task_tokens, plan.trim_tokens)
+        variables, removed_variables = _fit(variables, variables_tokens, plan.trim_tokens - removed)
+        plan.prompt_tokens -= removed + removed_variables
+        plan.trimmed = True
+    return plan, task, variables
+
+
+def plan_dataset(topic, num_pairs, model, max_output_tokens, system_prompt):
+    """Budget a dataset request; returns ``(plan, topic)`` with the topic trimmed if needed."""
+    overhead = count_tokens(system_prompt) + 2 * MESSAGE_OVERHEAD_TOKENS
+    plan = plan_budget(model, count_tokens(build_dataset_prompt(topic, num_pairs)) + overhead, max_output_tokens)
+    if plan.trim_tokens:
+        topic, removed = _fit(topic, count_tokens(topic), plan.trim_tokens)
+        plan.prompt_tokens = count_tokens(build_dataset_prompt(topic, num_pairs)) + overhead
+        plan.trimmed = True
+    return plan, topic
+
+
+def iter_prompt(client, task, variables="", model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                max_output_tokens=DEFAULT_MAX_OUTPUT_TOKENS, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                limiter=default_limiter, cache=None, bypass_sampled=False, stats=None, single_flight=None,
+                history=None):
+    """Yield the Chain of Thought prompt for ``task`` delta by delta.
+
+    Suitable for ``st.write_stream``. With a
+    :class:`~groq_prompt_engineer.cache.ResponseCache`, identical requests are
+    answered from disk in a single delta without calling Groq;
+    ``bypass_sampled`` skips the cache when temperature > 0, for callers who
+    want a fresh sample. ``stats`` receives the budget plan and the request
+    timings (or ``{"cache_hit": True}``).
+
+    With a :class:`~groq_prompt_engineer.singleflight.SingleFlight`,
+    identical requests already streaming for the same API key are joined
+    instead of repeated (``stats["coalesced"]`` is then True);
+    ``bypass_sampled`` opts out of this too.
+
+    With a :class:`~groq_prompt_engineer.history.HistoryStore`, the
+    finished prompt is recorded there (cache hits, already recorded when
+    first generated, and abandoned streams are not).
+
+    The request is budgeted locally first (see :func:`plan_prompt`), so an
+    oversized one is clamped or trimmed instead of failing at the API.
+    """
+    started = time.perf_counter()
+    original_task = task
+    plan, task, variables = plan_prompt(task, variables, model, temperature, max_output_tokens, system_prompt)
+    max_output_tokens = plan.max_output_tokens
+    if stats is not None:
+        stats["budget"] = plan.to_dict()
+    key = None
+    if cache is not None and not (bypass_sampled and temperature > 0):
+        key = make_key(
+            kind="prompt", template=COT_PROMPT.cache_id, task=task, variables=variables, model=model, temperature=temperature,
+            max_output_tokens=max_output_tokens, system_prompt=system_prompt,
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            if stats is not None:
+                stats["cache_hit"] = True
+            yield cached
+            return
+
+    user_prompt = get_system_prompt(task, variables, model, temperature, max_output_tokens)
+
+    def start(request_stats):
+        return iter_completion(client, model, system_prompt, user_prompt, temperature, max_output_tokens,
+                               limiter, request_stats, prompt_tokens=plan.prompt_tokens)
+
+    if single_flight is not None and not (bypass_sampled and temperature > 0):
+        flight_key = make_key(
+            kind="prompt_flight", api_key=getattr(client, "api_key", None), base_url=str(getattr(client, "base_url", "")),
+            model=model, system_prompt=system_prompt, user_prompt=user_prompt, temperature=temperature,
+            max_output_tokens=max_output_tokens,
+        )
+        deltas = single_flight.stream(flight_key, start, stats)
+    else:
+        deltas = start(stats)
+    parts = []
+    for delta in deltas:
+        parts.append(delta)
+        yield delta
+    result = "".join(parts).strip()
+    if key is not None and result:
+        cache.set(key, result)
+    if history is not None and result:
+        history.record(
+            PROMPT, original_task, result, model,
+            params={"variables": variables, "temperature": temperature, "max_output_tokens": max_output_tokens,
+                    "system_prompt": system_prompt, "coalesced": bool(stats and stats.get("coalesced"))},
+            latency_s=round(time.perf_counter() - started, 3), prompt_tokens=plan.prompt_tokens,
+            output_tokens=count_tokens(result), api_key=getattr(client, "api_key", None),
+        )
+
+
+def generate_prompt(client, task, variables="", model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                    max_output_tokens=DEFAULT_MAX_OUTPUT_TOKENS, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                    limiter=default_limiter, cache=None, bypass_sampled=False, stats=None, single_flight=None,
+                    history=None):
+    """Generate a Chain of Thought prompt for ``task`` (see :func:`iter_prompt`)."""
+    return "".join(iter_prompt(
+        client, task, variables, model, temperature, max_output_tokens, system_prompt,
+        limiter, cache, bypass_sampled, stats, single_flight, history,
+    )).strip()
+
+
+def iter_test_data(client, topic, num_pairs, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                   max_output_tokens=DEFAULT_MAX_OUTPUT_TOKENS, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                   limiter=default_limiter, stats=None, dedupe_index=None):
+    """Yield conversation pairs about ``topic`` as each one finishes streaming.
+
+    A broken or short response is topped up by asking only for the missing
+    pairs. ``stats`` receives the budget plan, request timings, the number
+    of requests and parsed/skipped/near-duplicate pair counts.
+    ``dedupe_index`` (e.g. :func:`~groq_prompt_engineer.dedup.get_topic_index`)
+    drops pairs too similar to ones generated before and steers requests
+    away from them.
+    """
+    plan, topic = plan_dataset(topic, num_pairs, model, max_output_tokens, system_prompt)
+    if stats is not None:
+        stats["budget"] = plan.to_dict()
+    yield from iter_pairs_salvaged(client, model, system_prompt, topic, num_pairs, temperature,
+                                   plan.max_output_tokens, limiter, stats, dedupe_index=dedupe_index)
+
+
+def generate_test_data(client, topic, num_pairs, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                       max_output_tokens=DEFAULT_MAX_OUTPUT_TOKENS, system_prompt=DEFAULT_SYSTEM_PROMPT,
+                       sharded=False, shard_size=DEFAULT_SHARD_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                       limiter=default_limiter, on_pair=None, stats=None, dedupe_index=None, history=None):
+    """Generate ``num_pairs`` human/AI conversation pairs about ``topic``.
+
+    ``on_pair`` is called in the calling thread with each pair as soon as it
+    is available. ``stats`` receives request timings (single-request mode).
+    ``dedupe_index`` is passed on as in :func:`iter_test_data`. With a
+    :class:`~groq_prompt_engineer.history.HistoryStore`, the pairs are
+    recorded there as JSONL. Raises ValueError if no valid pair could be
+    parsed.
+    """
+    started = time.perf_counter()
+    original_topic = topic
+    if sharded:
+        # Shards are smaller than the whole request, so budgeting one shard covers them all
+        plan, topic = plan_dataset(topic, min(num_pairs, shard_size), model, max_output_tokens, system_prompt)
+        pairs = generate_pairs_sharded(
+            client, model, system_prompt, topic, num_pairs,
+            shard_size=shard_size, max_workers=max_workers, limiter=limiter,
+            temperature=temperature, max_output_tokens=plan.max_output_tokens, on_pair=on_pair,
+            dedupe_index=dedupe_index,
+        )
+        _record_dataset(history, client, original_topic, pairs, num_pairs, model, temperature, max_output_tokens,
+                        system_prompt, sharded, started)
+        return pairs
+    pairs = []
+    stats = {} if stats is None else stats
+    for pair in iter_test_data(client, topic, num_pairs, model, temperature, max_output_tokens, system_prompt,
+                               limiter, stats, dedupe_index):
+        pairs.append(pair)
+        if on_pair is not None:
+            on_pair(pair)
+    if not pairs and stats.get("pairs_near_duplicate"):
+        raise ValueError("Every generated pair repeated one already generated for this topic")
+    if not pairs:
+        raise ValueError("Could not extract valid JSON from the response")
+    _record_dataset(history, client, original_topic, pairs, num_pairs, model, temperature, max_output_tokens,
+                    system_prompt, sharded, started, prompt_tokens=stats.get("budget", {}).get("prompt_tokens"))
+    return pairs
+
+
+def _record_dataset(history, client, topic, pairs, num_pairs, model, temperature, max_output_tokens, system_prompt,
+                    sharded, started, prompt_tokens=None):
+    if history is None or not pairs:
+        return
+    output = "".join(json.dumps(pair) + "\n" for pair in pairs)
+    history.record(
+        DATASET, topic, output, model,
+        params={"num_pairs": num_pairs, "pairs": len(pairs), "temperature": temperature,
+                "max_output_tokens": max_output_tokens, "system_prompt": system_prompt, "sharded": sharded},
+        latency_s=round(time.perf_counter() - started, 3), prompt_tokens=prompt_tokens,
+        output_tokens=count_tokens(output), api_key=getattr(client, "api_key", None),
+    )
@@ -0,0 +1,186 @@
+"""Append-only history of generated prompts and datasets, with full-text search.
+
+Every finished generation is written to a SQLite database under
+``CACHE_DIR`` (WAL mode) with its model, parameters, latency and token
+counts, so output outlives the Streamlit session and can be found and
+reused later instead of being generated again. Rows are never updated or
+deleted; triggers reject both.
+
+Search goes through an SQLite FTS5 index over the task or topic and the
+output, kept in step by an insert trigger and ranked with BM25, so a query
+stays fast with tens of thousands of entries. Only the newest
+``MAX_RANKED`` matches are ranked: a query of common words matches most of
+the history, and scoring all of it would be slower than a plain scan. On an
+SQLite build without FTS5 it falls back to a ``LIKE`` scan.
+
+Entries record the SHA-256 of the API key they were generated with (never
+the key itself), so each user of a shared app only sees their own history.
+"""
+import json
+import os
+import re
+import sqlite3
+import time
+
+from .cache import CACHE_DIR
+from .storage import key_hash, lazy_singleton, thread_local_connection
+
+PROMPT = "prompt"
+DATASET = "dataset"
+
+# Matches ranked by BM25 per search, newest first; older matches are not returned
+MAX_RANKED = 200
+
+_COLUMNS = ("id", "kind", "input", "output", "model", "params", "key_hash", "latency_s", "prompt_tokens",
+            "output_tokens", "created")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    input TEXT NOT NULL,
+    output TEXT NOT NULL,
+    model TEXT NOT NULL,
+    params TEXT NOT NULL,
+    key_hash TEXT,
+    latency_s REAL,
+    prompt_tokens INTEGER,
+    output_tokens INTEGER,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_owner ON generations (key_hash, kind, created);
+CREATE TRIGGER IF NOT EXISTS generations_no_update BEFORE UPDATE ON generations
+BEGIN SELECT RAISE(ABORT, 'history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS generations_no_delete BEFORE DELETE ON generations
+BEGIN SELECT RAISE(ABORT, 'history is append-only'); END;
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS generations_fts USING fts5(
+    input, output, content='generations', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS generations_fts_insert AFTER INSERT ON generations
+BEGIN INSERT INTO generations_fts (rowid, input, output) VALUES (new.id, new.input, new.output); END;
+"""
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def fts_query(text):
+    """An FTS5 query matching every word of ``text`` (the last one as a prefix); None if it has no words.
+
+    Words are quoted, so operators and stray quotes in user input are
+    searched for rather than parsed.
+    """
+    words = _WORD_RE.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+class HistoryStore:
+    """SQLite table of past generations plus its full-text index."""
+
+    def __init__(self, path=None, clock=time.time):
+        self.path = path or os.path.join(CACHE_DIR, "history.sqlite3")
+        self.clock = clock
+        self._connect = thread_local_connection(self.path)
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        try:
+            conn.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False  # SQLite built without FTS5
+
+    def _row(self, row, extra=()):
+        entry = dict(zip(_COLUMNS + tuple(extra), row))
+        entry["params"] = json.loads(entry["params"])
+        return entry
+
+    def record(self, kind, input, output, model, params=None, latency_s=None, prompt_tokens=None,
+               output_tokens=None, api_key=None):
+        """Append one generation; returns its id."""
+        cursor = self._connect().execute(
+            "INSERT INTO generations (kind, input, output, model, params, key_hash, latency_s, prompt_tokens, "
+            "output_tokens, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, input, output, model, json.dumps(params or {}, default=str), key_hash(api_key) if api_key else None,
+             latency_s, prompt_tokens, output_tokens, self.clock()),
+        )
+        return cursor.lastrowid
+
+    def get(self, entry_id):
+        row = self._connect().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM generations WHERE id = ?", (entry_id,),
+        ).fetchone()
+        return self._row(row) if row is not None else None
+
+    def _filters(self, kind, api_key_hash, table="generations"):
+        clauses, args = [], []
+        if kind is not None:
+            clauses.append(f"{table}.kind = ?")
+            args.append(kind)
+        if api_key_hash is not None:
+            clauses.append(f"{table}.key_hash = ?")
+            args.append(api_key_hash)
+        return clauses, args
+
+    def recent(self, kind=None, api_key_hash=None, limit=20):
+        """Newest entries first."""
+        clauses, args = self._filters(kind, api_key_hash)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM generations{where} ORDER BY created DESC, id DESC LIMIT ?",
+            args + [limit],
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def search(self, text, kind=None, api_key_hash=None, limit=20):
+        """Entries whose task/topic or output contain every word of ``text``, best match first.
+
+        Only the newest ``MAX_RANKED`` matches are considered. Each entry has a ``snippet`` of the output around the matches,
+        with matches in ``**bold**``.
+        """
+        query = fts_query(text)
+        if query is None:
+            return []
+        if not self.fts:
+            return self._search_like(text, kind, api_key_hash, limit)
+        clauses, args = self._filters(kind, api_key_hash, table="g")
+        where = "".join(f" AND {clause}" for clause in clauses)
+        columns = ", ".join(f"g.{column}" for column in _COLUMNS)
+        # The subquery walks the index newest first and stops after MAX_RANKED
+        # matches, so only those get a score and a snippet
+        rows = self._connect().execute(
+            f"SELECT {columns}, ranked.snippet FROM ("
+            f"SELECT generations_fts.rowid AS id, bm25(generations_fts) AS score, "
+            f"snippet(generations_fts, 1, '**', '**', ' … ', 16) AS snippet "
+            f"FROM generations_fts JOIN generations g ON g.id = generations_fts.rowid "
+            f"WHERE generations_fts MATCH ?{where} ORDER BY generations_fts.rowid DESC LIMIT ?"
+            f") ranked JOIN generations g ON g.id = ranked.id ORDER BY ranked.score LIMIT ?",
+            [query] + args + [MAX_RANKED, limit],
+        ).fetchall()
+        return [self._row(row, extra=("snippet",)) for row in rows]
+
+    def _search_like(self, text, kind, api_key_hash, limit):
+        clauses, args = self._filters(kind, api_key_hash)
+        for word in _WORD_RE.findall(text):
+            clauses.append("(input LIKE ? OR output LIKE ?)")
+            args += [f"%{word}%"] * 2
+        rows = self._connect().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM generations WHERE {' AND '.join(clauses)} "
+            f"ORDER BY created DESC LIMIT ?",
+            args + [limit],
+        ).fetchall()
+        return [dict(self._row(row), snippet=row[3][:200]) for row in rows]
+
+    def count(self, kind=None, api_key_hash=None):
+        clauses, args = self._filters(kind, api_key_hash)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._connect().execute(f"SELECT COUNT(*) FROM generations{where}", args).fetchone()[0]
+
+
+@lazy_singleton
+def get_default_history():
+    """Process-wide history stored under CACHE_DIR."""
+    return HistoryStore()
@@ -0,0 +1,239 @@
+"""Streaming, memory-bounded ingestion of uploaded documents.
+
+Each file type is turned into a lazy stream of text pieces (CSV row chunks,
+PDF pages, text blocks), which :func:`chunk_text` packs into chunks that fit
+the selected model's context window. Large PDFs are extracted in parallel
+across a process pool. Every stage records its throughput in
+:class:`IngestStats`.
+"""
+import collections
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .budget import MIN_OUTPUT_TOKENS, SAFETY_MARGIN_TOKENS
+from .metrics import metrics
+from .rate_limit import CHARS_PER_TOKEN, CONTEXT_WINDOWS, DEFAULT_CONTEXT_WINDOW, estimate_tokens
+
+# Bump whenever extraction output changes so cached text is not reused
+EXTRACTOR_VERSION = 1
+
+CSV_CHUNK_ROWS = 5000
+TEXT_BLOCK_BYTES = 1024 * 1024
+# Spawned workers take a few hundred milliseconds to start, so smaller PDFs are read in-process
+PDF_PARALLEL_MIN_PAGES = 128
+PDF_PAGES_PER_TASK = 8
+# Tokens kept free for the instructions that wrap a chunk in the request
+PROMPT_OVERHEAD_TOKENS = 1024
+# At most this share of the window is reserved for the output when sizing chunks
+MAX_OUTPUT_SHARE = 0.5
+
+
+class IngestStats:
+    """Per-stage counters: items (pages/rows/chunks), bytes and seconds."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, items=0, nbytes=0, seconds=0.0):
+        entry = self.stages.setdefault(stage, {"items": 0, "bytes": 0, "seconds": 0.0})
+        entry["items"] += items
+        entry["bytes"] += nbytes
+        entry["seconds"] += seconds
+
+    def summary(self):
+        result = {}
+        for stage, entry in self.stages.items():
+            seconds = entry["seconds"] or 1e-9
+            result[stage] = {
+                "items": entry["items"],
+                "mb": round(entry["bytes"] / 1e6, 3),
+                "seconds": round(entry["seconds"], 3),
+                "items_per_s": round(entry["items"] / seconds, 1),
+                "mb_per_s": round(entry["bytes"] / 1e6 / seconds, 2),
+            }
+        return result
+
+
+def chunk_token_budget(model, max_output_tokens=0):
+    """Largest chunk (in tokens) that still leaves room for the output and instructions.
+
+    The output reservation is capped at ``MAX_OUTPUT_SHARE`` of the window,
+    so asking for as many output tokens as the window holds still gives
+    useful chunks; :func:`~groq_prompt_engineer.budget.plan_budget` clamps
+    ``max_tokens`` to what is left when the request is sent.
+    """
+    window = CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    reserved = min(max_output_tokens, max(MIN_OUTPUT_TOKENS, int(window * MAX_OUTPUT_SHARE)))
+    return max(256, window - SAFETY_MARGIN_TOKENS - reserved - PROMPT_OVERHEAD_TOKENS)
+
+
+def _timed(pieces, stats, stage):
+    """Wrap a piece iterator so time spent producing pieces is charged to ``stage``."""
+    pieces = iter(pieces)
+    while True:
+        started = time.perf_counter()
+        try:
+            piece = next(pieces)
+        except StopIteration:
+            return
+        stats.add(stage, items=1, nbytes=len(piece.encode("utf-8")), seconds=time.perf_counter() - started)
+        yield piece
+
+
+def iter_csv_text(source, chunk_rows=CSV_CHUNK_ROWS):
+    """Yield a CSV as text, ``chunk_rows`` rows at a time (header on the first chunk only)."""
+    import pandas as pd
+
+    for index, frame in enumerate(pd.read_csv(source, chunksize=chunk_rows)):
+        yield frame.to_string(header=index == 0, index=False) + "\n"
+
+
+def iter_text_blocks(source, block_bytes=TEXT_BLOCK_BYTES, encoding="utf-8"):
+    """Yield a text file in blocks of roughly ``block_bytes``, split on line ends."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    reader = io.TextIOWrapper(source, encoding=encoding, errors="replace", newline="")
+    try:
+        while True:
+            block = reader.read(block_bytes)
+            if not block:
+                return
+            # Finish the current line so a block never ends mid-line
+            block += reader.readline()
+            yield block
+    finally:
+        reader.detach()
+
+
+def _open_pdf(source):
+    import PyPDF2
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return PyPDF2.PdfReader(source)
+
+
+_worker_reader = None
+
+
+def _init_pdf_worker(source):
+    global _worker_reader
+    _worker_reader = _open_pdf(source)
+
+
+def _extract_pages(page_range):
+    start, stop = page_range
+    return [(_worker_reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+def iter_pdf_pages(source, workers=None, parallel_min_pages=PDF_PARALLEL_MIN_PAGES,
+                   pages_per_task=PDF_PAGES_PER_TASK):
+    """Yield the text of each PDF page, in order.
+
+    ``source`` is a path, bytes or a binary file object. PDFs with at least
+    ``parallel_min_pages`` pages are extracted across a process pool (bytes
+    and paths only); pages are still yielded lazily and in order, with at
+    most two page ranges per worker extracted ahead of the consumer.
+    """
+    reader = _open_pdf(source)
+    num_pages = len(reader.pages)
+    workers = workers or os.cpu_count() or 1
+    parallel = (
+        workers > 1
+        and num_pages >= parallel_min_pages
+        and isinstance(source, (bytes, bytearray, str, os.PathLike))
+    )
+    if not parallel:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    ranges = [(start, min(start + pages_per_task, num_pages)) for start in range(0, num_pages, pages_per_task)]
+    # Forking a multithreaded process such as Streamlit's can deadlock the children
+    context = multiprocessing.get_context("spawn")
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_pdf_worker,
+                             initargs=(source,)) as executor:
+        try:
+            for page_range in ranges:
+                pending.append(executor.submit(_extract_pages, page_range))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _split_piece(piece, max_chars):
+    """Split an oversized piece on paragraph, line or word boundaries."""
+    while len(piece) > max_chars:
+        cut = -1
+        for separator in ("\n\n", "\n", " "):
+            cut = piece.rfind(separator, 0, max_chars)
+            if cut > 0:
+                cut += len(separator)
+                break
+        if cut <= 0:
+            cut = max_chars
+        yield piece[:cut]
+        piece = piece[cut:]
+    if piece:
+        yield piece
+
+
+def chunk_text(pieces, max_tokens):
+    """Pack text pieces into chunks of at most ``max_tokens`` estimated tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    buffer = []
+    buffered = 0
+    for piece in pieces:
+        for part in _split_piece(piece, max_chars):
+            if buffered and estimate_tokens(buffered + len(part)) > max_tokens:
+                yield "".join(buffer)
+                buffer, buffered = [], 0
+            buffer.append(part)
+            buffered += len(part)
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_document_pieces(source, file_type, stats, workers=None):
+    """Lazy text pieces for a supported ``file_type``; raises ValueError otherwise."""
+    if file_type == "text/csv":
+        return _timed(iter_csv_text(source), stats, "csv_rows")
+    if file_type == "application/pdf":
+        return _timed(iter_pdf_pages(source, workers=workers), stats, "pdf_pages")
+    if file_type.startswith("text/"):
+        return _timed(iter_text_blocks(source), stats, "text_blocks")
+    raise ValueError(f"Unsupported file type for text extraction: {file_type}")
+
+
+def iter_document_chunks(source, file_type, model, max_output_tokens=0, stats=None, workers=None, cache=None):
+    """Yield context-window-sized text chunks of a document as it is read.
+
+    With an :class:`~groq_prompt_engineer.extract_cache.ExtractionCache`,
+    extracted pieces are looked up by content hash and replayed from disk on
+    a hit, or written through to the cache on a miss.
+    """
+    stats = stats if stats is not None else IngestStats()
+    if cache is None:
+        pieces = iter_document_pieces(source, file_type, stats, workers)
+    else:
+        key = cache.key(source, file_type, EXTRACTOR_VERSION)
+        cached = cache.get(key)
+        if cached is not None:
+            pieces = _timed(cached, stats, "cache_read")
+        else:
+            pieces = cache.store(key, iter_document_pieces(source, file_type, stats, workers))
+    # Only time spent producing chunks is observed, not the time the consumer holds each one
+    produced = stats.stages.get("chunks", {}).get("seconds", 0.0)
+    try:
+        yield from _timed(chunk_text(pieces, chunk_token_budget(model, max_output_tokens)), stats, "chunks")
+    finally:
+        produced = stats.stages.get("chunks", {}).get("seconds", 0.0) - produced
+        metrics.observe("operation_seconds", produced, operation="ingest_document")
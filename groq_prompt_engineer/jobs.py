@@ -0,0 +1,379 @@
+"""Persistent background jobs for long-running dataset generation.
+
+Jobs live in a SQLite database under ``CACHE_DIR`` (WAL mode), so they
+outlive Streamlit reruns, browser disconnects and process restarts. A small
+pool of worker threads claims queued jobs in submission order and runs
+them with :func:`~groq_prompt_engineer.generation.generate_test_data`.
+
+Every pair is appended to ``<CACHE_DIR>/jobs/<job id>.jsonl`` as soon as it
+arrives and is never kept in memory, so jobs of up to ``MAX_DATASET_PAIRS``
+pairs run in constant memory; progress is saved a few times a second. A job that was
+running when its process died is put back in the queue once its heartbeat
+is stale; on resume the pairs already on disk are kept and only the
+remainder is requested.
+
+API keys are never written to disk. A job records the SHA-256 of the key
+it was submitted with, and the key itself is held in memory
+(:meth:`JobQueue.register_key`). After a restart, a job waits in the queue
+until a session registers the same key again.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from .cache import CACHE_DIR
+from .dataset import _pair_key
+from .metrics import metrics
+from .storage import key_hash, lazy_singleton, thread_local_connection
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+DEFAULT_WORKERS = 2
+POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 10.0
+# A running job whose heartbeat is older than this belongs to a dead process
+STALE_AFTER = 60.0
+# Pairs requested per generate_test_data call, which bounds the memory a job needs
+BATCH_PAIRS = 500
+# Give up once this many batches in a row add no new (non-duplicate) pairs
+MAX_STALLED_ROUNDS = 3
+PROGRESS_INTERVAL = 0.5
+
+# Above this many pairs the app generates in the background straight to disk
+LARGE_DATASET_PAIRS = 100
+MAX_DATASET_PAIRS = 100_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    key_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL,
+    result_path TEXT NOT NULL,
+    error TEXT,
+    owner TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+CREATE INDEX IF NOT EXISTS jobs_key_hash_created ON jobs (key_hash, created);
+"""
+
+_COLUMNS = ("id", "kind", "params", "key_hash", "status", "progress", "total", "result_path", "error", "owner",
+            "created", "updated", "heartbeat")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobStore:
+    """SQLite table of jobs plus the directory their results are written to."""
+
+    def __init__(self, path=None, results_dir=None, clock=time.time):
+        self.path = path or os.path.join(CACHE_DIR, "jobs.sqlite3")
+        self.results_dir = results_dir or os.path.join(CACHE_DIR, "jobs")
+        self.clock = clock
+        self._connect = thread_local_connection(self.path)
+        os.makedirs(self.results_dir, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _row(self, row):
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def submit(self, kind, params, api_key_hash, total):
+        job_id = uuid.uuid4().hex
+        now = self.clock()
+        result_path = os.path.join(self.results_dir, f"{job_id}.jsonl")
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, params, key_hash, status, total, result_path, created, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(params), api_key_hash, QUEUED, total, result_path, now, now),
+        )
+        return job_id
+
+    def get(self, job_id):
+        row = self._connect().execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def list(self, api_key_hash=None, limit=20):
+        """Most recent jobs first, optionally only those submitted with one API key."""
+        query = f"SELECT {', '.join(_COLUMNS)} FROM jobs"
+        args = ()
+        if api_key_hash is not None:
+            query += " WHERE key_hash = ?"
+            args = (api_key_hash,)
+        rows = self._connect().execute(query + " ORDER BY created DESC LIMIT ?", args + (limit,)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def claim(self, owner, key_hashes):
+        """Atomically move the oldest queued job with a known key to RUNNING; return it or None."""
+        if not key_hashes:
+            return None
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in key_hashes)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE status = ? AND key_hash IN ({placeholders}) ORDER BY created LIMIT 1",
+                (QUEUED, *key_hashes),
+            ).fetchone()
+            if row is not None:
+                now = self.clock()
+                conn.execute(
+                    "UPDATE jobs SET status = ?, owner = ?, heartbeat = ?, updated = ? WHERE id = ?",
+                    (RUNNING, owner, now, now, row[0]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row[0]) if row is not None else None
+
+    def update(self, job_id, **fields):
+        fields["updated"] = self.clock()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._connect().execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def heartbeat(self, owner):
+        self._connect().execute(
+            "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = ?", (self.clock(), owner, RUNNING),
+        )
+
+    def requeue_stale(self, max_age=STALE_AFTER):
+        """Put RUNNING jobs whose worker stopped heart-beating back in the queue; return how many."""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = ?, owner = NULL, updated = ? WHERE status = ? AND heartbeat < ?",
+            (QUEUED, self.clock(), RUNNING, self.clock() - max_age),
+        )
+        return cursor.rowcount
+
+    def finish(self, job_id, status, **fields):
+        """Move a RUNNING job to a terminal ``status``; returns False if it is no longer running (e.g. cancelled)."""
+        fields.update(status=status, updated=self.clock())
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        cursor = self._connect().execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ? AND status = ?", (*fields.values(), job_id, RUNNING),
+        )
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job (a running one stops before writing its next pair)."""
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, updated = ? WHERE id = ? AND status IN (?, ?)",
+            (CANCELLED, self.clock(), job_id, QUEUED, RUNNING),
+        )
+
+    def status(self, job_id):
+        row = self._connect().execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def counts(self):
+        return dict(self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+def iter_results(path):
+    """Yield the pairs written to a job's result file so far (a torn last line is skipped)."""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
+
+
+def _truncate_torn_line(path):
+    # A crash mid-write can leave a partial last line; cut the file back to the last newline
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+
+
+class JobQueue:
+    """Worker pool running dataset jobs from a :class:`JobStore`.
+
+    ``make_client(api_key)`` builds the Groq client for a job (the pooled
+    :func:`~groq_prompt_engineer.client.get_client` by default).
+    """
+
+    def __init__(self, store=None, workers=DEFAULT_WORKERS, make_client=None, limiter=None,
+                 poll_interval=POLL_INTERVAL):
+        from .client import get_client
+        from .rate_limit import limiter as default_limiter
+
+        self.store = store or JobStore()
+        self.workers = max(1, int(workers))
+        self.make_client = make_client or get_client
+        self.limiter = limiter or default_limiter
+        self.poll_interval = poll_interval
+        self.owner = uuid.uuid4().hex
+        self._keys = {}
+        self._keys_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def register_key(self, api_key):
+        """Make jobs submitted with ``api_key`` runnable (keys are kept in memory only)."""
+        hashed = key_hash(api_key)
+        with self._keys_lock:
+            known = hashed in self._keys
+            self._keys[hashed] = api_key
+        if not known:
+            self._wake.set()
+        return hashed
+
+    def submit_dataset(self, api_key, topic, num_pairs, **options):
+        """Queue a dataset job; ``options`` are passed to ``generate_test_data``. Returns the job id."""
+        hashed = self.register_key(api_key)
+        params = {"topic": topic, "num_pairs": int(num_pairs), **options}
+        job_id = self.store.submit("dataset", params, hashed, int(num_pairs))
+        self._wake.set()
+        return job_id
+
+    def start(self):
+        if self._threads:
+            return self
+        requeued = self.store.requeue_stale()
+        if requeued:
+            logger.info("Resuming %d interrupted job(s)", requeued)
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _heartbeat(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            self.store.heartbeat(self.owner)
+            self.store.requeue_stale()
+
+    def _work(self):
+        while not self._stop.is_set():
+            with self._keys_lock:
+                keys = dict(self._keys)
+            job = self.store.claim(self.owner, list(keys))
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            try:
+                with metrics.timer("operation_seconds", operation="dataset_job"):
+                    self.run_job(job, keys[job["key_hash"]])
+            except JobCancelled:
+                logger.info("Job %s cancelled", job["id"])
+            except Exception as e:
+                logger.warning("Job %s failed: %s", job["id"], e)
+                self.store.finish(job["id"], FAILED, error=str(e))
+
+    def run_job(self, job, api_key):
+        """Run (or resume) one dataset job, appending pairs to its result file.
+
+        Pairs are requested ``BATCH_PAIRS`` at a time and never collected in
+        memory; what grows with the job is one hash per pair plus its entry
+        in the topic's near-duplicate index (a few hundred bytes).
+        """
+        from .dedup import get_topic_index
+        from .generation import generate_test_data
+
+        params = dict(job["params"])
+        topic = params.pop("topic")
+        num_pairs = params.pop("num_pairs")
+        path = job["result_path"]
+        _truncate_torn_line(path)
+        # Hashes rather than the pair keys themselves keep the set small for very large jobs
+        seen = set()
+        # Shared with this key's other generations on the topic; after a restart it is rebuilt from the file
+        dedupe_index = get_topic_index(topic, api_key)
+        for pair in iter_results(path):
+            seen.add(hash(_pair_key(pair)))
+            dedupe_index.add(pair)
+        progress = len(seen)
+        self.store.update(job["id"], progress=progress)
+        reported = self.store.clock()
+
+        with open(path, "a", encoding="utf-8") as out:
+            def on_pair(pair):
+                nonlocal progress, reported
+                key = hash(_pair_key(pair))
+                if key in seen or progress >= num_pairs:
+                    return
+                self._check_cancelled(job["id"])  # Before every write, so nothing lands in the file after a cancel
+                seen.add(key)
+                out.write(json.dumps(pair) + "\n")
+                progress += 1
+                now = self.store.clock()
+                if now - reported >= PROGRESS_INTERVAL:
+                    # Progress is persisted a few times a second, not per pair
+                    reported = now
+                    out.flush()
+                    self._report(job["id"], progress)
+
+            # Pairs that repeat ones already on disk are dropped, so keep going until rounds stop adding any
+            stalled = 0
+            error = None
+            try:
+                while progress < num_pairs and stalled < MAX_STALLED_ROUNDS:
+                    self._check_cancelled(job["id"])
+                    before = progress
+                    try:
+                        generate_test_data(
+                            self.make_client(api_key), topic, min(BATCH_PAIRS, num_pairs - progress),
+                            limiter=self.limiter, on_pair=on_pair, dedupe_index=dedupe_index, **params,
+                        )
+                    except ValueError as e:  # A batch with no usable (or no new) pairs
+                        error = e
+                    stalled = stalled + 1 if progress == before else 0
+            finally:
+                # Whatever happened, the saved progress matches the lines in the file
+                out.flush()
+                self._report(job["id"], progress)
+        if not progress and error is not None:
+            raise error
+        self.store.finish(job["id"], DONE, progress=progress, error=None)
+
+    def _check_cancelled(self, job_id):
+        if self.store.status(job_id) == CANCELLED:
+            raise JobCancelled()
+
+    def _report(self, job_id, progress):
+        self.store.update(job_id, progress=progress, heartbeat=self.store.clock())
+
+
+@lazy_singleton
+def get_default_job_queue():
+    """Process-wide job queue stored under CACHE_DIR, started on first use."""
+    return JobQueue().start()
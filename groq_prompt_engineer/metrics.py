@@ -0,0 +1,233 @@
+"""Local latency and throughput metrics for the hot paths.
+
+Everything is kept in process: histograms (time to first token, tokens/s,
+rate-limiter queue wait, operation and page-render durations) and counters
+(retries, cache hits/misses, near-duplicate pairs, coalesced requests,
+evaluation requests), each labelled e.g. by model or operation.
+
+Three ways out:
+
+* :meth:`MetricsRegistry.snapshot` – count and p50/p95/p99 per series, for
+  the app's debug panel. Percentiles come from the most recent
+  ``RESERVOIR_SIZE`` samples of each series.
+* :meth:`MetricsRegistry.prometheus_text` – Prometheus text exposition
+  format (cumulative buckets, sum, count), served by
+  :func:`start_metrics_server` when ``GROQ_TOOLKIT_METRICS_PORT`` is set.
+* a JSONL file (``GROQ_TOOLKIT_METRICS_FILE``) with one line per
+  observation, for offline analysis.
+"""
+import bisect
+import collections
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+RESERVOIR_SIZE = 2048
+PERCENTILES = (50, 95, 99)
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+THROUGHPUT_BUCKETS = (10, 25, 50, 100, 200, 400, 800, 1600, 3200)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "groq_ttft_seconds": ("histogram", "Time to first streamed token", LATENCY_BUCKETS),
+    "groq_request_seconds": ("histogram", "Total streamed request time", LATENCY_BUCKETS),
+    "groq_output_tokens_per_second": ("histogram", "Generated tokens per second after the first token",
+                                      THROUGHPUT_BUCKETS),
+    "rate_limit_queue_wait_seconds": ("histogram", "Time spent waiting for rate limiter budget", LATENCY_BUCKETS),
+    "operation_seconds": ("histogram", "Duration of app operations", LATENCY_BUCKETS),
+    "page_render_seconds": ("histogram", "Streamlit script run duration", LATENCY_BUCKETS),
+    "retries_total": ("counter", "Retried requests", None),
+    "cache_requests_total": ("counter", "Cache lookups by result", None),
+    "near_duplicates_total": ("counter", "Generated pairs dropped as near-duplicates", None),
+    "single_flight_requests_total": ("counter", "Prompt requests that started (leader) or joined (follower) a stream",
+                                     None),
+    "eval_requests_total": ("counter", "Prompt evaluation requests by outcome", None),
+}
+
+
+def percentile(ordered, q):
+    """Nearest-rank ``q``-th percentile of an already sorted, non-empty list."""
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.samples = collections.deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+
+class MetricsRegistry:
+    def __init__(self, metrics=None, jsonl_path=None, clock=time.time):
+        self.metrics = dict(metrics or METRICS)
+        self.clock = clock
+        self._series = {}
+        self._lock = threading.Lock()
+        self._jsonl = None
+        if jsonl_path:
+            self.open_jsonl(jsonl_path)
+
+    def open_jsonl(self, path):
+        """Also append every observation to ``path`` as a JSON line."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+            # Line-buffered so a crash loses at most the current line
+            self._jsonl = open(path, "a", buffering=1, encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+
+    def _record(self, name, kind, value, labels):
+        declared = self.metrics.get(name)
+        if declared is None or declared[0] != kind:
+            raise KeyError(f"Unknown {kind} metric: {name}")
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = _Histogram(declared[2]) if kind == "histogram" else [0]
+                self._series[key] = series
+            if kind == "histogram":
+                series.observe(value)
+            else:
+                series[0] += value
+            if self._jsonl is not None:
+                self._jsonl.write(json.dumps({"ts": self.clock(), "metric": name, "labels": labels, "value": value}) + "\n")
+
+    def observe(self, name, value, **labels):
+        """Add one sample to histogram ``name``."""
+        self._record(name, "histogram", value, labels)
+
+    def inc(self, name, amount=1, **labels):
+        """Increase counter ``name`` by ``amount``."""
+        self._record(name, "counter", amount, labels)
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the ``with`` block (or decorated call) in histogram ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """One row per series: metric, labels, count and (for histograms) p50/p95/p99."""
+        with self._lock:
+            items = [
+                (name, labels, series if isinstance(series, list) else (series.count, sorted(series.samples)))
+                for (name, labels), series in sorted(self._series.items())
+            ]
+        rows = []
+        for name, labels, series in items:
+            row = {"metric": name, "labels": ", ".join(f"{k}={v}" for k, v in labels)}
+            if isinstance(series, list):
+                row["count"] = series[0]
+            else:
+                count, ordered = series
+                row["count"] = count
+                for q in PERCENTILES:
+                    row[f"p{q}"] = round(percentile(ordered, q), 4) if ordered else None
+            rows.append(row)
+        return rows
+
+    def prometheus_text(self):
+        """All series in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            by_name = collections.defaultdict(list)
+            for (name, labels), series in sorted(self._series.items()):
+                by_name[name].append((labels, series))
+            for name, entries in by_name.items():
+                kind, help_text, buckets = self.metrics[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, series in entries:
+                    if kind == "counter":
+                        lines.append(f"{name}{_labels(labels)} {series[0]}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float("inf"),), series.bucket_counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(float(bound))
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {series.total}")
+                    lines.append(f"{name}_count{_labels(labels)} {series.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+metrics = MetricsRegistry(jsonl_path=os.getenv("GROQ_TOOLKIT_METRICS_FILE"))
+
+_server = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=None, host="127.0.0.1", registry=None):
+    """Serve ``/metrics`` from a background thread; at most one server per process.
+
+    ``port`` defaults to ``GROQ_TOOLKIT_METRICS_PORT``; returns None if
+    neither is set.
+    """
+    global _server
+    port = port if port is not None else os.getenv("GROQ_TOOLKIT_METRICS_PORT")
+    if port is None or port == "":
+        return None
+    with _server_lock:
+        if _server is None:
+            server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            server.daemon_threads = True
+            server.registry = registry or metrics
+            threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info("Serving metrics on http://%s:%d/metrics", host, server.server_address[1])
+            _server = server
+        return _server
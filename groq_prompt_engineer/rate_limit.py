@@ -0,0 +1,292 @@
+import email.utils
+import re
+import threading
+import time
+
+from .tokens import count_tokens
+
+# Groq rate limits
+RATE_LIMITS = {
+    'llama3-70b-8192': {'requests_per_minute': 30, 'tokens_per_minute': 6000},
+    'llama3-8b-8192': {'requests_per_minute': 30, 'tokens_per_minute': 30000},
+    'llama3-groq-70b-8192-tool-use-preview': {'requests_per_minute': 30, 'tokens_per_minute': 15000},
+    'llama3-groq-8b-8192-tool-use-preview': {'requests_per_minute': 30, 'tokens_per_minute': 15000},
+    'llama-3.1-8b-instant': {'requests_per_minute': 30, 'tokens_per_minute': 131072},
+    'llama-3.1-70b-versatile': {'requests_per_minute': 30, 'tokens_per_minute': 131072},
+}
+
+# Context window (prompt + completion tokens) per model
+CONTEXT_WINDOWS = {
+    'llama3-70b-8192': 8192,
+    'llama3-8b-8192': 8192,
+    'llama3-groq-70b-8192-tool-use-preview': 8192,
+    'llama3-groq-8b-8192-tool-use-preview': 8192,
+    'llama-3.1-8b-instant': 131072,
+    'llama-3.1-70b-versatile': 131072,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Token estimate used for TPM accounting.
+
+    Accepts the text itself (counted with :func:`~groq_prompt_engineer.tokens.count_tokens`)
+    or just its length in characters (~4 characters per token).
+    """
+    if isinstance(text, int):
+        return max(1, text // CHARS_PER_TOKEN) if text else 0
+    return count_tokens(text)
+
+
+_RESET_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_RESET_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_reset(value):
+    """Seconds from a Groq reset header such as ``"2m59.56s"``, ``"7.66s"`` or ``"120ms"``."""
+    seconds = _number(value)
+    if seconds is not None or not value:
+        return seconds
+    parts = _RESET_PART_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _RESET_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(headers):
+    """Seconds to wait according to ``retry-after-ms`` / ``retry-after`` (seconds or HTTP date), or None."""
+    milliseconds = _number(headers.get("retry-after-ms"))
+    if milliseconds is not None:
+        return max(0.0, milliseconds / 1000)
+    value = headers.get("retry-after")
+    seconds = _number(value)
+    if seconds is not None:
+        return max(0.0, seconds)
+    if value:
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+class _Bucket:
+    def __init__(self, capacity, now):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / 60.0  # refill per second
+        self.level = self.capacity
+        self.updated = now
+
+    def refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.level = min(self.capacity, self.level + elapsed * self.rate)
+            self.updated = now
+
+    def wait_for(self, amount):
+        deficit = amount - self.level
+        if deficit <= 0:
+            return 0.0
+        return deficit / self.rate
+
+
+class _ModelState:
+    def __init__(self, limits, now):
+        self.requests = _Bucket(limits['requests_per_minute'], now)
+        self.tokens = _Bucket(limits['tokens_per_minute'], now)
+        self.queue_depth = 0
+        self.next_ticket = 0
+        self.serving = 0
+        self.abandoned = set()
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        # Nobody is admitted before this time (set from retry-after / x-ratelimit-* headers)
+        self.paused_until = 0.0
+
+
+class RateLimiter:
+    """Per-model token-bucket limiter enforcing both RPM and TPM.
+
+    Each model gets a request bucket and a token bucket that refill
+    continuously. Callers are admitted in arrival order as soon as both
+    buckets hold enough budget. ``clock`` and ``sleep`` can be swapped for
+    fakes in tests.
+    """
+
+    def __init__(self, limits=None, clock=time.monotonic, sleep=time.sleep):
+        self.limits = limits if limits is not None else RATE_LIMITS
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._models = {}
+
+    def _state(self, model):
+        state = self._models.get(model)
+        if state is None:
+            if model not in self.limits:
+                raise KeyError(f"No rate limits configured for model: {model}")
+            state = _ModelState(self.limits[model], self.clock())
+            self._models[model] = state
+        return state
+
+    def _clamp(self, state, tokens):
+        # A single request larger than the whole minute budget could never be
+        # admitted; let it through once the bucket is full instead.
+        return min(max(0, tokens), state.tokens.capacity)
+
+    def _advance(self, state):
+        state.serving += 1
+        while state.serving in state.abandoned:
+            state.abandoned.discard(state.serving)
+            state.serving += 1
+
+    def acquire(self, model, tokens=0):
+        """Block until a request of ``tokens`` estimated tokens may be sent.
+
+        Returns the number of seconds spent waiting.
+        """
+        with self._lock:
+            state = self._state(model)
+            ticket = state.next_ticket
+            state.next_ticket += 1
+            state.queue_depth += 1
+            started = self.clock()
+
+        try:
+            return self._wait_turn(state, ticket, tokens, started)
+        except BaseException:
+            # Don't let an interrupted caller block everyone queued behind it
+            with self._lock:
+                if ticket >= state.serving:
+                    state.queue_depth -= 1
+                    if ticket == state.serving:
+                        self._advance(state)
+                    else:
+                        state.abandoned.add(ticket)
+            raise
+
+    def _wait_turn(self, state, ticket, tokens, started):
+        while True:
+            with self._lock:
+                now = self.clock()
+                state.requests.refill(now)
+                state.tokens.refill(now)
+                if ticket == state.serving:
+                    amount = self._clamp(state, tokens)
+                    delay = max(
+                        state.requests.wait_for(1), state.tokens.wait_for(amount), state.paused_until - now,
+                    )
+                    if delay <= 0:
+                        state.requests.level -= 1
+                        state.tokens.level -= amount
+                        self._advance(state)
+                        state.queue_depth -= 1
+                        state.admitted += 1
+                        waited = now - started
+                        state.total_wait += waited
+                        state.max_wait = max(state.max_wait, waited)
+                        return waited
+                else:
+                    # Someone ahead of us is still waiting; poll again shortly.
+                    delay = 0.01
+            self.sleep(delay)
+
+    def try_acquire(self, model, tokens=0):
+        """Non-blocking variant of :meth:`acquire`. Returns True if admitted."""
+        with self._lock:
+            state = self._state(model)
+            if state.queue_depth:
+                return False
+            now = self.clock()
+            state.requests.refill(now)
+            state.tokens.refill(now)
+            amount = self._clamp(state, tokens)
+            if state.requests.wait_for(1) > 0 or state.tokens.wait_for(amount) > 0 or now < state.paused_until:
+                return False
+            state.requests.level -= 1
+            state.tokens.level -= amount
+            state.next_ticket += 1
+            state.serving += 1
+            state.admitted += 1
+            return True
+
+    def record_usage(self, model, tokens):
+        """Debit tokens consumed beyond the estimate passed to :meth:`acquire`.
+
+        The bucket may go negative, which delays the next callers until the
+        overspend has refilled.
+        """
+        if tokens <= 0:
+            return
+        with self._lock:
+            state = self._state(model)
+            state.tokens.refill(self.clock())
+            state.tokens.level -= tokens
+
+    def pause(self, model, seconds):
+        """Admit no requests for ``model`` for the next ``seconds`` (e.g. after a 429)."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            state = self._state(model)
+            state.paused_until = max(state.paused_until, self.clock() + seconds)
+
+    def update_from_headers(self, model, headers):
+        """Sync the local budget with the ``retry-after`` and ``x-ratelimit-*`` headers of a response.
+
+        Remaining tokens lower than the local estimate drain the token
+        bucket; an exhausted request or token quota, or a ``retry-after``,
+        pauses the model until the reported reset.
+        """
+        if not headers:
+            return
+        pause = retry_after_seconds(headers) or 0.0
+        for kind in ("requests", "tokens"):
+            remaining = _number(headers.get(f"x-ratelimit-remaining-{kind}"))
+            if remaining is None:
+                continue
+            if remaining <= 0:
+                pause = max(pause, parse_reset(headers.get(f"x-ratelimit-reset-{kind}")) or 0.0)
+            if kind == "tokens":
+                with self._lock:
+                    state = self._state(model)
+                    state.tokens.refill(self.clock())
+                    state.tokens.level = min(state.tokens.level, remaining)
+        self.pause(model, pause)
+
+    def stats(self, model=None):
+        """Return wait-time and queue-depth stats, for one model or all."""
+        with self._lock:
+            models = [model] if model is not None else list(self._models)
+            now = self.clock()
+            result = {}
+            for name in models:
+                state = self._state(name)
+                state.requests.refill(now)
+                state.tokens.refill(now)
+                result[name] = {
+                    "queue_depth": state.queue_depth,
+                    "admitted": state.admitted,
+                    "total_wait_s": round(state.total_wait, 3),
+                    "avg_wait_s": round(state.total_wait / state.admitted, 3) if state.admitted else 0.0,
+                    "max_wait_s": round(state.max_wait, 3),
+                    "requests_available": round(state.requests.level, 2),
+                    "tokens_available": round(state.tokens.level, 1),
+                    "paused_s": round(max(0.0, state.paused_until - now), 2),
+                }
+            return result[model] if model is not None else result
+
+
+# Process-wide limiter shared by every Streamlit session
+limiter = RateLimiter()
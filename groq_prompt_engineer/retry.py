@@ -0,0 +1,83 @@
+"""Retry policy for Groq requests: jittered exponential backoff that honors Groq's headers.
+
+The ``groq`` SDK's own retries are turned off for pooled clients (see
+:mod:`groq_prompt_engineer.client`) so that every 429 passes through here:
+its ``retry-after`` and ``x-ratelimit-*`` headers are fed back into the
+shared :class:`~groq_prompt_engineer.rate_limit.RateLimiter`, which then
+holds back *all* sessions using that model, not just the one that was
+rejected.
+"""
+import random
+import time
+
+from .rate_limit import retry_after_seconds
+
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+
+# 408 timeout, 409 lock conflict, 429 rate limit, 5xx server errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class IncompleteResponseError(Exception):
+    """A stream failed after output had started; ``partial`` holds the text received so far."""
+
+    def __init__(self, partial, cause):
+        super().__init__(f"Response interrupted after {len(partial)} characters: {cause}")
+        self.partial = partial
+        self.cause = cause
+
+
+def response_headers(exc):
+    """Headers of the HTTP response behind an SDK error, or None."""
+    response = getattr(exc, "response", None)
+    return getattr(response, "headers", None)
+
+
+def is_retryable(exc):
+    """True for rate limits, server errors, timeouts and dropped connections."""
+    if isinstance(exc, IncompleteResponseError):
+        return is_retryable(exc.cause)
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    try:
+        import groq
+        import httpx
+    except ImportError:
+        return isinstance(exc, (ConnectionError, TimeoutError))
+    return isinstance(exc, (groq.APIConnectionError, httpx.TransportError, ConnectionError, TimeoutError))
+
+
+class RetryPolicy:
+    """Up to ``max_attempts`` tries with "full jitter" exponential backoff.
+
+    A server-provided ``retry-after`` replaces the computed delay (plus up to
+    10% jitter so that sessions rejected together don't return together).
+    ``rand`` and ``sleep`` can be swapped for fakes in tests.
+    """
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, rand=random.random, sleep=time.sleep):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rand = rand
+        self.sleep = sleep
+
+    def delay(self, attempt, exc=None):
+        """Seconds to wait before retry number ``attempt`` (1-based) after ``exc``."""
+        headers = response_headers(exc) if exc is not None else None
+        retry_after = retry_after_seconds(headers) if headers else None
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) * (1 + 0.1 * self.rand())
+        return self.rand() * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+    def should_retry(self, attempt, exc):
+        """Whether a request that failed on try number ``attempt`` with ``exc`` is worth another try."""
+        return attempt < self.max_attempts and is_retryable(exc)
+
+
+# Policy used when callers don't pass one
+default_policy = RetryPolicy()
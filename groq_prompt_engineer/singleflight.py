@@ -0,0 +1,124 @@
+"""Single-flight coalescing of identical in-flight streaming requests.
+
+When several sessions (users, browser tabs, batch workers) ask for exactly
+the same generation at the same time, only the first one calls Groq. Its
+stream is driven by a background thread into a shared buffer; every waiter,
+including the first, replays the deltas received so far and then follows
+new ones as they arrive, so a follower that joins late still gets the full
+text. A slow or abandoned waiter never holds the stream up, and the
+upstream request is closed once no one is listening any more.
+
+Unlike the response cache this only shares work that is in progress: once
+the stream finishes, the next identical request starts a new flight.
+Leaders and followers are counted, so the share of requests served without
+an upstream call (``dedup_rate``) can be read from :meth:`SingleFlight.stats`
+or the ``single_flight_requests_total`` counter.
+"""
+import threading
+
+from .metrics import metrics
+
+
+class _Flight:
+    def __init__(self):
+        self.deltas = []
+        self.stats = {}
+        self.error = None
+        self.done = False
+        self.cancelled = False
+        self.waiters = 0
+        self.cond = threading.Condition()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def stream(self, key, start, stats=None):
+        """Yield the deltas of ``start(stats)``, sharing one call among concurrent callers with the same ``key``.
+
+        ``start`` is called at most once per flight, in a background thread,
+        with a dict to fill with request timings; each caller's ``stats``
+        receives a copy when the stream ends, with ``coalesced`` set for
+        callers that joined an existing flight. An exception from the
+        stream is raised in every caller.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                self.followers += 1
+            flight.waiters += 1
+        metrics.inc("single_flight_requests_total", result="leader" if leader else "follower")
+        if leader:
+            threading.Thread(target=self._run, args=(key, flight, start), name="single-flight", daemon=True).start()
+
+        seen = 0
+        try:
+            while True:
+                with flight.cond:
+                    while seen == len(flight.deltas) and not flight.done:
+                        flight.cond.wait()
+                    deltas = flight.deltas[seen:]
+                    done = flight.done
+                seen += len(deltas)
+                yield from deltas
+                if done:
+                    break
+            if stats is not None:
+                stats.update(flight.stats)
+                if not leader:
+                    stats["coalesced"] = True
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            with self._lock:
+                flight.waiters -= 1
+                if flight.waiters == 0 and not flight.done:
+                    # Everyone left early: stop the upstream stream and let the next request start afresh
+                    with flight.cond:
+                        flight.cancelled = True
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+
+    def _run(self, key, flight, start):
+        try:
+            deltas = start(flight.stats)
+            try:
+                for delta in deltas:
+                    with flight.cond:
+                        if flight.cancelled:
+                            break
+                        flight.deltas.append(delta)
+                        flight.cond.notify_all()
+            finally:
+                deltas.close()  # Releases the HTTP connection of a cancelled stream
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+
+    def stats(self):
+        with self._lock:
+            total = self.leaders + self.followers
+            return {
+                "requests": total,
+                "upstream_calls": self.leaders,
+                "coalesced": self.followers,
+                "dedup_rate": round(self.followers / total, 3) if total else 0.0,
+                "in_flight": len(self._flights),
+            }
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,55 @@
+"""Helpers shared by the on-disk stores (caches, jobs, history)."""
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+
+
+def key_hash(api_key):
+    """SHA-256 of an API key: what the stores record instead of the key itself."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def thread_local_connection(path):
+    """Return a function giving each calling thread its own connection to ``path``.
+
+    Connections are in autocommit mode with WAL journaling, so readers never
+    block the writer and several processes can share the file. The directory
+    of ``path`` is created if needed.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    local = threading.local()
+
+    def connect():
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn = conn
+        return conn
+
+    return connect
+
+
+def lazy_singleton(factory):
+    """Decorate a zero-argument ``factory`` so it runs once, on first call, and its result is reused.
+
+    Used for the process-wide default stores, which every Streamlit session
+    shares. Creation is serialised by a lock, so concurrent first calls
+    still build a single instance.
+    """
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def get():
+        with lock:
+            if not instance:
+                instance.append(factory())
+            return instance[0]
+
+    return get
@@ -0,0 +1,115 @@
+"""Incremental parser for streamed JSON arrays of conversation pairs.
+
+The model is asked for ``[{"human": ..., "ai": ...}, ...]``. Instead of
+waiting for the whole array, :class:`PairStreamParser` is fed deltas as they
+arrive and emits each top-level object as soon as its closing brace is seen.
+Objects that fail to parse or validate are counted and skipped, text
+outside objects (code fences, commentary) is ignored, and only the object
+currently being read is buffered, so memory stays bounded however long the
+response is.
+"""
+import json
+import re
+
+# Characters that can change parser state; everything else is skipped in bulk
+_SPECIAL = re.compile(r'[{}"\\]')
+
+DEFAULT_MAX_OBJECT_CHARS = 64 * 1024
+
+
+def is_valid_pair(item):
+    return (
+        isinstance(item, dict)
+        and isinstance(item.get("human"), str) and item["human"].strip() != ""
+        and isinstance(item.get("ai"), str) and item["ai"].strip() != ""
+    )
+
+
+class PairStreamParser:
+    def __init__(self, validate=is_valid_pair, max_object_chars=DEFAULT_MAX_OBJECT_CHARS):
+        self.validate = validate
+        self.max_object_chars = max_object_chars
+        self.parsed = 0
+        self.skipped = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._parts = []
+        self._size = 0
+
+    def _reset_object(self):
+        self._parts = []
+        self._size = 0
+
+    def _finish_object(self, results):
+        text = "".join(self._parts)
+        self._reset_object()
+        try:
+            item = json.loads(text)
+        except ValueError:
+            self.skipped += 1
+            return
+        if self.validate is None or self.validate(item):
+            self.parsed += 1
+            results.append(item)
+        else:
+            self.skipped += 1
+
+    def feed(self, text):
+        """Consume the next piece of the stream; return the pairs it completed."""
+        results = []
+        pos = 0
+        # Start of the part of ``text`` belonging to the current object
+        start = 0 if self._depth else None
+        for match in _SPECIAL.finditer(text):
+            index = match.start()
+            char = match.group()
+            if self._escaped:
+                self._escaped = False
+                if index == pos:
+                    pos = index + 1
+                    continue
+            pos = index + 1
+            if self._in_string:
+                if char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                if self._depth:
+                    self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    start = index
+                self._depth += 1
+            elif char == "}" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(text[start:index + 1])
+                    start = None
+                    self._finish_object(results)
+        if self._escaped and pos < len(text):
+            # The escaped character was a plain one after the last match
+            self._escaped = False
+        if self._depth and start is not None:
+            self._parts.append(text[start:])
+            self._size += len(text) - start
+            if self._size > self.max_object_chars:
+                # Runaway object (probably a missing brace): drop it and resync
+                self.skipped += 1
+                self._reset_object()
+                self._depth = 0
+                self._in_string = False
+                self._escaped = False
+        return results
+
+    def close(self):
+        """End of stream; an unterminated trailing object counts as skipped."""
+        if self._depth:
+            self.skipped += 1
+        self._reset_object()
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        return []
@@ -0,0 +1,149 @@
+"""Precompiled prompt templates with a byte-identical static prefix.
+
+Providers cache prompt prefixes, but only if the prefix is exactly the same
+from one request to the next. Each template is therefore split into a
+static ``prefix`` (instructions only, used verbatim and never
+formatted) and a short ``suffix`` holding every variable field, so requests differing only in
+task, model or temperature still share the whole instruction block.
+
+Templates are registered and compiled once at import: the prefix is
+encoded and token-counted, and the suffix is parsed into literal/field
+parts so rendering is a single join. ``cache_id`` combines the template
+name, its explicit version and a digest of its source; it is stable
+across processes and changes whenever the template does, so it is what
+goes into response cache keys.
+"""
+import hashlib
+import string
+
+from .tokens import count_tokens
+
+_formatter = string.Formatter()
+
+
+class PromptTemplate:
+    def __init__(self, name, version, prefix, suffix):
+        self.name = name
+        self.version = version
+        self.prefix = prefix
+        self.suffix = suffix
+        self.prefix_bytes = len(prefix.encode("utf-8"))
+        self.prefix_tokens = count_tokens(prefix)
+        # Precompiled suffix: literal strings and field names, in order
+        self._parts = []
+        self.fields = []
+        literals = [prefix]
+        for literal, field, format_spec, conversion in _formatter.parse(suffix):
+            if format_spec or conversion:
+                raise ValueError(f"Template {name!r}: format specs are not supported in {{{field}}}")
+            if literal:
+                self._parts.append((literal, None))
+                literals.append(literal)
+            if field is not None:
+                self._parts.append((None, field))
+                self.fields.append(field)
+        self.static_tokens = count_tokens("".join(literals))
+        digest = hashlib.sha256(f"{prefix}\0{suffix}".encode("utf-8")).hexdigest()[:12]
+        self.cache_id = f"{name}@{version}:{digest}"
+
+    def render_suffix(self, **fields):
+        return "".join(literal if field is None else str(fields[field]) for literal, field in self._parts)
+
+    def render(self, **fields):
+        """The full prompt: the static prefix followed by the rendered suffix."""
+        return self.prefix + self.render_suffix(**fields)
+
+    def count_tokens(self, **fields):
+        """Estimated prompt tokens, counting only the variable fields per call."""
+        return self.static_tokens + sum(count_tokens(str(fields[field])) for field in self.fields)
+
+
+_registry = {}
+
+
+def register_template(name, version, prefix, suffix):
+    """Compile and register a template; re-registering a name replaces it."""
+    template = PromptTemplate(name, version, prefix, suffix)
+    _registry[name] = template
+    return template
+
+
+def get_template(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise KeyError(f"Unknown prompt template: {name}") from None
+
+
+def registered_templates():
+    return dict(_registry)
+
+
+COT_PROMPT = register_template("cot_prompt", 2, """You are an advanced AI prompt engineer assistant integrated into a Streamlit app. Your task is to generate a highly effective Chain of Thought (COT) prompt based on the user's input. Follow these steps:
+
+1. Analyze the task:
+   - Identify the main objective of the user's task
+   - Determine the complexity and scope of the task
+   - Consider any specific domain knowledge required
+
+2. Evaluate the variables:
+   - Examine the provided variables (if any)
+   - Determine how these variables should be incorporated into the prompt
+   - Consider additional relevant variables that might enhance the prompt
+
+3. Consider the Groq model capabilities:
+   - Adapt the prompt to leverage the strengths of the selected Groq model (listed below)
+   - Take into account the temperature setting and max token limit (listed below)
+
+4. Incorporate COT elements:
+   - Break down the task into logical steps or components
+   - Include prompts for explanations or reasoning at each step
+   - Encourage the model to show its work or thought process
+
+5. Optimize for clarity and specificity:
+   - Use clear, concise language
+   - Avoid ambiguity in instructions
+   - Include specific examples or constraints where appropriate
+
+6. Add context and formatting instructions:
+   - Provide any necessary background information
+   - Specify desired output format (e.g., bullet points, paragraphs, JSON)
+   - Include any relevant data or file analysis instructions if applicable
+
+7. Encourage creativity and problem-solving:
+   - Include prompts for alternative approaches or solutions
+   - Ask for pros and cons of different methods if relevant
+
+8. Incorporate error handling and edge cases:
+   - Prompt the model to consider potential issues or limitations
+   - Ask for validation steps or error checking where appropriate
+
+9. Format the final prompt:
+   - Present the COT prompt in a clear, structured manner
+   - Use appropriate line breaks, numbering, or bullet points for readability
+
+Generate a COT prompt that follows these steps and is optimized for the given task, variables, and selected Groq model. Ensure the prompt is detailed enough to guide the AI but concise enough to fit within token limits.
+
+""", """Selected Model: {model}
+Temperature: {temperature}
+Max Tokens: {max_output_tokens}
+Variables: {variables}
+Task: {task}
+
+Based on the above information, generate an optimal Chain of Thought prompt:
+""")
+
+DATASET_PROMPT = register_template("dataset", 2, """Generate pairs of conversation for the topic given below.
+Each pair should consist of a human message and an AI response.
+Format the output as a valid JSON array of objects, where each object has 'human' and 'ai' keys.
+Ensure the output is strictly in this format:
+[
+    {"human": "Human message 1", "ai": "AI response 1"},
+    {"human": "Human message 2", "ai": "AI response 2"},
+    ...
+]
+Do not include any text before or after the JSON array.
+
+""", """{batch_note}Number of pairs: {num_pairs}
+Topic: {topic}
+""")
@@ -0,0 +1,43 @@
+"""Script-run timing for the Streamlit app.
+
+Streamlit re-executes the whole script on every interaction. The first run
+in a process (cold start, including imports) and every later rerun are
+recorded separately so their latency can be compared.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ScriptTimer:
+    def __init__(self, keep=200):
+        self.keep = keep
+        self.cold_start = None
+        self.reruns = []
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            if self.cold_start is None:
+                self.cold_start = seconds
+                logger.info("Cold start script run took %.3fs", seconds)
+            else:
+                self.reruns.append(seconds)
+                del self.reruns[:-self.keep]
+
+    def stats(self):
+        with self._lock:
+            reruns = sorted(self.reruns)
+            result = {
+                "cold_start_s": round(self.cold_start, 4) if self.cold_start is not None else None,
+                "reruns": len(reruns),
+            }
+            if reruns:
+                result["last_rerun_s"] = round(self.reruns[-1], 4)
+                result["median_rerun_s"] = round(reruns[len(reruns) // 2], 4)
+                result["max_rerun_s"] = round(reruns[-1], 4)
+            return result
+
+
+script_timer = ScriptTimer()
@@ -0,0 +1,35 @@
+"""Fast local token estimate for Llama 3 style BPE tokenizers.
+
+Counting runs of up to 8 word characters plus every punctuation mark with a
+single C-level regex pass lands close to the real Llama 3 token count for
+English prose and code, without shipping a tokenizer. It errs slightly on
+the high side for long words, which is the safe direction for budgeting.
+"""
+import re
+
+_PIECE_RE = re.compile(r"\w{1,8}|[^\w\s]")
+
+# Per-message formatting overhead of the chat template (role markers etc.)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(text):
+    """Estimated token count of ``text``."""
+    if not text:
+        return 0
+    return len(_PIECE_RE.findall(text))
+
+
+def count_message_tokens(messages):
+    """Estimated prompt tokens for a list of chat messages."""
+    return sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Return the longest prefix of ``text`` with at most ``max_tokens`` estimated tokens."""
+    if max_tokens <= 0:
+        return ""
+    for index, match in enumerate(_PIECE_RE.finditer(text)):
+        if index == max_tokens:
+            return text[:match.start()].rstrip()
+    return text
@@ -0,0 +1,24 @@
+"""Optional LangSmith tracing without paying for the import when it is off.
+
+Importing ``langsmith`` takes about as long as importing Streamlit itself,
+and most runs never trace. :func:`traceable` only imports it when tracing
+is switched on through the environment (``LANGSMITH_TRACING`` or
+``LANGCHAIN_TRACING_V2`` set to ``true``) at the time a function is
+decorated; otherwise the function is returned unchanged.
+"""
+import os
+
+TRACING_ENV_VARS = ("LANGSMITH_TRACING", "LANGSMITH_TRACING_V2", "LANGCHAIN_TRACING", "LANGCHAIN_TRACING_V2")
+
+
+def tracing_enabled():
+    return any(os.getenv(name, "").strip().lower() == "true" for name in TRACING_ENV_VARS)
+
+
+def traceable(func):
+    """``langsmith.traceable`` when tracing is enabled, otherwise a no-op decorator."""
+    if not tracing_enabled():
+        return func
+    from langsmith import traceable as langsmith_traceable
+
+    return langsmith_traceable(func)
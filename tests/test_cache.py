@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from groq_prompt_engineer.cache import ResponseCache, make_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def response_cache(tmp_path, clock, **kwargs):
+    return ResponseCache(path=os.path.join(tmp_path, "responses.sqlite3"), clock=clock, **kwargs)
+
+
+def test_make_key_depends_on_every_field():
+    assert make_key(model="a", task="t") == make_key(task="t", model="a")
+    assert make_key(model="a", task="t") != make_key(model="b", task="t")
+
+
+def test_hit_and_miss_are_counted(tmp_path, clock):
+    cache = response_cache(tmp_path, clock)
+    assert cache.get("key") is None
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_counters_are_shared_through_the_database(tmp_path, clock):
+    response_cache(tmp_path, clock).get("key")
+    other = response_cache(tmp_path, clock)
+    assert other.get("key") is None
+    assert (other.stats()["misses"], other.stats()["total_misses"]) == (1, 2)
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = response_cache(tmp_path, clock, ttl_seconds=60)
+    cache.set("key", "value")
+    clock.now += 60
+    assert cache.get("key") == "value"
+    clock.now += 1
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path, clock):
+    cache = response_cache(tmp_path, clock, max_entries=2)
+    cache.set("old", "1")
+    clock.now += 1
+    cache.set("new", "2")
+    clock.now += 1
+    assert cache.get("old") == "1"
+    clock.now += 1
+    cache.set("newest", "3")
+    assert cache.get("new") is None
+    assert cache.get("old") == "1"
+    assert cache.get("newest") == "3"
+
+
+def test_size_cap_evicts_until_it_fits(tmp_path, clock):
+    cache = response_cache(tmp_path, clock, max_bytes=10)
+    for key in "abc":
+        cache.set(key, "x" * 4)
+        clock.now += 1
+    assert cache.stats()["bytes"] <= 10
+    assert cache.get("a") is None
+    assert cache.get("c") == "xxxx"
@@ -0,0 +1,73 @@
+import io
+import json
+import threading
+
+import pytest
+
+from groq_prompt_engineer import cli
+
+
+def parse(lines):
+    return list(cli.read_records(io.StringIO("\n".join(lines) + "\n")))
+
+
+def test_records_take_their_id_or_line_number():
+    records = parse(['{"id": "a", "task": "t"}', "", '{"request_id": "r", "topic": "x"}', '{"task": "t"}'])
+    assert [record_id for record_id, _ in records] == ["a", "r", 4]
+
+
+def test_bad_lines_yield_an_error_instead_of_raising():
+    records = parse(['{"task": "t"}', "{not json", "[1, 2]", '{"task": "u"}'])
+    assert [record_id for record_id, _ in records] == [1, 2, 3, 4]
+    assert records[1][1].startswith("Invalid JSON on line 2")
+    assert records[2][1] == "Line 3 is not a JSON object"
+
+
+def test_item_text_prefers_task_then_topic_then_titled_body():
+    assert cli._item_text({"task": "t", "topic": "x"}) == "t"
+    assert cli._item_text({"topic": "x", "body": "b"}) == "x"
+    assert cli._item_text({"title": "Title", "body": "b"}) == "Title\n\nb"
+    with pytest.raises(ValueError):
+        cli._item_text({"title": "Title"})
+
+
+def test_run_writes_every_result_and_counts_failures(monkeypatch):
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def process_record(client, record_id, record, args):
+        with lock:
+            in_flight.append(record_id)
+            peak.append(len(in_flight))
+        try:
+            if record.get("fail"):
+                return {"id": record_id, "error": "boom"}
+            return {"id": record_id, "output": record["task"].upper()}
+        finally:
+            with lock:
+                in_flight.remove(record_id)
+
+    monkeypatch.setattr(cli, "process_record", process_record)
+    lines = [json.dumps({"task": f"task {i}", "fail": i == 3}) for i in range(10)] + ["{oops"]
+    args = cli.build_parser().parse_args(["-", "--workers", "2"])
+    out = io.StringIO()
+
+    assert cli.run(cli.read_records(io.StringIO("\n".join(lines))), None, args, out) == (9, 2)
+    results = {result["id"]: result for result in map(json.loads, out.getvalue().splitlines())}
+    assert sorted(results) == list(range(1, 12))
+    assert results[1]["output"] == "TASK 0"
+    assert results[4]["error"] == "boom"
+    assert results[11]["error"].startswith("Invalid JSON on line 11")
+    assert max(peak) <= 2
+
+
+def test_failed_generation_is_reported_in_the_result(monkeypatch):
+    def generate_prompt(*args, **kwargs):
+        raise RuntimeError("rate limited")
+
+    monkeypatch.setattr(cli.generation, "generate_prompt", generate_prompt)
+    args = cli.build_parser().parse_args(["-", "--no-cache", "--no-history"])
+    result = cli.process_record(None, "a", {"task": "t"}, args)
+    assert (result["id"], result["error"]) == ("a", "rate limited")
+    assert result["latency_s"] >= 0
@@ -0,0 +1,43 @@
+import pytest
+
+from benchmarks.stub import StubGroqClient
+from groq_prompt_engineer.dataset import generate_pairs_sharded, iter_pairs_salvaged
+from groq_prompt_engineer.retry import RetryPolicy
+
+NO_WAIT = RetryPolicy(max_attempts=3, sleep=lambda seconds: None)
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+def failing_responder(prompt):
+    raise ServerError("unavailable")
+
+
+def test_salvage_requests_only_the_missing_pairs():
+    prompts = []
+
+    def short_then_full(prompt):
+        prompts.append(prompt)
+        count = 2 if len(prompts) == 1 else int(prompt.split("Number of pairs: ")[1].split()[0])
+        return "[" + ",".join(f'{{"human": "q{len(prompts)}.{i}", "ai": "a"}}' for i in range(count)) + "]"
+
+    client = StubGroqClient(ttft=0, tokens_per_s=1e9, responder=short_then_full)
+    pairs = list(iter_pairs_salvaged(client, "m", "system", "topic", 5, retry=NO_WAIT))
+    assert len(pairs) == 5
+    assert "Number of pairs: 3" in prompts[1]
+
+
+def test_failing_request_is_sent_at_most_max_attempts_times():
+    client = StubGroqClient(ttft=0, responder=failing_responder)
+    with pytest.raises(ServerError):
+        list(iter_pairs_salvaged(client, "m", "system", "topic", 5, retry=NO_WAIT))
+    assert client.calls == NO_WAIT.max_attempts
+
+
+def test_failing_shard_is_not_retried_on_top_of_the_salvage_loop():
+    client = StubGroqClient(ttft=0, responder=failing_responder)
+    with pytest.raises(ValueError, match="All 2 shards failed"):
+        generate_pairs_sharded(client, "m", "system", "topic", 10, shard_size=5, limiter=None, retry=NO_WAIT)
+    assert client.calls == 2 * NO_WAIT.max_attempts
@@ -0,0 +1,81 @@
+import pytest
+
+from groq_prompt_engineer import dedup
+from groq_prompt_engineer.dedup import NearDuplicateIndex, get_topic_index, shingles
+
+BASE = {
+    "human": "How do I reverse a linked list in Python without using extra memory for a second list?",
+    "ai": "Walk the list once and point each node back at the previous one, keeping three references as you go.",
+}
+
+
+def reworded(pair, human_suffix="", ai_suffix=""):
+    return {"human": pair["human"] + human_suffix, "ai": pair["ai"] + ai_suffix}
+
+
+def test_shingles_of_short_text_is_the_whole_text():
+    assert shingles("Hello, World") == ["hello world"]
+    assert shingles("a b c d") == ["a b c", "b c d"]
+
+
+def test_exact_and_close_repeats_are_rejected():
+    index = NearDuplicateIndex()
+    assert index.add(BASE)
+    assert not index.add(dict(BASE))
+    assert not index.add(reworded(BASE, ai_suffix=" Done."))
+    assert len(index) == 1
+
+
+def test_unrelated_pair_is_kept():
+    index = NearDuplicateIndex()
+    index.add(BASE)
+    other = {"human": "What is the capital of Australia and why was it chosen?",
+             "ai": "Canberra, a compromise between Sydney and Melbourne, purpose-built as the capital."}
+    assert index.similarity(other) < 0.2
+    assert index.add(other)
+
+
+def test_threshold_decides_borderline_pairs():
+    longer = reworded(BASE, ai_suffix=" Then return the new head of the reversed list to the caller.")
+    assert NearDuplicateIndex().similarity(longer) == 0.0  # Empty index
+    index = NearDuplicateIndex()
+    index.add(BASE)
+    similarity = index.similarity(longer)
+    assert 0.5 < similarity < 0.8
+    strict = NearDuplicateIndex(threshold=similarity - 0.05)
+    lenient = NearDuplicateIndex(threshold=similarity + 0.05)
+    for index in (strict, lenient):
+        index.add(BASE)
+    assert not strict.add(longer)
+    assert lenient.add(longer)
+
+
+def test_lookups_still_work_after_pending_keys_are_merged(monkeypatch):
+    monkeypatch.setattr(dedup, "MERGE_EVERY", 4)
+    index = NearDuplicateIndex()
+    pairs = [{"human": f"Question number {i} about topic {i * 7} in detail", "ai": f"Answer {i} covers point {i * 13}"}
+             for i in range(10)]
+    for pair in pairs:
+        index.add(pair)
+    assert len(index._sorted_keys) > 0
+    assert all(not index.add(pair) for pair in pairs)
+
+
+def test_covered_lists_most_repeated_first():
+    index = NearDuplicateIndex()
+    index.add(BASE)
+    index.add({"human": "Something else entirely about gardening tomatoes", "ai": "Water them in the morning."})
+    index.add(dict(BASE))
+    assert index.covered(1) == [BASE["human"]]
+    assert len(index.covered(10)) == 2
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=64, bands=10)
+
+
+def test_topic_indexes_are_shared_per_key_and_normalized_topic():
+    index = get_topic_index("  Linked   Lists ", "key-a")
+    assert get_topic_index("linked lists", "key-a") is index
+    assert get_topic_index("linked lists", "key-b") is not index
@@ -0,0 +1,58 @@
+import os
+import random
+
+import pytest
+
+from benchmarks.bench_evaluation import loop_scores
+from benchmarks.stub import StubGroqClient
+from groq_prompt_engineer.cache import ResponseCache
+from groq_prompt_engineer.evaluation import SCORES, evaluate_prompts, score_outputs
+from groq_prompt_engineer.rate_limit import RateLimiter
+
+MODEL = "llama-3.1-8b-instant"
+UNLIMITED = RateLimiter({MODEL: {"requests_per_minute": 10 ** 6, "tokens_per_minute": 10 ** 9}})
+
+
+def assert_matches_loop(outputs, references):
+    scores = score_outputs(outputs, references)
+    for row, (output, reference) in enumerate(zip(outputs, references)):
+        expected = loop_scores(output, reference)
+        for name in SCORES:
+            assert scores[name][row] == pytest.approx(expected[name]), (name, output, reference)
+
+
+def test_scores_match_the_per_pair_loop_on_random_text():
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(30)]
+    references = [" ".join(rng.choices(words, k=rng.randint(0, 12))) for _ in range(200)]
+    outputs = [" ".join(rng.choices(words, k=rng.randint(0, 12))) for _ in range(200)]
+    # Repeated texts take the distinct-text shortcut
+    assert_matches_loop(outputs + outputs[:20], references + references[:20])
+
+
+def test_scores_match_the_loop_on_edge_cases():
+    outputs = ["The answer is 42.", "the ANSWER, is 42", "", "", "42 42 42", "answer is"]
+    references = ["the answer is 42", "The answer is 42.", "", "something", "42", "the answer is 42"]
+    assert_matches_loop(outputs, references)
+    scores = score_outputs(outputs, references)
+    assert scores["exact_match"].tolist() == [1.0, 1.0, 0.0, 0.0, 0.0, 0.0]
+
+
+def test_length_mismatch_is_rejected():
+    with pytest.raises(ValueError):
+        score_outputs(["a"], [])
+
+
+def test_evaluation_ranks_prompts_and_reuses_cached_answers(tmp_path):
+    client = StubGroqClient(ttft=0, tokens_per_s=1e9, responder=lambda question: f"Answer: {question}")
+    cases = [{"human": f"Question {i}?", "ai": f"Answer: Question {i}?"} for i in range(4)]
+    cache = ResponseCache(os.path.join(tmp_path, "eval.sqlite3"))
+    prompts = ["Repeat the question.", "Also repeat it."]
+
+    first = evaluate_prompts(client, prompts, cases, model=MODEL, limiter=UNLIMITED, cache=cache)
+    assert (first["requests"], first["cached"]) == (8, 0)
+    assert [summary["exact_match"] for summary in first["prompts"]] == [1.0, 1.0]
+
+    second = evaluate_prompts(client, prompts + ["New prompt."], cases, model=MODEL, limiter=UNLIMITED, cache=cache)
+    assert (second["requests"], second["cached"]) == (4, 8)
+    assert client.calls == 12
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from groq_prompt_engineer.extract_cache import ExtractionCache, content_hash
+
+
+def test_extracted_pieces_round_trip(tmp_path):
+    cache = ExtractionCache(directory=str(tmp_path))
+    key = cache.key(b"%PDF file", "pdf", 1)
+    assert key != cache.key(b"%PDF file", "pdf", 2)
+    assert cache.get(key) is None
+    pieces = ["page one", "", "página dos ✓"]
+    assert list(cache.store(key, iter(pieces))) == pieces
+    assert list(cache.get(key)) == pieces
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_content_hash_is_the_same_for_bytes_paths_and_files(tmp_path):
+    path = os.path.join(tmp_path, "upload.txt")
+    with open(path, "wb") as f:
+        f.write(b"some text")
+    with open(path, "rb") as f:
+        f.read(4)
+        assert content_hash(f) == content_hash(path) == content_hash(b"some text")
+        assert f.tell() == 4
+
+
+def test_interrupted_extraction_is_not_cached(tmp_path):
+    cache = ExtractionCache(directory=str(tmp_path))
+
+    def failing():
+        yield "page one"
+        raise RuntimeError("corrupt page")
+
+    with pytest.raises(RuntimeError):
+        list(cache.store("key", failing()))
+    assert cache.get("key") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_extraction_cache_evicts_least_recently_used(tmp_path):
+    cache = ExtractionCache(directory=str(tmp_path), max_bytes=40)
+    list(cache.store("old", ["x" * 10]))
+    list(cache.store("new", ["y" * 10]))
+    os.utime(os.path.join(tmp_path, "old.idx"), (0, 0))
+    list(cache.store("newest", ["z" * 10]))
+    assert cache.get("old") is None
+    assert list(cache.get("new")) == ["y" * 10]
+    assert list(cache.get("newest")) == ["z" * 10]
@@ -0,0 +1,76 @@
+import itertools
+import os
+import sqlite3
+
+import pytest
+
+from groq_prompt_engineer import history
+from groq_prompt_engineer.history import DATASET, PROMPT, HistoryStore, fts_query
+from groq_prompt_engineer.storage import key_hash
+
+MODEL = "llama-3.1-8b-instant"
+
+
+@pytest.fixture
+def store(tmp_path):
+    ticks = itertools.count()
+    return HistoryStore(path=os.path.join(tmp_path, "history.sqlite3"), clock=lambda: float(next(ticks)))
+
+
+def test_entries_are_kept_per_api_key(store):
+    store.record(PROMPT, "summarise articles", "You summarise news articles.", MODEL, params={"temperature": 0.2},
+                 api_key="alice")
+    store.record(DATASET, "python recursion", '{"human": "q", "ai": "a"}', MODEL, api_key="alice")
+    store.record(PROMPT, "translate text", "You translate text.", MODEL, api_key="bob")
+
+    alice = key_hash("alice")
+    assert store.count(api_key_hash=alice) == 2
+    assert store.count(kind=PROMPT, api_key_hash=alice) == 1
+    assert [entry["input"] for entry in store.recent(api_key_hash=alice)] == ["python recursion", "summarise articles"]
+    assert store.recent(kind=PROMPT, api_key_hash=alice)[0]["params"] == {"temperature": 0.2}
+    assert "alice" not in {entry["key_hash"] for entry in store.recent()}
+
+
+def test_history_is_append_only(store):
+    entry_id = store.record(PROMPT, "task", "output", MODEL)
+    conn = store._connect()
+    with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+        conn.execute("UPDATE generations SET output = 'changed' WHERE id = ?", (entry_id,))
+    with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+        conn.execute("DELETE FROM generations WHERE id = ?", (entry_id,))
+    assert store.get(entry_id)["output"] == "output"
+
+
+def test_fts_query_quotes_user_input():
+    assert fts_query('say "hi" OR NOT') == '"say" "hi" "OR" "NOT"*'
+    assert fts_query(" -- ") is None
+
+
+@pytest.mark.parametrize("fts", [True, False])
+def test_search_matches_every_word_and_prefixes_the_last(store, fts):
+    if fts and not store.fts:
+        pytest.skip("SQLite here has no FTS5")
+    store.fts = fts
+    store.record(PROMPT, "sql tutor", "You explain database indexes to beginners.", MODEL, api_key="alice")
+    store.record(PROMPT, "sql tutor", "You explain joins to beginners.", MODEL, api_key="alice")
+    store.record(PROMPT, "sql tutor", "You explain database indexes.", MODEL, api_key="bob")
+
+    found = store.search("database ind", api_key_hash=key_hash("alice"))
+    assert [entry["output"] for entry in found] == ["You explain database indexes to beginners."]
+    assert "database" in found[0]["snippet"]
+    assert store.search('zebra" NOT', api_key_hash=key_hash("alice")) == []
+
+
+def test_search_ranks_only_the_newest_matches(store, monkeypatch):
+    if not store.fts:
+        pytest.skip("SQLite here has no FTS5")
+    monkeypatch.setattr(history, "MAX_RANKED", 3)
+    best = store.record(PROMPT, "common", "common common common common", MODEL)
+    for i in range(5):
+        store.record(PROMPT, "common", f"common word number {i} in a longer output", MODEL)
+
+    found = store.search("common")
+    assert len(found) == 3
+    assert best not in {entry["id"] for entry in found}
+    monkeypatch.setattr(history, "MAX_RANKED", 10)
+    assert store.search("common")[0]["id"] == best
@@ -0,0 +1,34 @@
+import io
+import time
+
+from groq_prompt_engineer.ingest import IngestStats, chunk_text, iter_document_chunks
+from groq_prompt_engineer.metrics import metrics
+from groq_prompt_engineer.rate_limit import estimate_tokens
+
+MODEL = "llama-3.1-8b-instant"
+
+
+def test_chunks_fit_the_budget_and_keep_all_text():
+    pieces = ["a short line\n", "word " * 2000, "\n\nlast paragraph"]
+    chunks = list(chunk_text(iter(pieces), max_tokens=300))
+    assert "".join(chunks) == "".join(pieces)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(len(chunk)) <= 300 for chunk in chunks)
+
+
+def test_text_documents_stream_in_chunks():
+    text = "".join(f"line {i}\n" for i in range(50_000))
+    stats = IngestStats()
+    chunks = list(iter_document_chunks(io.BytesIO(text.encode()), "text/plain", MODEL, 1024, stats))
+    assert "".join(chunks) == text
+    assert stats.summary()["chunks"]["items"] == len(chunks)
+
+
+def test_only_chunk_production_is_timed():
+    metrics.reset()
+    chunks = iter_document_chunks(io.BytesIO(b"line\n" * 1000), "text/plain", MODEL)
+    for _ in chunks:
+        time.sleep(0.05)  # A slow consumer must not count towards ingestion time
+    (row,) = [row for row in metrics.snapshot() if row["labels"] == "operation=ingest_document"]
+    assert row["count"] == 1
+    assert row["p50"] < 0.05
@@ -0,0 +1,96 @@
+import json
+import uuid
+
+import pytest
+
+from benchmarks.stub import StubGroqClient
+from groq_prompt_engineer import jobs
+from groq_prompt_engineer.generation import DEFAULT_MODEL
+from groq_prompt_engineer.jobs import CANCELLED, DONE, RUNNING, JobCancelled, JobQueue, JobStore, iter_results
+from groq_prompt_engineer.rate_limit import RateLimiter
+
+UNLIMITED = RateLimiter({DEFAULT_MODEL: {"requests_per_minute": 10 ** 6, "tokens_per_minute": 10 ** 9}})
+
+
+def _words():
+    # Random words, so no two pairs are near-duplicates of each other
+    return " ".join(uuid.uuid4().hex[i:i + 6] for i in range(0, 30, 6))
+
+
+def unique_pairs(prompt):
+    count = int(prompt.split("Number of pairs: ")[1].split()[0])
+    return json.dumps([{"human": _words(), "ai": _words()} for _ in range(count)])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"), str(tmp_path / "results"))
+
+
+def make_queue(store, responder=unique_pairs):
+    client = StubGroqClient(ttft=0, tokens_per_s=1e9, chunk_chars=64, responder=responder)
+    return JobQueue(store, make_client=lambda api_key: client, limiter=UNLIMITED), client
+
+
+def claim(store, num_pairs):
+    job_id = store.submit("dataset", {"topic": f"topic {uuid.uuid4().hex}", "num_pairs": num_pairs}, "hash", num_pairs)
+    job = store.claim("owner", ["hash"])
+    assert job["id"] == job_id and job["status"] == RUNNING
+    return job
+
+
+def lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_run_job_writes_every_pair_and_finishes(store):
+    queue, _ = make_queue(store)
+    job = claim(store, 12)
+    queue.run_job(job, "key")
+    saved = store.get(job["id"])
+    assert saved["status"] == DONE
+    assert saved["progress"] == len(lines(job["result_path"])) == 12
+
+
+def test_cancel_mid_job_stops_writes_and_keeps_progress_in_step(store, monkeypatch):
+    monkeypatch.setattr(jobs, "BATCH_PAIRS", 10)
+    job = claim(store, 30)
+
+    def cancel_on_second_batch(prompt):
+        if client.calls == 2:
+            store.cancel(job["id"])
+        return unique_pairs(prompt)
+
+    queue, client = make_queue(store, cancel_on_second_batch)
+    with pytest.raises(JobCancelled):
+        queue.run_job(job, "key")
+    saved = store.get(job["id"])
+    assert saved["status"] == CANCELLED
+    assert saved["progress"] == len(lines(job["result_path"])) == 10
+
+
+def test_finish_does_not_overwrite_cancelled(store):
+    job = claim(store, 5)
+    store.cancel(job["id"])
+    assert not store.finish(job["id"], DONE, progress=5)
+    assert store.status(job["id"]) == CANCELLED
+
+
+def test_resume_keeps_pairs_on_disk_and_drops_torn_line(store):
+    queue, _ = make_queue(store)
+    job = claim(store, 12)
+    kept = [{"human": _words(), "ai": _words()} for _ in range(5)]
+    with open(job["result_path"], "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(pair) + "\n" for pair in kept) + '{"human": "torn')
+    queue.run_job(job, "key")
+    results = list(iter_results(job["result_path"]))
+    assert results[:5] == kept
+    assert len(results) == store.get(job["id"])["progress"] == 12
+
+
+def test_requeue_stale_puts_dead_jobs_back(store):
+    job = claim(store, 5)
+    store.update(job["id"], heartbeat=store.clock() - jobs.STALE_AFTER - 1)
+    assert store.requeue_stale() == 1
+    assert store.claim("other", ["hash"])["id"] == job["id"]
@@ -0,0 +1,74 @@
+import pytest
+
+from groq_prompt_engineer.rate_limit import RateLimiter
+
+
+class FakeClock:
+    """Clock that only moves when the limiter sleeps (or a test advances it)."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(requests_per_minute=60, tokens_per_minute=6000):
+    clock = FakeClock()
+    limits = {"m": {"requests_per_minute": requests_per_minute, "tokens_per_minute": tokens_per_minute}}
+    return RateLimiter(limits, clock=clock, sleep=clock.sleep), clock
+
+
+def test_rpm_admits_burst_then_waits_for_refill():
+    limiter, clock = make_limiter(requests_per_minute=2)
+    assert limiter.acquire("m") == 0
+    assert limiter.acquire("m") == 0
+    # One request refills every 30s at 2 RPM
+    assert limiter.acquire("m") == pytest.approx(30.0)
+    assert clock.now == pytest.approx(1030.0)
+    assert limiter.stats("m")["admitted"] == 3
+
+
+def test_tpm_waits_for_token_budget():
+    limiter, clock = make_limiter(tokens_per_minute=600)
+    assert limiter.acquire("m", 600) == 0
+    assert not limiter.try_acquire("m", 100)
+    # 100 tokens refill in 10s at 600 TPM
+    assert limiter.acquire("m", 100) == pytest.approx(10.0)
+
+
+def test_record_usage_delays_next_caller():
+    limiter, clock = make_limiter(tokens_per_minute=600)
+    limiter.acquire("m", 100)
+    limiter.record_usage("m", 560)
+    # 60 tokens overspent plus 60 requested: 12s at 10 tokens/s
+    assert limiter.acquire("m", 60) == pytest.approx(12.0)
+
+
+def test_update_from_headers_drains_tokens_and_pauses_until_reset():
+    limiter, clock = make_limiter()
+    limiter.update_from_headers("m", {"x-ratelimit-remaining-tokens": "50", "x-ratelimit-remaining-requests": "10"})
+    assert limiter.stats("m")["tokens_available"] == 50
+    assert limiter.stats("m")["paused_s"] == 0
+
+    limiter.update_from_headers("m", {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2.5s"})
+    assert not limiter.try_acquire("m")
+    clock.now += 2.5
+    assert limiter.try_acquire("m")
+
+
+def test_retry_after_pauses_every_caller():
+    limiter, clock = make_limiter()
+    limiter.update_from_headers("m", {"retry-after": "7"})
+    assert limiter.acquire("m") == pytest.approx(7.0)
+
+
+def test_ignores_empty_headers():
+    limiter, clock = make_limiter()
+    limiter.update_from_headers("m", {})
+    assert limiter.acquire("m") == 0
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from groq_prompt_engineer.singleflight import SingleFlight
+
+
+def gated_stream(gate, deltas, calls, ungated=0):
+    """A start function whose stream yields ``ungated`` deltas at once and the rest once ``gate`` is set."""
+    def start(stats):
+        calls.append(1)
+        stats["total_s"] = 0.1
+
+        def generate():
+            for index, delta in enumerate(deltas):
+                if index >= ungated:
+                    gate.wait()
+                yield delta
+
+        return generate()
+
+    return start
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_identical_requests_share_one_call():
+    flight = SingleFlight()
+    gate = threading.Event()
+    calls = []
+    start = gated_stream(gate, ["a", "b", "c"], calls)
+    results, stats = [None] * 3, [{} for _ in range(3)]
+
+    def consume(i):
+        results[i] = "".join(flight.stream("key", start, stats[i]))
+
+    threads = [threading.Thread(target=consume, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: flight.stats()["requests"] == 3)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["abc"] * 3
+    assert len(calls) == 1
+    assert flight.stats()["dedup_rate"] == pytest.approx(2 / 3, abs=0.001)
+    assert all(s["total_s"] == 0.1 for s in stats)
+    assert sum(bool(s.get("coalesced")) for s in stats) == 2
+
+
+def test_late_follower_replays_from_the_start():
+    flight = SingleFlight()
+    gate = threading.Event()
+    calls = []
+    leader = flight.stream("key", gated_stream(gate, ["a", "b", "c"], calls, ungated=1), {})
+    assert next(leader) == "a"
+    stats = {}
+    follower = flight.stream("key", gated_stream(gate, ["x"], calls), stats)
+    assert next(follower) == "a"
+    gate.set()
+    assert "".join(follower) == "bc"
+    assert "".join(leader) == "bc"
+    assert len(calls) == 1
+    assert stats["coalesced"] is True
+
+
+def test_finished_flight_is_not_reused():
+    flight = SingleFlight()
+    gate = threading.Event()
+    gate.set()
+    calls = []
+    assert "".join(flight.stream("key", gated_stream(gate, ["a"], calls))) == "a"
+    assert "".join(flight.stream("key", gated_stream(gate, ["b"], calls))) == "b"
+    assert len(calls) == 2
+
+
+def test_abandoned_flight_is_dropped():
+    flight = SingleFlight()
+    gate = threading.Event()
+    leader = flight.stream("key", gated_stream(gate, ["a", "b"], [], ungated=1))
+    assert next(leader) == "a"
+    leader.close()
+    assert flight.stats()["in_flight"] == 0
+    gate.set()
+
+
+def test_error_is_raised_in_every_caller():
+    flight = SingleFlight()
+
+    def start(stats):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        "".join(flight.stream("key", start))
+    assert flight.stats()["in_flight"] == 0
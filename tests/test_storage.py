@@ -0,0 +1,34 @@
+import threading
+
+from groq_prompt_engineer.storage import key_hash, lazy_singleton
+
+
+def test_key_hash_never_contains_the_key():
+    assert key_hash("gsk_secret") == key_hash("gsk_secret") != key_hash("gsk_other")
+    assert "secret" not in key_hash("gsk_secret")
+
+
+def test_lazy_singleton_builds_once_across_threads():
+    built = []
+    barrier = threading.Barrier(8)
+
+    @lazy_singleton
+    def get_store():
+        """The store."""
+        built.append(object())
+        return built[-1]
+
+    results = []
+
+    def call():
+        barrier.wait()
+        results.append(get_store())
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert all(result is built[0] for result in results)
+    assert get_store.__doc__ == "The store."
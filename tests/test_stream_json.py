@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from groq_prompt_engineer.dataset import iter_pairs, parse_pairs
+from groq_prompt_engineer.stream_json import PairStreamParser
+
+PAIRS = [
+    {"human": "Plain question?", "ai": "Plain answer."},
+    {"human": 'Braces {inside} "quotes"', "ai": "Backslash \\ and } and { here"},
+    {"human": "Escaped quote at the end\\\"", "ai": "Unicode é and newline\nok"},
+]
+TEXT = "```json\n" + json.dumps(PAIRS, indent=2) + "\n```"
+
+
+def feed_all(parser, pieces):
+    pairs = []
+    for piece in pieces:
+        pairs.extend(parser.feed(piece))
+    parser.close()
+    return pairs
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(TEXT)])
+def test_any_chunk_boundaries_give_the_same_pairs(size):
+    parser = PairStreamParser()
+    pairs = feed_all(parser, [TEXT[i:i + size] for i in range(0, len(TEXT), size)])
+    assert pairs == PAIRS
+    assert (parser.parsed, parser.skipped) == (3, 0)
+
+
+def test_escape_split_across_deltas():
+    text = '[{"human": "a \\\\", "ai": "b \\" }"}]'
+    for cut in range(len(text)):
+        assert feed_all(PairStreamParser(), [text[:cut], text[cut:]]) == [{"human": "a \\", "ai": 'b " }'}]
+
+
+def test_pairs_are_emitted_as_soon_as_each_object_closes():
+    parser = PairStreamParser()
+    assert parser.feed('[{"human": "q1", "ai": "a1"}, {"human": "q2"') == [{"human": "q1", "ai": "a1"}]
+    assert parser.feed(', "ai": "a2"}]') == [{"human": "q2", "ai": "a2"}]
+
+
+def test_invalid_and_malformed_objects_are_skipped():
+    text = '[{"human": "q1", "ai" "a1"}, {"human": "", "ai": "a"}, {"human": "q3", "ai": "a3"}, {"human": "cut'
+    parser = PairStreamParser()
+    assert feed_all(parser, [text]) == [{"human": "q3", "ai": "a3"}]
+    assert (parser.parsed, parser.skipped) == (1, 3)
+
+
+def test_runaway_object_is_dropped_and_parser_resyncs():
+    parser = PairStreamParser(max_object_chars=32)
+    pairs = feed_all(parser, ['{"human": "' + "x" * 40, '"}', '{"human": "q", "ai": "a"}'])
+    assert pairs == [{"human": "q", "ai": "a"}]
+    assert parser.skipped == 1
+
+
+def test_iter_pairs_reports_stats_and_parse_pairs_requires_one_pair():
+    stats = {}
+    assert list(iter_pairs(iter(TEXT), stats)) == PAIRS
+    assert stats == {"pairs_parsed": 3, "pairs_skipped": 0}
+    with pytest.raises(ValueError):
+        parse_pairs("no json here")
@@ -1,3 +1,6 @@
+import time
+_script_started = time.perf_counter()  # Startup instrumentation (see groq_prompt_engineer/timing.py)
+
 import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
@@ -10,30 +13,43 @@ logging.getLogger('absl').setLevel(logging.ERROR)
 import streamlit as st
 import io
 from dotenv import load_dotenv
-from langsmith import traceable
-import pandas as pd
 import json
 import base64
-from streamlit_extras.colored_header import colored_header
-from streamlit_extras.app_logo import add_logo
-from annotated_text import annotated_text, annotation
+import functools
+import gzip
 from streamlit_option_menu import option_menu
-from streamlit_lottie import st_lottie
-import requests
 import re
-import time
 import shutil
-from groq import Groq
-
-# Import PyPDF2
-import PyPDF2
+from groq_prompt_engineer import generation as core
+from groq_prompt_engineer.cache import get_default_cache
+from groq_prompt_engineer.client import get_client, timings
+from groq_prompt_engineer.dataset import DEFAULT_MAX_WORKERS, DEFAULT_SHARD_SIZE, parse_pairs
+from groq_prompt_engineer.fanout import COMPARE, RACE, fan_out_prompt
+from groq_prompt_engineer.generation import DEFAULT_SYSTEM_PROMPT
+from groq_prompt_engineer.history import DATASET, PROMPT, get_default_history
+from groq_prompt_engineer.jobs import DONE, LARGE_DATASET_PAIRS, MAX_DATASET_PAIRS, QUEUED, RUNNING, get_default_job_queue
+from groq_prompt_engineer.storage import key_hash
+from groq_prompt_engineer.metrics import metrics, start_metrics_server
+from groq_prompt_engineer.rate_limit import RATE_LIMITS, limiter
+from groq_prompt_engineer.retry import IncompleteResponseError
+from groq_prompt_engineer.singleflight import single_flight
+from groq_prompt_engineer.timing import script_timer
+from groq_prompt_engineer.tracing import traceable
 
-# Create a 'docs' folder if it doesn't exist
 DOCS_FOLDER = "docs"
-os.makedirs(DOCS_FOLDER, exist_ok=True)
 
-# Load environment variables
-load_dotenv()
+# One-time setup per process; later reruns get the cached result and skip it
+@st.cache_resource(show_spinner=False)
+def init_process():
+    # Create a 'docs' folder if it doesn't exist
+    os.makedirs(DOCS_FOLDER, exist_ok=True)
+    # Load environment variables (before any @traceable function is defined)
+    load_dotenv()
+    os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
+    # Prometheus-style /metrics endpoint when GROQ_TOOLKIT_METRICS_PORT is set
+    start_metrics_server()
+
+init_process()
 
 # Groq API setup
 groq_api_key = os.getenv("GROQ_API_KEY")
@@ -47,57 +63,25 @@ st.markdown("<h3 style='text-align: center;'><span style='color: #E84C33;'>Groq+
 
 # Colors #FA4533 #FA332F #FA2D37 #6590F7
 
-# Lottie Animation JSON.  Perfectly centered
-url = requests.get("https://lottie.host/9dc7375c-8c39-440b-a29f-e118a08c78f1/TCHsASemR7.json")
-url_json = dict()
+# Add logo (st.logo replaces streamlit_extras' deprecated add_logo); st.logo rejects a missing image
+if os.path.exists("media/images/app-logo.png"):
+    st.logo("media/images/app-logo.png")
 
-if url.status_code == 200:
-    url_json = url.json()
-else:
-    print("Error in URL")
-
-# Create three columns, with the middle one containing the animation
-col1, col2, col3 = st.columns([1, 2, 1])
-
-with col2:
-    st_lottie(url_json,
-        reverse=True,
-        height=400,
-        width=400,
-        speed=1.5,
-        loop=True,
-        quality='high',
-        key='Mobius',
-    )
-
-# Add logo
-add_logo("media/images/app-logo.png")
-
-tracing_enabled = os.getenv("LANGCHAIN_TRACING_V2")  # Default to False if not set
-os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
-api_key = os.getenv("LANGCHAIN_API_KEY")
+# Ensure all session state variables are initialized
+def initialize_session_state():
+    default_values = {
+        "temperature": 0.5,
+        "max_output_tokens": 8192,
+        "model": "llama3-70b-8192",
+        "api_configured": False,
+        "generated_prompts": [],
+        "analyzed_files": []
+    }
+    for key, value in default_values.items():
+        if key not in st.session_state:
+            st.session_state[key] = value
 
-# Function to load Lottie animations
-@st.cache_data
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-
-# Load Lottie animations
-lottie_ai = load_lottieurl("https://assets5.lottiefiles.com/packages/lf20_zrqthn6o.json")
-# lottie_analysis = load_lottieurl("https://assets5.lottiefiles.com/private_files/lf30_wqypnpu5.json")
-
-# Initialize session state variables
-if 'temperature' not in st.session_state:
-    st.session_state.temperature = 0.5
-if 'max_output_tokens' not in st.session_state:
-    st.session_state.max_output_tokens = 8192
-if 'model' not in st.session_state:
-    st.session_state.model = "llama3-70b-8192"
-if 'api_configured' not in st.session_state:
-    st.session_state.api_configured = False
+initialize_session_state()
 
 # Sidebar for API key and model settings
 st.sidebar.title("Settings")
@@ -119,7 +103,7 @@ if not groq_api_key:
         st.stop()
 
 # --- System Prompt Input ---
-default_system_prompt = "You are a helpful and informative AI assistant."
+default_system_prompt = DEFAULT_SYSTEM_PROMPT
 if "system_prompt" not in st.session_state:
     st.session_state.system_prompt = default_system_prompt
 
@@ -130,198 +114,335 @@ if not default_system_prompt:
 else:
     st.sidebar.text_area("Current System Prompt (set in backend)", value=st.session_state.system_prompt, disabled=True)
 
-# Groq rate limits
-RATE_LIMITS = {
-    'llama3-70b-8192': {'requests_per_minute': 30, 'tokens_per_minute': 6000},
-    'llama3-8b-8192': {'requests_per_minute': 30, 'tokens_per_minute': 30000},
-    'llama3-groq-70b-8192-tool-use-preview': {'requests_per_minute': 30, 'tokens_per_minute': 15000},
-    'llama3-groq-8b-8192-tool-use-preview': {'requests_per_minute': 30, 'tokens_per_minute': 15000},
-    'llama-3.1-8b-instant': {'requests_per_minute': 30, 'tokens_per_minute': 131072},
-    'llama-3.1-70b-versatile': {'requests_per_minute': 30, 'tokens_per_minute': 131072},
-}
-
-# Rate limiting function
-def rate_limit(model):
-    limit = RATE_LIMITS[model]['requests_per_minute']
-    time.sleep(60 / limit)
-
 # Temperature slider
 st.session_state.temperature = st.sidebar.slider("Temperature", min_value=0.0, max_value=1.5, value=st.session_state.temperature, step=0.1, key="temperature_slider")
 
 # Max output tokens slider
 st.session_state.max_output_tokens = st.sidebar.slider("Max Output Tokens", min_value=1024, max_value=8192, value=st.session_state.max_output_tokens, step=1024, key="max_output_tokens_slider")
 
+# Response cache settings
+st.session_state.use_cache = st.sidebar.checkbox("Reuse cached prompts for identical requests", value=st.session_state.get("use_cache", True), key="use_cache_checkbox")
+st.session_state.bypass_cache_sampled = st.sidebar.checkbox("Always regenerate when temperature > 0", value=st.session_state.get("bypass_cache_sampled", False), key="bypass_cache_sampled_checkbox", disabled=not st.session_state.use_cache)
+
 # Function to generate a download link
 def get_download_link(content, filename, text):
     b64 = base64.b64encode(content.encode()).decode()
     return f'<a href="data:file/txt;base64,{b64}" download="{filename}">{text}</a>'
 
-# Function to process uploaded file
-def process_uploaded_file(uploaded_file, file_type):
-    if file_type == "text/csv":
-        df = pd.read_csv(uploaded_file)
-        return df.to_string()
-    elif file_type == "application/pdf":
-        # PDF handling using PyPDF2
-        pdf_reader = PyPDF2.PdfReader(uploaded_file)
-        num_pages = len(pdf_reader.pages)
-        content = ""
-        for page_num in range(num_pages):
-            page = pdf_reader.pages[page_num]
-            content += page.extract_text()
-        return content
-    elif file_type.startswith('text/'):  # Handle other text files
-        content = uploaded_file.getvalue().decode("utf-8")
-        return content
-    else:  # Handle binary files
-        content = uploaded_file.read()  # Read as bytes
-        return content
-
 # Groq API setup
 def setup_groq_api():
     if groq_api_key:
         return True
     return False
 
-# New function to get system prompt
-def get_system_prompt(task, variables, model, temperature, max_output_tokens):
-    return f"""You are an advanced AI prompt engineer assistant integrated into a Streamlit app. Your task is to generate a highly effective Chain of Thought (COT) prompt based on the user's input. Follow these steps:
-
-1. Analyze the task:
-   - Identify the main objective of the user's task
-   - Determine the complexity and scope of the task
-   - Consider any specific domain knowledge required
-
-2. Evaluate the variables:
-   - Examine the provided variables (if any)
-   - Determine how these variables should be incorporated into the prompt
-   - Consider additional relevant variables that might enhance the prompt
-
-3. Consider the Groq model capabilities:
-   - Adapt the prompt to leverage the strengths of the selected Groq model ({model})
-   - Take into account the current temperature setting ({temperature}) and max token limit ({max_output_tokens})
-
-4. Incorporate COT elements:
-   - Break down the task into logical steps or components
-   - Include prompts for explanations or reasoning at each step
-   - Encourage the model to show its work or thought process
-
-5. Optimize for clarity and specificity:
-   - Use clear, concise language
-   - Avoid ambiguity in instructions
-   - Include specific examples or constraints where appropriate
-
-6. Add context and formatting instructions:
-   - Provide any necessary background information
-   - Specify desired output format (e.g., bullet points, paragraphs, JSON)
-   - Include any relevant data or file analysis instructions if applicable
-
-7. Encourage creativity and problem-solving:
-   - Include prompts for alternative approaches or solutions
-   - Ask for pros and cons of different methods if relevant
-
-8. Incorporate error handling and edge cases:
-   - Prompt the model to consider potential issues or limitations
-   - Ask for validation steps or error checking where appropriate
-
-9. Format the final prompt:
-   - Present the COT prompt in a clear, structured manner
-   - Use appropriate line breaks, numbering, or bullet points for readability
-
-Generate a COT prompt that follows these steps and is optimized for the given task, variables, and selected Groq model. Ensure the prompt is detailed enough to guide the AI but concise enough to fit within token limits.
-
-Task: {task}
-Variables: {variables}
-Selected Model: {model}
-Temperature: {temperature}
-Max Tokens: {max_output_tokens}
-
-Based on the above information, generate an optimal Chain of Thought prompt:
-"""
-
 @traceable # Langsmith Tracing and Observability
 # Function to generate prompt
+@metrics.timer("operation_seconds", operation="generate_prompt")
 def generate_prompt(task, variables=""):
-    client = Groq(api_key=groq_api_key)
-    system_prompt = get_system_prompt(
-        task, 
-        variables, 
-        st.session_state.model, 
-        st.session_state.temperature, 
-        st.session_state.max_output_tokens
-    )
-    
+    client = get_client(groq_api_key)
+    stats = {}
+    placeholder = st.empty()
     try:
-        chat_completion = client.chat.completions.create(  # Use chat.completions.create
-            model=st.session_state.model,
-            messages=[
-                {"role": "system", "content": st.session_state.system_prompt},
-                {"role": "user", "content": system_prompt}
-            ],
-            stream=True,
-        )
+        # Render deltas as they arrive instead of waiting for the whole stream
+        with placeholder.container():
+            generated_prompt = st.write_stream(core.iter_prompt(
+                client,
+                task,
+                variables,
+                model=st.session_state.model,
+                temperature=st.session_state.temperature,
+                max_output_tokens=st.session_state.max_output_tokens,
+                system_prompt=st.session_state.system_prompt,
+                limiter=limiter,
+                cache=get_default_cache() if st.session_state.use_cache else None,
+                bypass_sampled=st.session_state.bypass_cache_sampled,
+                stats=stats,
+                single_flight=single_flight,  # Identical requests from other sessions share one stream
+                history=get_default_history(),  # Searchable on the History page
+            ))
+    except IncompleteResponseError as e:
+        # Keep what was generated before the stream broke instead of discarding it
+        placeholder.empty()
+        st.warning(f"The response was cut off ({e.cause}). Showing the {len(e.partial):,} characters received.")
+        return e.partial.strip() or None
+    except Exception as e:
+        placeholder.empty()
+        st.error(f"An error occurred: {str(e)}")
+        return None
+    placeholder.empty()  # The caller renders the final, annotated prompt
+    show_stream_stats(stats)
+    return generated_prompt.strip() if isinstance(generated_prompt, str) else None
 
-        generated_prompt = ""
-        for chunk in chat_completion:
-            if chunk.choices[0].delta.content is not None:
-                generated_prompt += chunk.choices[0].delta.content
-                # You can update the UI with each chunk here if needed
-                # For example: st.write(chunk.choices[0].delta.content, end='')
+@traceable # Langsmith Tracing and Observability
+# Function to run the same task on several models at once
+@metrics.timer("operation_seconds", operation="generate_prompt_fanout")
+def generate_prompt_fanout(task, variables, models, mode, refresh_every=0.25):
+    client = get_client(groq_api_key)
+    columns = st.columns(len(models))
+    placeholders = {model: column.empty() for model, column in zip(models, columns)}
+    partial = {model: [] for model in models}  # Deltas per model, joined only when rendered
+    state = {"shown": 0.0}
+
+    def on_delta(model, delta):
+        partial[model].append(delta)
+        now = time.perf_counter()
+        if now - state["shown"] >= refresh_every:
+            state["shown"] = now
+            for name, placeholder in placeholders.items():
+                placeholder.markdown(f"**{name}**\n\n{''.join(partial[name])}")
 
-        return generated_prompt.strip()
+    try:
+        outcome = fan_out_prompt(
+            client,
+            task,
+            models,
+            variables,
+            mode=mode,
+            temperature=st.session_state.temperature,
+            max_output_tokens=st.session_state.max_output_tokens,
+            system_prompt=st.session_state.system_prompt,
+            limiter=limiter,
+            on_delta=on_delta,
+            history=get_default_history(),
+        )
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
         return None
+    finally:
+        for placeholder in placeholders.values():
+            placeholder.empty()
+    return outcome
+
+# Function to show latency, throughput and length of each model's answer
+def show_fanout_results(outcome):
+    st.dataframe(
+        [
+            {
+                "Model": result["model"] + (" 🏆" if result["model"] == outcome["winner"] else ""),
+                "Status": result["status"],
+                "First token (s)": round(result["ttft_s"], 2) if result["ttft_s"] is not None else None,
+                "Total (s)": round(result["total_s"], 2) if result["total_s"] is not None else None,
+                "Tokens/s": round(result["tokens_per_s"], 1) if result["tokens_per_s"] else None,
+                "Output tokens": result["output_tokens"],
+                "Output chars": result["output_chars"],
+            }
+            for result in outcome["results"]
+        ]
+    )
+    for result in outcome["results"]:
+        if result["error"]:
+            st.error(f"{result['model']}: {result['error']}")
+
+# Function to show conversation pairs as they are parsed from the stream
+def make_pair_preview(placeholder, num_pairs, jsonl_lines, refresh_every=0.25, recent=3):
+    state = {"count": 0, "recent": [], "shown": 0.0}
+
+    def on_pair(pair):
+        state["count"] += 1
+        state["recent"] = (state["recent"] + [pair])[-recent:]
+        jsonl_lines.append(json.dumps(pair))  # JSONL export is built as pairs arrive
+        now = time.perf_counter()
+        if now - state["shown"] >= refresh_every or state["count"] >= num_pairs:
+            state["shown"] = now
+            with placeholder.container():
+                st.progress(min(state["count"] / num_pairs, 1.0), text=f"{state['count']} of {num_pairs} pairs received")
+                st.json(state["recent"])
+
+    return on_pair
+
+# Function to show the context budget and time-to-first-token for the last request
+def show_stream_stats(stats):
+    budget = stats.get("budget")
+    if budget and budget["trimmed"]:
+        st.warning(f"The input was trimmed to fit {budget['model']}'s {budget['context_window']:,}-token context window.")
+    elif budget and budget["clamped"]:
+        st.caption(f"Max output tokens clamped to {budget['max_output_tokens']:,} to fit {budget['model']}'s {budget['context_window']:,}-token context window")
+    if stats.get("cache_hit"):
+        st.caption("Served from the response cache")
+    elif stats.get("coalesced"):
+        st.caption("Shared the response of an identical request already in progress")
+    elif stats.get("ttft_s") is not None:
+        st.caption(f"First token after {stats['ttft_s']:.2f}s · complete after {stats['total_s']:.2f}s")
 
 @traceable # Langsmith Tracing and Observability
 # Function to generate test data
-def generate_test_data(topic, num_pairs):
-    client = Groq(api_key=groq_api_key)
-    prompt = f"""Generate {num_pairs} pairs of conversation for the topic: {topic}. 
-    Each pair should consist of a human message and an AI response. 
-    Format the output as a valid JSON array of objects, where each object has 'human' and 'ai' keys.
-    Ensure the output is strictly in this format:
-    [
-        {{"human": "Human message 1", "ai": "AI response 1"}},
-        {{"human": "Human message 2", "ai": "AI response 2"}},
-        ...
-    ]
-    Do not include any text before or after the JSON array.
-    """
-    
+@metrics.timer("operation_seconds", operation="generate_test_data")
+def generate_test_data(topic, num_pairs, sharded=False, shard_size=DEFAULT_SHARD_SIZE, max_workers=DEFAULT_MAX_WORKERS, jsonl_lines=None):
+    from groq_prompt_engineer.dedup import get_topic_index  # Imports NumPy, so only once test data is requested
+
+    client = get_client(groq_api_key)
+    stats = {}
+    jsonl_lines = [] if jsonl_lines is None else jsonl_lines
+    placeholder = st.empty()
     try:
-        chat_completion = client.chat.completions.create(  # Use chat.completions.create
+        # Sharded mode splits the request into concurrent shards under the shared rate limiter
+        test_data = core.generate_test_data(
+            client,
+            topic,
+            num_pairs,
             model=st.session_state.model,
-            messages=[
-                {"role": "system", "content": st.session_state.system_prompt},
-                {"role": "user", "content": prompt}
-            ],
-            stream=True,
+            temperature=st.session_state.temperature,
+            max_output_tokens=st.session_state.max_output_tokens,
+            system_prompt=st.session_state.system_prompt,
+            sharded=sharded,
+            shard_size=shard_size,
+            max_workers=max_workers,
+            limiter=limiter,
+            on_pair=make_pair_preview(placeholder, num_pairs, jsonl_lines),
+            stats=stats,
+            dedupe_index=get_topic_index(topic, groq_api_key),  # Repeated runs on a topic skip pairs generated before
+            history=get_default_history(),
         )
+    except Exception as e:
+        st.error(f"An error occurred while generating test data: {str(e)}")
+        return None
+    finally:
+        placeholder.empty()
+    show_stream_stats(stats)
+    if stats.get("pairs_skipped"):
+        st.info(f"Skipped {stats['pairs_skipped']} malformed pair(s) in the response.")
+    if stats.get("pairs_near_duplicate"):
+        st.info(f"Dropped {stats['pairs_near_duplicate']} pair(s) too similar to ones already generated for this topic.")
+    return test_data
+
+# Function to keep the latest generated prompts for evaluation
+def remember_prompt(prompt, keep=20):
+    # Offered on the Evaluate Prompts page; most recent last
+    prompts = [saved for saved in st.session_state.generated_prompts if saved != prompt]
+    st.session_state.generated_prompts = (prompts + [prompt])[-keep:]
 
-        test_data_str = ""
-        for chunk in chat_completion:
-            if chunk.choices[0].delta.content is not None:
-                test_data_str += chunk.choices[0].delta.content
+@traceable # Langsmith Tracing and Observability
+# Function to score several prompts on the same test set
+@metrics.timer("operation_seconds", operation="evaluate_prompts")
+def evaluate_prompt_set(prompts, cases):
+    from groq_prompt_engineer.evaluation import evaluate_prompts, get_default_eval_cache  # Imports NumPy, so only once an evaluation runs
+
+    client = get_client(groq_api_key)
+    total = len(prompts) * len(cases)
+    progress = st.progress(0.0, text=f"Evaluating 0 of {total}")
+    state = {"done": 0, "shown": 0.0}
+
+    def on_result(result, refresh_every=0.25):
+        state["done"] += 1
+        now = time.perf_counter()
+        # Cached answers arrive in bursts; redrawing for each one would flood the browser
+        if now - state["shown"] >= refresh_every or state["done"] >= total:
+            state["shown"] = now
+            progress.progress(state["done"] / total, text=f"Evaluating {state['done']} of {total}")
 
-        # Attempt to parse the response as JSON
-        try:
-            json_data = json.loads(test_data_str)
-            if isinstance(json_data, list) and all(isinstance(item, dict) and 'human' in item and 'ai' in item for item in json_data):
-                return json_data
-            else:
-                raise ValueError("Response is not in the expected format")
-        except json.JSONDecodeError:
-            # If JSON parsing fails, try to extract JSON from the response
-            json_match = re.search(r'\[.*\]', test_data_str, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                return json.loads(json_str)
-            else:
-                raise ValueError("Could not extract valid JSON from the response")
+    try:
+        outcome = evaluate_prompts(
+            client,
+            prompts,
+            cases,
+            model=st.session_state.model,
+            limiter=limiter,
+            # Answers are cached per prompt and test case, so a rerun only evaluates what changed
+            cache=get_default_eval_cache() if st.session_state.use_cache else None,
+            on_result=on_result,
+        )
     except Exception as e:
-        st.error(f"An error occurred while generating test data: {str(e)}")
+        st.error(f"An error occurred while evaluating prompts: {str(e)}")
         return None
+    finally:
+        progress.empty()
+    return outcome
+
+def show_evaluation(outcome, prompts, cases):
+    st.caption(f"{outcome['requests']} requests sent · {outcome['cached']} answers reused from the cache")
+    st.dataframe(
+        [{"Prompt": prompts[summary["prompt"]][:80], "F1": summary["f1"], "Exact match": summary["exact_match"],
+          "Length (words)": summary["length"], "Length ratio": summary["length_ratio"], "Errors": summary["errors"]}
+         for summary in outcome["prompts"]],
+        hide_index=True,
+    )
+    st.success(f"Best prompt: {prompts[outcome['best']][:100]}")
+    with st.expander("Answers per test case"):
+        st.dataframe(
+            [{"Prompt": result["prompt"] + 1, "Question": cases[result["case"]]["human"], "Answer": result["output"],
+              "Expected": cases[result["case"]]["ai"], "F1": result["f1"], "Error": result["error"]}
+             for result in outcome["results"]],
+            hide_index=True,
+        )
+    st.download_button("Download results as JSON", json.dumps(outcome, indent=2), "prompt_evaluation.json", "application/json", key="evaluation_download")
+
+def show_history_entry(entry):
+    created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created"]))
+    with st.expander(f"{entry['kind'].title()} · {entry['input'][:80]} · {entry['model']} · {created}"):
+        if entry.get("snippet"):
+            st.markdown(entry["snippet"])
+        details = [f"{entry['latency_s']:.1f}s" if entry["latency_s"] is not None else None,
+                   f"{entry['prompt_tokens']:,} prompt tokens" if entry["prompt_tokens"] is not None else None,
+                   f"{entry['output_tokens']:,} output tokens" if entry["output_tokens"] is not None else None]
+        st.caption(" · ".join(detail for detail in details if detail))
+        st.code(entry["output"], language="json" if entry["kind"] == DATASET else None)
+        reuse_col, download_col = st.columns(2)
+        if entry["kind"] == PROMPT:
+            if reuse_col.button("Use in evaluation", key=f"history_reuse_{entry['id']}"):
+                remember_prompt(entry["output"])
+                st.success("Added to the prompts on the Evaluate Prompts page.")
+            download_col.download_button("Download as TXT", entry["output"], f"prompt_{entry['id']}.txt", "text/plain", key=f"history_download_{entry['id']}")
+        else:
+            if reuse_col.button("Use as test set", key=f"history_reuse_{entry['id']}"):
+                st.session_state.test_data = parse_pairs(entry["output"])
+                st.success("This dataset is now the test set on the Evaluate Prompts page.")
+            download_col.download_button("Download as JSONL", entry["output"], f"test_data_{entry['id']}.jsonl", "application/jsonl", key=f"history_download_{entry['id']}")
+
+# Function to queue a dataset job that keeps running across reruns and restarts
+def submit_dataset_job(topic, num_pairs, sharded=False, shard_size=DEFAULT_SHARD_SIZE, max_workers=DEFAULT_MAX_WORKERS):
+    return get_default_job_queue().submit_dataset(
+        groq_api_key,
+        topic,
+        num_pairs,
+        model=st.session_state.model,
+        temperature=st.session_state.temperature,
+        max_output_tokens=st.session_state.max_output_tokens,
+        system_prompt=st.session_state.system_prompt,
+        sharded=sharded,
+        shard_size=shard_size,
+        max_workers=max_workers,
+    )
+
+# Job results above this size are downloaded gzip-compressed
+GZIP_DOWNLOAD_BYTES = 8 * 1024 * 1024
+
+# Read a job's result file only when its download button is clicked, not on every rerun.
+# Streamlit keeps the returned bytes in memory, so large results are gzipped block by block:
+# only the compressed file (a fraction of the JSONL) is ever held, never the raw text
+def read_result_file(path, compress=False, block_bytes=1024 * 1024):
+    buffer = io.BytesIO()
+    with open(path, "rb") as f:
+        if not compress:
+            return f.read()
+        with gzip.GzipFile(fileobj=buffer, mode="wb") as archive:
+            shutil.copyfileobj(f, archive, block_bytes)
+    return buffer.getvalue()
+
+# Function to list this API key's background jobs with progress, downloads and cancellation
+def show_dataset_jobs():
+    queue = get_default_job_queue()
+    jobs = queue.store.list(key_hash(groq_api_key))
+    if not jobs:
+        return
+    st.subheader("Background Jobs")
+    for job in jobs:
+        params = job["params"]
+        label = f"{params['topic'][:60]} · {job['progress']} of {job['total']} pairs · {job['status']}"
+        with st.expander(label, expanded=job["status"] in (QUEUED, RUNNING)):
+            st.progress(min(job["progress"] / job["total"], 1.0))
+            if job["error"]:
+                st.error(job["error"])
+            download_col, cancel_col = st.columns(2)
+            if job["progress"] and os.path.exists(job["result_path"]):
+                compress = os.path.getsize(job["result_path"]) > GZIP_DOWNLOAD_BYTES
+                download_col.download_button(
+                    ("Download as JSONL" if job["status"] == DONE else "Download partial JSONL") + (" (gzip)" if compress else ""),
+                    functools.partial(read_result_file, job["result_path"], compress),
+                    f"test_data_{job['id'][:8]}.jsonl" + (".gz" if compress else ""),
+                    "application/gzip" if compress else "application/jsonl", key=f"job_download_{job['id']}",
+                )
+            if job["status"] in (QUEUED, RUNNING) and cancel_col.button("Cancel", key=f"job_cancel_{job['id']}"):
+                queue.store.cancel(job["id"])
 
 # Setup Groq API
 if not st.session_state.api_configured:
@@ -329,6 +450,8 @@ if not st.session_state.api_configured:
 
 if st.session_state.api_configured:
     st.sidebar.success("Groq API key configured successfully!")
+    # Background dataset jobs only run while a session has supplied their API key (keys are never stored)
+    get_default_job_queue().register_key(groq_api_key)
 
 # Main content area 
 st.markdown("<p style='text-align: center; color: #F0F0F0;'>Easily become a Prompt Engineering Professional </p>", unsafe_allow_html=True)
@@ -336,15 +459,15 @@ st.markdown("<p style='text-align: center; color: #F0F0F0;'>Easily become a Prom
 # Horizontal menu
 selected = option_menu(
     menu_title=None,
-    options=["Generate Prompt", "Generate Dataset", "Help"],  # Removed "Analyze File"
-    icons=["robot", "database", "question-circle"],  # Removed "file-earmark-text"
+    options=["Generate Prompt", "Generate Dataset", "Evaluate Prompts", "History", "Help"],  # Removed "Analyze File"
+    icons=["robot", "database", "clipboard-data", "clock-history", "question-circle"],  # Removed "file-earmark-text"
     menu_icon="cast",
     default_index=0,
     orientation="horizontal",
 )
 
 if selected == "Generate Prompt":
-    col1, col2 = st.columns([2, 1])
+    col1, _ = st.columns([2, 1])
     
     with col1:
         st.subheader("Generate AI/LLM Prompt")
@@ -359,12 +482,40 @@ if selected == "Generate Prompt":
         - character_name, setting, genre
         """)
         
+        # Run several models at once: race for the first good answer or compare them all
+        run_mode = st.radio("Run mode:", ["Single model", "Race: first good answer wins", "Compare all"], horizontal=True, key="run_mode")
+        fanout_models = [st.session_state.model]
+        if run_mode != "Single model":
+            fanout_models = st.multiselect(
+                "Models to run:", list(RATE_LIMITS),
+                default=list(dict.fromkeys([st.session_state.model, "llama-3.1-8b-instant"])), key="fanout_models",
+            )
+
         if st.button("Generate Prompt", key="generate_button"):
-            if task:
+            if task and not fanout_models:
+                st.warning("Please select at least one model.")
+            elif task:
+                st.subheader("Generated Prompt:")
                 with st.spinner("Generating prompt..."):
-                    generated_prompt = generate_prompt(task, variables)
+                    if run_mode == "Single model":
+                        generated_prompt = generate_prompt(task, variables)
+                    else:
+                        outcome = generate_prompt_fanout(task, variables, fanout_models, COMPARE if run_mode == "Compare all" else RACE)
+                        generated_prompt = None
+                        if outcome:
+                            show_fanout_results(outcome)
+                            if outcome["mode"] == COMPARE:
+                                for result, result_tab in zip(outcome["results"], st.tabs([result["model"] for result in outcome["results"]])):
+                                    result_tab.markdown(result["text"] or "_No output_")
+                            elif outcome["winner"]:
+                                generated_prompt = next(result["text"] for result in outcome["results"] if result["model"] == outcome["winner"])
+                                st.caption(f"Answer from {outcome['winner']}; slower models were cancelled")
+                            else:
+                                st.error("None of the selected models returned a usable prompt.")
                     if generated_prompt:
-                        st.subheader("Generated Prompt:")
+                        remember_prompt(generated_prompt)
+                        from annotated_text import annotated_text, annotation  # Only needed once a prompt exists
+
                         annotated_text(
                             annotation(generated_prompt, "AI-Generated", "#ff4b4b")
                         )
@@ -380,34 +531,90 @@ if selected == "Generate Prompt":
                         st.markdown(jsonl_download, unsafe_allow_html=True)
             else:
                 st.warning("Please enter a task.")
-    
-    with col2:
-        st_lottie(lottie_ai, height=300, key="lottie_ai")
 
 elif selected == "Generate Dataset":
     st.subheader("Generate Test Dataset for Fine Tuning an LLM")
     topic = st.text_input("Enter your text or topic here:", key="test_data_topic")
-    num_pairs = st.number_input("Number of conversation pairs to generate:", min_value=1, max_value=100, value=10, step=1, key="num_pairs")
+    num_pairs = st.number_input("Number of conversation pairs to generate:", min_value=1, max_value=MAX_DATASET_PAIRS, value=10, step=1, key="num_pairs")
+    # Large datasets are written straight to a JSONL file on disk instead of being held in the page
+    large = num_pairs > LARGE_DATASET_PAIRS
+    if large:
+        st.info(f"Datasets over {LARGE_DATASET_PAIRS} pairs are generated in the background, in parallel shards, and saved as JSONL on disk.")
+    sharded = st.checkbox("Parallel sharded generation (faster for large datasets)", value=num_pairs > DEFAULT_SHARD_SIZE, key="sharded_generation", disabled=large) or large
+    shard_size, max_workers = DEFAULT_SHARD_SIZE, DEFAULT_MAX_WORKERS
+    if sharded:
+        shard_col, worker_col = st.columns(2)
+        shard_size = shard_col.number_input("Pairs per shard:", min_value=5, max_value=50, value=DEFAULT_SHARD_SIZE, step=5, key="shard_size")
+        max_workers = worker_col.slider("Concurrent requests:", min_value=1, max_value=8, value=DEFAULT_MAX_WORKERS, key="max_workers")
+    background = st.checkbox("Run in background (keeps going if you leave the page; results are saved to disk)", key="background_job", disabled=large) or large
     
     if st.button("Generate Test Data", key="generate_test_data_button"):
-        if topic:
+        if topic and background:
+            submit_dataset_job(topic, num_pairs, sharded=sharded, shard_size=shard_size, max_workers=max_workers)
+            st.success("Job queued. Progress is shown below.")
+        elif topic:
             with st.spinner("Generating test data..."):
-                test_data = generate_test_data(topic, num_pairs)
+                jsonl_lines = []
+                test_data = generate_test_data(topic, num_pairs, sharded=sharded, shard_size=shard_size, max_workers=max_workers, jsonl_lines=jsonl_lines)
+                if test_data and len(test_data) < num_pairs:
+                    st.warning(f"Only {len(test_data)} of {num_pairs} unique pairs could be generated.")
                 if test_data:
+                    st.session_state.test_data = test_data  # The default test set on the Evaluate Prompts page
                     st.json(test_data)
                     
-                    # Download options
+                    # Download options (served by Streamlit rather than inlined into the page as base64)
                     st.subheader("Download Options")
-                    json_download = get_download_link(json.dumps(test_data, indent=2), "test_data.json", "Download as JSON")
-                    st.markdown(json_download, unsafe_allow_html=True)
+                    st.download_button("Download as JSON", json.dumps(test_data, indent=2), "test_data.json", "application/json", key="test_data_json_download")
                     
                     # Create JSONL file
-                    jsonl_content = "\n".join(json.dumps(item) for item in test_data)
-                    jsonl_download = get_download_link(jsonl_content, "test_data.jsonl", "Download as JSONL")
-                    st.markdown(jsonl_download, unsafe_allow_html=True)
+                    jsonl_content = "\n".join(jsonl_lines) + "\n"
+                    st.download_button("Download as JSONL", jsonl_content, "test_data.jsonl", "application/jsonl", key="test_data_jsonl_download")
         else:
             st.warning("Please enter a topic for test data generation.")
 
+    if groq_api_key:
+        # Only poll while something is in flight; finished jobs need no refresh
+        active = any(job["status"] in (QUEUED, RUNNING) for job in get_default_job_queue().store.list(key_hash(groq_api_key)))
+        st.fragment(show_dataset_jobs, run_every=2 if active else None)()
+
+elif selected == "Evaluate Prompts":
+    st.subheader("Compare Prompts on a Test Set")
+    st.markdown("Each prompt is used as the system prompt for every question in the test set, and the answers are scored against the expected ones.")
+    prompts = st.multiselect(
+        "Prompts generated this session:", st.session_state.generated_prompts,
+        default=st.session_state.generated_prompts[-2:], format_func=lambda prompt: prompt[:100], key="eval_prompts",
+    )
+    pasted = st.text_area("More prompts to compare (separate prompts with a line containing only ---):", key="eval_pasted_prompts")
+    prompts = prompts + [prompt.strip() for prompt in re.split(r"(?m)^---\s*$", pasted) if prompt.strip()]
+    uploaded = st.file_uploader("Test set (JSON or JSONL of human/ai pairs); defaults to the last generated dataset:", type=["json", "jsonl"], key="eval_cases_file")
+    cases = st.session_state.get("test_data") or []
+    if uploaded is not None:
+        try:
+            cases = parse_pairs(uploaded.getvalue().decode("utf-8", errors="replace"))
+        except ValueError:
+            st.error("No human/ai pairs found in the uploaded file.")
+            cases = []
+    st.caption(f"{len(prompts)} prompts × {len(cases)} test cases = {len(prompts) * len(cases)} evaluations")
+
+    if st.button("Evaluate Prompts", key="evaluate_button"):
+        if not prompts or not cases:
+            st.warning("Please select or paste at least one prompt and provide a test set.")
+        else:
+            outcome = evaluate_prompt_set(prompts, cases)
+            if outcome:
+                show_evaluation(outcome, prompts, cases)
+
+elif selected == "History":
+    st.subheader("Search Past Prompts and Datasets")
+    history = get_default_history()
+    owner = key_hash(groq_api_key)  # Only this API key's generations are shown
+    query = st.text_input("Search your history:", key="history_query", placeholder="e.g. haiku rivers")
+    kind = {"All": None, "Prompts": PROMPT, "Datasets": DATASET}[st.radio("Show:", ["All", "Prompts", "Datasets"], horizontal=True, key="history_kind")]
+    entries = history.search(query, kind, owner) if query.strip() else history.recent(kind, owner)
+    st.caption(f"{history.count(api_key_hash=owner):,} generations saved · showing {len(entries)} {'best matches' if query.strip() else 'most recent'}")
+    for entry in entries:
+        show_history_entry(entry)
+
 elif selected == "Help":
     st.subheader("How to Use This App")
     st.markdown("""
@@ -423,12 +630,21 @@ elif selected == "Help":
    - Click "Generate Test Data" to create conversation pairs.
    - Download the generated conversation pairs data in JSON or JSONL format for fine tuning an LLM.
 
-3. **Sidebar Options**:
+3. **Evaluate Prompts**:
+   - Pick prompts generated in this session, or paste your own separated by a line containing only ---.
+   - Use the last generated dataset as the test set, or upload a JSON/JSONL file of conversation pairs.
+   - Click "Evaluate Prompts" to score every prompt on every test case (exact match, token F1, length) and see which prompt wins.
+
+4. **History**:
+   - Every generated prompt and dataset is saved locally with its model, settings, latency and token counts.
+   - Search them by words from the task, topic or output, download them again, or reuse them on the Evaluate Prompts page.
+
+5. **Sidebar Options**:
    - Enter your Groq API key.
    - Select the Groq model version.
    - Adjust temperature and max output tokens for generation.
 
-4. **Tips for Better Results**:
+6. **Tips for Better Results**:
    - Be specific in your task description.
    - Experiment with different temperature settings.
    - For file analysis, provide clear instructions in the analysis prompt.
@@ -471,6 +687,13 @@ if os.environ.get("DEBUG_MODE") == "True":
         "Model Version": st.session_state.model,
         "API Configured": st.session_state.api_configured
     })
+    st.sidebar.json({"Rate Limiter": limiter.stats()})
+    st.sidebar.json({"Response Cache": get_default_cache().stats()})
+    st.sidebar.json({"Request Coalescing": single_flight.stats()})
+    st.sidebar.json({"Script Run Timing": script_timer.stats()})
+    st.sidebar.json({"Groq Request Timing": timings.summary()})
+    st.sidebar.subheader("Latency Percentiles (s)")
+    st.sidebar.dataframe(metrics.snapshot(), hide_index=True)
 
 # Error Handling
 def handle_error(error):
@@ -542,32 +765,6 @@ with st.sidebar.expander("Release Notes"):
     - Added temperature and max token adjustments
     """)
 
-# Performance Optimization
-@st.cache_data
-def load_static_resources():
-    # Load any static resources here
-    pass
-
-load_static_resources()
-
-@traceable # Langsmith Tracing and Observability
-
-# Ensure all session state variables are initialized
-def initialize_session_state():
-    default_values = {
-        "temperature": 0.5,
-        "max_output_tokens": 8192,
-        "model": "llama3-70b-8192",
-        "api_configured": False,
-        "generated_prompts": [],
-        "analyzed_files": []
-    }
-    for key, value in default_values.items():
-        if key not in st.session_state:
-            st.session_state[key] = value
-
-initialize_session_state()
-
 # Add this at the very end of your script
 if __name__ == "__main__":
     try:
@@ -575,3 +772,8 @@ if __name__ == "__main__":
         pass
     except Exception as e:
         handle_error(e)
+
+# Record how long this script run took (first run in the process = cold start)
+_script_seconds = time.perf_counter() - _script_started
+script_timer.record(_script_seconds)
+metrics.observe("page_render_seconds", _script_seconds)